@@ -0,0 +1,2 @@
+"""Benchmarks da API: frota sintética (frota.py), cenários (cenarios.py),
+execução (executar.py) e comparação de resultados (comparar.py)."""
@@ -0,0 +1,89 @@
+"""Compara a listagem via ORM + to_dict + jsonify com a leitura por tuplas.
+
+Uso: python benchmarks/bench_leitura_rapida.py [--linhas 20000] [--repeticoes 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def popular(db, linhas):
+    from src.models.alocacao import Alocacao
+    from src.models.cliente import Cliente
+    from src.models.datalogger import Datalogger
+    from src.models.demanda import Demanda
+
+    agora = datetime.utcnow()
+    db.session.execute(db.insert(Cliente), [
+        {'nome': f'Cliente {i}', 'created_at': agora, 'updated_at': agora} for i in range(1, 51)
+    ])
+    db.session.execute(db.insert(Demanda), [
+        {'cliente_id': 1 + i % 50, 'descricao': f'Demanda {i}', 'data_inicio': date(2025, 1, 1),
+         'data_fim_prevista': date(2026, 1, 1), 'created_at': agora, 'updated_at': agora}
+        for i in range(1, 501)
+    ])
+    db.session.execute(db.insert(Datalogger), [
+        {'numero_serie': f'BENCH-{i:07d}', 'modelo': 'M', 'status': 'Alocado',
+         'created_at': agora, 'updated_at': agora}
+        for i in range(1, linhas + 1)
+    ])
+    db.session.execute(db.insert(Alocacao), [
+        {'datalogger_id': i, 'demanda_id': 1 + i % 500, 'data_saida': date(2025, 1, 1) + timedelta(days=i % 300),
+         'data_retorno_prevista': date(2025, 6, 1) + timedelta(days=i % 300), 'status': 'Em campo',
+         'created_at': agora, 'updated_at': agora}
+        for i in range(1, linhas + 1)
+    ])
+    db.session.commit()
+
+
+def medir(funcao, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        tamanho = funcao()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, tamanho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--linhas', type=int, default=20000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    from flask import jsonify
+    from src.main import create_app
+    from src.services.migracoes import preparar_banco
+    from src.models.user import db
+    from src.services.consultas import consulta_alocacoes
+    from src.services.leitura_rapida import leitura_alocacoes, linha_para_dict, codificar_json
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')})
+    preparar_banco(app)
+    with app.app_context():
+        popular(db, args.linhas)
+
+        def via_orm():
+            db.session.expunge_all()
+            return len(jsonify([a.to_dict() for a in consulta_alocacoes().all()]).get_data())
+
+        def via_tuplas():
+            return len(codificar_json([linha_para_dict(l) for l in leitura_alocacoes().all()]))
+
+        t_orm, bytes_orm = medir(via_orm, args.repeticoes)
+        t_rapida, bytes_rapida = medir(via_tuplas, args.repeticoes)
+
+    print(f'{args.linhas} alocações (melhor de {args.repeticoes})')
+    print(f'ORM + to_dict + jsonify : {t_orm:.3f}s  {args.linhas / t_orm:>10.0f} linhas/s  {bytes_orm} bytes')
+    print(f'tuplas + codificar_json : {t_rapida:.3f}s  {args.linhas / t_rapida:>10.0f} linhas/s  {bytes_rapida} bytes')
+    print(f'ganho: {t_orm / t_rapida:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Cenários do benchmark: sequências de requisições às rotas de /api.
+
+Cada cenário recebe ``req(metodo, rota, caminho=None, json=None)``, que mede
+a requisição sob a chave ``"METODO rota"`` (``rota`` é o padrão da regra do
+Flask, o mesmo rótulo usado em /metrics) e devolve ``(status, dados)``.
+Ficam de fora o stream SSE (/api/eventos, sem fim) e a importação de planilhas.
+"""
+from datetime import timedelta
+
+
+class Cenario:
+    def __init__(self, nome, funcao, escrita):
+        self.nome = nome
+        self.funcao = funcao
+        self.escrita = escrita
+
+
+CENARIOS = {}
+
+def cenario(nome, escrita=False):
+    def decorador(funcao):
+        CENARIOS[nome] = Cenario(nome, funcao, escrita)
+        return funcao
+    return decorador
+
+
+class Contexto:
+    """Estado compartilhado pelos cenários de uma execução (sorteios e ids criados)."""
+
+    def __init__(self, rng, totais, referencia):
+        self.rng = rng
+        self.totais = totais
+        self.referencia = referencia
+        self._sequencia = 0
+
+    def id(self, tabela):
+        return self.rng.randint(1, self.totais[tabela])
+
+    def unico(self, prefixo):
+        self._sequencia += 1
+        return f'{prefixo}-{self.rng.getrandbits(32):08x}-{self._sequencia}'
+
+    def data(self, dias=0):
+        return (self.referencia + timedelta(days=dias)).isoformat()
+
+
+def _itens(dados):
+    return dados['items'] if isinstance(dados, dict) else dados
+
+
+@cenario('listagens')
+def listagens(req, ctx):
+    for recurso in ('dataloggers', 'clientes', 'demandas', 'alocacoes'):
+        rota = f'/api/{recurso}'
+        req('GET', rota)
+        req('GET', rota, f'{rota}?limit=50&sort=-id')
+    req('GET', '/api/dataloggers', '/api/dataloggers?status=Estoque&limit=50')
+    req('GET', '/api/alocacoes', '/api/alocacoes?status=Em%20campo&limit=50&sort=-data_saida')
+
+@cenario('detalhes')
+def detalhes(req, ctx):
+    req('GET', '/api/dataloggers/<int:id>', f'/api/dataloggers/{ctx.id("dataloggers")}')
+    cliente_id = ctx.id('clientes')
+    req('GET', '/api/clientes/<int:id>', f'/api/clientes/{cliente_id}')
+    req('GET', '/api/clientes/<int:id>/demandas', f'/api/clientes/{cliente_id}/demandas')
+    demanda_id = ctx.id('demandas')
+    req('GET', '/api/demandas/<int:id>', f'/api/demandas/{demanda_id}')
+    req('GET', '/api/demandas/<int:id>/alocacoes', f'/api/demandas/{demanda_id}/alocacoes')
+    req('GET', '/api/alocacoes/<int:id>', f'/api/alocacoes/{ctx.id("alocacoes")}')
+
+@cenario('operacao')
+def operacao(req, ctx):
+    req('GET', '/api/alocacoes/em-campo')
+    req('GET', '/api/alocacoes/retornos-previstos',
+        f'/api/alocacoes/retornos-previstos?data_inicio={ctx.data()}&data_fim={ctx.data(30)}')
+    req('GET', '/api/dataloggers/calibracao-vencida')
+    req('GET', '/api/dataloggers/disponveis')
+    req('GET', '/api/users')
+    req('GET', '/api/admin/tarefas')
+
+@cenario('dashboard')
+def dashboard(req, ctx):
+    req('GET', '/api/dashboard/resumo')
+    req('GET', '/api/dashboard/disponibilidade', '/api/dashboard/disponibilidade?dias=30')
+    req('GET', '/api/dashboard/ocupacao-por-cliente')
+    req('GET', '/api/dashboard/historico-ocupacao', '/api/dashboard/historico-ocupacao?dias=90')
+    req('GET', '/api/dashboard/historico-ocupacao', '/api/dashboard/historico-ocupacao?granularidade=mes&dias=730')
+    req('GET', '/api/dashboard/alertas', '/api/dashboard/alertas?limit=50')
+
+@cenario('exportacao')
+def exportacao(req, ctx):
+    req('GET', '/api/export/<recurso>', '/api/export/alocacoes?format=ndjson')
+
+@cenario('cadastros', escrita=True)
+def cadastros(req, ctx):
+    status, cliente = req('POST', '/api/clientes', json={'nome': ctx.unico('Cliente bench')})
+    if status == 201:
+        rota = '/api/clientes/<int:id>'
+        req('PUT', rota, f'/api/clientes/{cliente["id"]}', json={'contato': 'Benchmark'})
+        req('DELETE', rota, f'/api/clientes/{cliente["id"]}')
+
+    status, datalogger = req('POST', '/api/dataloggers', json={'numero_serie': ctx.unico('BENCH'), 'modelo': 'Benchmark'})
+    if status == 201:
+        rota = '/api/dataloggers/<int:id>'
+        req('PUT', rota, f'/api/dataloggers/{datalogger["id"]}', json={'observacoes': 'Benchmark'})
+        req('DELETE', rota, f'/api/dataloggers/{datalogger["id"]}')
+
+    status, usuario = req('POST', '/api/users', json={'username': ctx.unico('bench'), 'email': ctx.unico('bench') + '@exemplo.com'})
+    if status == 201:
+        rota = '/api/users/<int:user_id>'
+        req('GET', rota, f'/api/users/{usuario["id"]}')
+        req('PUT', rota, f'/api/users/{usuario["id"]}', json={'email': ctx.unico('bench') + '@exemplo.com'})
+        req('DELETE', rota, f'/api/users/{usuario["id"]}')
+
+@cenario('ciclo_alocacao', escrita=True)
+def ciclo_alocacao(req, ctx):
+    """Demanda nova: aloca em lote e individualmente, devolve tudo e finaliza."""
+    status, demanda = req('POST', '/api/demandas', json={
+        'cliente_id': ctx.id('clientes'), 'descricao': ctx.unico('Demanda bench'),
+        'data_inicio': ctx.data(), 'data_fim_prevista': ctx.data(30)
+    })
+    if status != 201:
+        return
+    req('PUT', '/api/demandas/<int:id>', f'/api/demandas/{demanda["id"]}', json={'observacoes': 'Benchmark'})
+    periodo = {'demanda_id': demanda['id'], 'data_saida': ctx.data(), 'data_retorno_prevista': ctx.data(15)}
+
+    status, lote = req('POST', '/api/alocacoes/lote', json=dict(periodo, quantidade=5))
+    alocacoes = [item['alocacao_id'] for item in lote.get('resultados', []) if item.get('sucesso')] if status == 201 else []
+
+    _, livres = req('GET', '/api/dataloggers', '/api/dataloggers?status=Estoque&limit=1')
+    livres = _itens(livres)
+    if livres:
+        status, alocacao = req('POST', '/api/alocacoes', json=dict(periodo, datalogger_id=livres[0]['id']))
+        if status == 201:
+            rota = '/api/alocacoes/<int:id>'
+            req('PUT', rota, f'/api/alocacoes/{alocacao["id"]}', json={'observacoes': 'Benchmark'})
+            req('POST', '/api/alocacoes/<int:id>/retorno', f'/api/alocacoes/{alocacao["id"]}/retorno', json={})
+            req('DELETE', rota, f'/api/alocacoes/{alocacao["id"]}')
+
+    if alocacoes:
+        req('POST', '/api/alocacoes/retorno-lote', json={'alocacoes': [{'id': i} for i in alocacoes]})
+    req('POST', '/api/demandas/<int:id>/finalizar', f'/api/demandas/{demanda["id"]}/finalizar', json={})
+
+@cenario('alertas', escrita=True)
+def alertas(req, ctx):
+    _, abertos = req('GET', '/api/dashboard/alertas', '/api/dashboard/alertas?limit=5')
+    abertos = _itens(abertos)
+    if abertos:
+        alerta_id = ctx.rng.choice(abertos)['id']
+        req('POST', '/api/dashboard/alertas/<int:id>/reconhecer', f'/api/dashboard/alertas/{alerta_id}/reconhecer', json={})
+        req('POST', '/api/dashboard/alertas/<int:id>/reabrir', f'/api/dashboard/alertas/{alerta_id}/reabrir', json={})
@@ -0,0 +1,54 @@
+"""Compara dois resultados de benchmarks.executar, rota a rota.
+
+Uso: python -m benchmarks.comparar antes.json depois.json [--metrica p95_ms] [--limiar 10]
+Marca com ▲ as rotas que pioraram mais que o limiar (%) e com ▼ as que melhoraram.
+"""
+import argparse
+import json
+
+
+def _variacao(antes, depois):
+    if not antes:
+        return None
+    return (depois - antes) / antes * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('antes')
+    parser.add_argument('depois')
+    parser.add_argument('--metrica', default='p95_ms', help='p50_ms, p95_ms, p99_ms, media_ms, consultas_media...')
+    parser.add_argument('--limiar', type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.antes) as arquivo:
+        antes = json.load(arquivo)
+    with open(args.depois) as arquivo:
+        depois = json.load(arquivo)
+
+    for chave in ('commit', 'banco', 'modo', 'totais', 'concorrencia'):
+        if antes['meta'].get(chave) != depois['meta'].get(chave):
+            print(f"{chave}: {antes['meta'].get(chave)} → {depois['meta'].get(chave)}")
+
+    print(f"{'rota':<52} {args.metrica + ' antes':>14} {'depois':>10} {'var.':>8}")
+    for rota in sorted(set(antes['rotas']) | set(depois['rotas'])):
+        valor_antes = antes['rotas'].get(rota, {}).get(args.metrica)
+        valor_depois = depois['rotas'].get(rota, {}).get(args.metrica)
+        if valor_antes is None or valor_depois is None:
+            print(f"{rota:<52} {str(valor_antes):>14} {str(valor_depois):>10}")
+            continue
+        variacao = _variacao(valor_antes, valor_depois)
+        marca = ''
+        if variacao is not None and variacao > args.limiar:
+            marca = ' ▲'
+        elif variacao is not None and variacao < -args.limiar:
+            marca = ' ▼'
+        texto = f'{variacao:+.1f}%' if variacao is not None else '-'
+        print(f"{rota:<52} {valor_antes:>14} {valor_depois:>10} {texto:>8}{marca}")
+
+    for chave in ('vazao_rps', 'pico_rss_mb', 'erros'):
+        print(f"{chave}: {antes['total'].get(chave)} → {depois['total'].get(chave)}")
+
+
+if __name__ == '__main__':
+    main()
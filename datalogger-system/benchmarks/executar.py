@@ -0,0 +1,357 @@
+"""Executa os cenários de benchmark e grava latência (p50/p95/p99), vazão,
+consultas SQL por requisição e pico de memória em JSON.
+
+Uso (a partir de datalogger-system/):
+  python -m benchmarks.executar --escala pequena
+  python -m benchmarks.executar --escala media --database-url postgresql://localhost/bench
+  python -m benchmarks.executar --url http://localhost:5000 --concorrencia 8 --somente-leitura
+  python -m benchmarks.comparar benchmarks/resultados/antes.json benchmarks/resultados/depois.json
+
+Sem --url as requisições passam pelo test client do Flask neste processo, com
+o banco indicado em --database-url (padrão: SQLite temporário), populado pela
+frota sintética. Com --url a carga vai para um servidor já em execução; as
+consultas por rota vêm do /metrics dele e a frota é gravada antes em
+--database-url, se informado (o mesmo banco do servidor).
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from urllib.parse import urlsplit
+
+from benchmarks.cenarios import CENARIOS, Contexto
+from benchmarks.frota import ESCALAS
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+TABELAS = ('clientes', 'demandas', 'dataloggers', 'alocacoes')
+
+
+class Medicoes:
+    """Amostras por rota ("METODO rota"), somadas entre as threads de carga."""
+
+    def __init__(self):
+        self.rotas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, chave, segundos, status, tamanho, consultas):
+        with self._lock:
+            rota = self.rotas.setdefault(chave, {'amostras': [], 'status': {}, 'bytes': 0, 'consultas': []})
+            rota['amostras'].append(segundos)
+            rota['status'][status] = rota['status'].get(status, 0) + 1
+            rota['bytes'] += tamanho
+            if consultas is not None:
+                rota['consultas'].append(consultas)
+
+
+def _decodificar(corpo, tipo):
+    if tipo and tipo.startswith('application/json') and corpo:
+        return json.loads(corpo)
+    return None
+
+
+class ClienteFlask:
+    """Requisições pelo test client, contando as consultas SQL de cada uma."""
+
+    def __init__(self, app, contador):
+        self.cliente = app.test_client()
+        self.contador = contador
+
+    def requisitar(self, metodo, caminho, corpo):
+        self.contador.consultas = 0
+        resposta = self.cliente.open(caminho, method=metodo, json=corpo)
+        dados = resposta.get_data()
+        return resposta.status_code, dados, _decodificar(dados, resposta.content_type), self.contador.consultas
+
+
+class ClienteHttp:
+    """Requisições HTTP com conexão persistente (uma por thread)."""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.conexao = None
+
+    def requisitar(self, metodo, caminho, corpo):
+        cabecalhos = {}
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode()
+            cabecalhos['Content-Type'] = 'application/json'
+        for tentativa in range(2):
+            if self.conexao is None:
+                self.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=300)
+            try:
+                self.conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+                resposta = self.conexao.getresponse()
+                conteudo = resposta.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Servidor fechou a conexão ociosa (keepalive): reabre uma vez
+                self.conexao.close()
+                self.conexao = None
+                if tentativa:
+                    raise
+        return resposta.status, conteudo, _decodificar(conteudo, resposta.getheader('Content-Type')), None
+
+
+def _medidor(cliente, medicoes):
+    def req(metodo, rota, caminho=None, json=None):
+        inicio = time.perf_counter()
+        status, conteudo, dados, consultas = cliente.requisitar(metodo, caminho or rota, json)
+        decorrido = time.perf_counter() - inicio
+        if medicoes is not None:
+            medicoes.registrar(f'{metodo} {rota}', decorrido, status, len(conteudo), consultas)
+        return status, dados
+    return req
+
+
+def _percentil(ordenadas, p):
+    # Nearest-rank
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+def resumir(medicoes):
+    rotas = {}
+    for chave, rota in sorted(medicoes.rotas.items()):
+        amostras = sorted(rota['amostras'])
+        total = len(amostras)
+        resumo = {
+            'requisicoes': total,
+            'erros': sum(n for status, n in rota['status'].items() if status >= 500),
+            'status': {str(status): n for status, n in sorted(rota['status'].items())},
+            'media_ms': round(sum(amostras) / total * 1000, 3),
+            'p50_ms': round(_percentil(amostras, 50) * 1000, 3),
+            'p95_ms': round(_percentil(amostras, 95) * 1000, 3),
+            'p99_ms': round(_percentil(amostras, 99) * 1000, 3),
+            'max_ms': round(amostras[-1] * 1000, 3),
+            # Requisições por segundo de uma conexão em série
+            'vazao_rps': round(total / sum(amostras), 2) if sum(amostras) else None,
+            'bytes_media': round(rota['bytes'] / total),
+        }
+        if rota['consultas']:
+            resumo['consultas_media'] = round(sum(rota['consultas']) / len(rota['consultas']), 2)
+            resumo['consultas_max'] = max(rota['consultas'])
+        rotas[chave] = resumo
+    return rotas
+
+
+def _ler_metricas(url):
+    from prometheus_client.parser import text_string_to_metric_families
+
+    cliente = ClienteHttp(url)
+    status, conteudo, _, _ = cliente.requisitar('GET', '/metrics', None)
+    if status != 200:
+        return {}
+    somas = {}
+    for familia in text_string_to_metric_families(conteudo.decode()):
+        if familia.name != 'http_request_sql_queries':
+            continue
+        for amostra in familia.samples:
+            if amostra.name.endswith(('_sum', '_count')):
+                chave = (f"{amostra.labels['method']} {amostra.labels['endpoint']}", amostra.name.rsplit('_', 1)[1])
+                somas[chave] = amostra.value
+    return somas
+
+def _consultas_do_servidor(antes, depois, rotas):
+    for chave, resumo in rotas.items():
+        requisicoes = depois.get((chave, 'count'), 0) - antes.get((chave, 'count'), 0)
+        if requisicoes > 0:
+            resumo['consultas_media'] = round((depois.get((chave, 'sum'), 0) - antes.get((chave, 'sum'), 0)) / requisicoes, 2)
+
+
+def _zerar_pico_rss():
+    # No Linux, escrever 5 em clear_refs zera o pico (VmHWM): a geração da frota não entra na medida
+    try:
+        with open('/proc/self/clear_refs', 'w') as arquivo:
+            arquivo.write('5')
+    except OSError:
+        pass
+
+def _pico_rss_mb(pid='self'):
+    try:
+        with open(f'/proc/{pid}/status') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('VmHWM:'):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid == 'self':
+        import resource
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(maximo / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    return None
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _totais_existentes(req):
+    # Maior id de cada tabela, para sortear registros de um banco já populado
+    totais = {}
+    for tabela in TABELAS:
+        _, dados = req('GET', f'/api/{tabela}', f'/api/{tabela}?limit=1&sort=-id')
+        itens = dados['items'] if isinstance(dados, dict) else dados
+        totais[tabela] = itens[0]['id'] if itens else 0
+    return totais
+
+
+def _preparar_app(args, escala, referencia):
+    """Importa o app sobre o banco escolhido e grava a frota (a menos de --reaproveitar)."""
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.setdefault('AGENDADOR_ATIVO', 'false')
+    from src.main import create_app
+    from src.models.user import db
+    from src.services.migracoes import preparar_banco
+    from benchmarks.frota import popular
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    preparar_banco(app)
+    with app.app_context():
+        dialeto = db.engine.dialect.name
+        if not args.reaproveitar:
+            inicio = time.perf_counter()
+            totais = popular(db, referencia, semente=args.semente, **escala)
+            print(f"✅ Frota gerada em {time.perf_counter() - inicio:.1f}s: {totais}")
+        db.session.remove()
+    return app, dialeto
+
+
+def executar_carga(fabrica_cliente, cenarios, totais, referencia, args):
+    medicoes = Medicoes()
+
+    def trabalhador(indice):
+        cliente = fabrica_cliente()
+        ctx = Contexto(random.Random(args.semente + indice), totais, referencia)
+        for rodada in range(args.aquecimento + args.repeticoes):
+            req = _medidor(cliente, medicoes if rodada >= args.aquecimento else None)
+            for cenario in cenarios:
+                cenario.funcao(req, ctx)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(args.concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return medicoes, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', choices=ESCALAS, default='pequena')
+    for tabela in TABELAS:
+        parser.add_argument(f'--{tabela}', type=int, help=f'sobrescreve a quantidade de {tabela} da escala')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--referencia', type=date.fromisoformat, default=date.today(),
+                        help='data "hoje" da frota (AAAA-MM-DD), para repetir uma execução exatamente')
+    parser.add_argument('--database-url', help='banco a popular/usar (padrão: SQLite temporário)')
+    parser.add_argument('--url', help='servidor HTTP alvo (padrão: test client neste processo)')
+    parser.add_argument('--pids', help='PIDs do servidor (separados por vírgula) para medir o pico de memória com --url')
+    parser.add_argument('--reaproveitar', action='store_true', help='não gera a frota: usa os dados já existentes')
+    parser.add_argument('--cenarios', help=f'lista separada por vírgula (padrão: todos): {", ".join(CENARIOS)}')
+    parser.add_argument('--somente-leitura', action='store_true', help='ignora os cenários que escrevem')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--aquecimento', type=int, default=1, help='rodadas iniciais fora da medição')
+    parser.add_argument('--concorrencia', type=int, default=1)
+    parser.add_argument('--saida', help='arquivo JSON do resultado')
+    args = parser.parse_args()
+
+    escala = dict(ESCALAS[args.escala])
+    for tabela in TABELAS:
+        if getattr(args, tabela) is not None:
+            escala[tabela] = getattr(args, tabela)
+
+    nomes = args.cenarios.split(',') if args.cenarios else list(CENARIOS)
+    cenarios = [CENARIOS[nome] for nome in nomes if not (args.somente_leitura and CENARIOS[nome].escrita)]
+
+    if args.url:
+        dialeto = None
+        if args.database_url and not args.reaproveitar:
+            _, dialeto = _preparar_app(args, escala, args.referencia)
+        fabrica_cliente = lambda: ClienteHttp(args.url)
+    else:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        app, dialeto = _preparar_app(args, escala, args.referencia)
+        contador = threading.local()
+
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def contar(*_):
+            contador.consultas = getattr(contador, 'consultas', 0) + 1
+
+        fabrica_cliente = lambda: ClienteFlask(app, contador)
+
+    totais = _totais_existentes(_medidor(fabrica_cliente(), None))
+    print(f"🔄 Executando {', '.join(c.nome for c in cenarios)} sobre {totais}")
+
+    metricas_antes = _ler_metricas(args.url) if args.url else None
+    _zerar_pico_rss()
+    medicoes, duracao = executar_carga(fabrica_cliente, cenarios, totais, args.referencia, args)
+    rotas = resumir(medicoes)
+
+    if args.url:
+        _consultas_do_servidor(metricas_antes, _ler_metricas(args.url), rotas)
+        picos = [_pico_rss_mb(pid.strip()) for pid in args.pids.split(',')] if args.pids else []
+        pico_rss = round(sum(p for p in picos if p), 1) if any(picos) else None
+    else:
+        pico_rss = _pico_rss_mb()
+
+    requisicoes = sum(rota['requisicoes'] for rota in rotas.values())
+    resultado = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_atual(),
+            'modo': 'http' if args.url else 'test_client',
+            'banco': dialeto,
+            'escala': args.escala,
+            'totais': totais,
+            'semente': args.semente,
+            'referencia': args.referencia.isoformat(),
+            'cenarios': [c.nome for c in cenarios],
+            'repeticoes': args.repeticoes,
+            'concorrencia': args.concorrencia,
+            'python': platform.python_version(),
+        },
+        'total': {
+            'requisicoes': requisicoes,
+            'erros': sum(rota['erros'] for rota in rotas.values()),
+            'duracao_s': round(duracao, 3),
+            'vazao_rps': round(requisicoes / duracao, 2) if duracao else None,
+            'pico_rss_mb': pico_rss,
+        },
+        'rotas': rotas,
+    }
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{args.escala}-{dialeto or 'http'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    print(f"{'rota':<52} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'SQL':>6}")
+    for chave, rota in rotas.items():
+        print(f"{chave:<52} {rota['requisicoes']:>5} {rota['p50_ms']:>9.2f} {rota['p95_ms']:>9.2f} "
+              f"{rota['p99_ms']:>9.2f} {rota.get('consultas_media', ''):>6}")
+    print(f"✅ {requisicoes} requisições em {duracao:.1f}s ({resultado['total']['vazao_rps']} req/s), "
+          f"pico RSS {pico_rss} MB → {saida}")
+
+
+if __name__ == '__main__':
+    main()
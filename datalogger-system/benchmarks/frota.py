@@ -0,0 +1,151 @@
+"""Gerador determinístico de uma frota sintética (clientes, demandas, dataloggers e alocações).
+
+A mesma semente e escala geram sempre os mesmos dados; as datas são relativas
+a ``referencia`` (por padrão hoje), então dois dias diferentes produzem a mesma
+frota deslocada no tempo. Para repetir exatamente uma execução passe a mesma
+``referencia`` gravada no resultado.
+"""
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+
+ESCALAS = {
+    'minima': dict(clientes=20, demandas=100, dataloggers=200, alocacoes=2000),
+    'pequena': dict(clientes=50, demandas=500, dataloggers=1000, alocacoes=10000),
+    'media': dict(clientes=200, demandas=5000, dataloggers=10000, alocacoes=100000),
+    'grande': dict(clientes=500, demandas=20000, dataloggers=100000, alocacoes=1000000),
+}
+
+MODELOS = (
+    ('HOBO MX1101', 30), ('Testo 174H', 25), ('Novus LogBox', 20), ('Elitech RC-5', 15), ('Akrom KR420', 10),
+)
+STATUS_SEM_ALOCACAO = (('Estoque', 85), ('Calibração', 8), ('Manutenção', 7))
+
+HISTORICO_DIAS = 3 * 365
+# Parte dos dataloggers termina o histórico com uma alocação ainda em campo
+CHANCE_EM_CAMPO = 0.35
+TAMANHO_LOTE = 5000
+
+
+def _escolher(rng, opcoes):
+    valores, pesos = zip(*opcoes)
+    return rng.choices(valores, pesos)[0]
+
+def _enviesado(rng, total):
+    # Poucos clientes/demandas concentram a maior parte das alocações
+    return 1 + int(total * rng.random() ** 2)
+
+def _duracao(rng, maximo):
+    # Mediana de ~25 dias, cauda longa
+    return max(1, min(int(rng.lognormvariate(3.2, 0.6)), maximo))
+
+
+def gerar_clientes(rng, quantidade, agora):
+    for i in range(1, quantidade + 1):
+        yield {
+            'id': i, 'nome': f'Cliente {i:05d}', 'contato': f'Contato {i}',
+            'telefone': f'(11) 9{rng.randrange(10 ** 7, 10 ** 8)}', 'email': f'cliente{i}@exemplo.com.br',
+            'created_at': agora, 'updated_at': agora
+        }
+
+def gerar_demandas(rng, quantidade, clientes, referencia, agora):
+    for i in range(1, quantidade + 1):
+        inicio = referencia - timedelta(days=rng.randrange(HISTORICO_DIAS))
+        fim_previsto = inicio + timedelta(days=rng.randrange(30, 366))
+        status, fim_real = 'Ativa', None
+        if fim_previsto < referencia - timedelta(days=30):
+            sorteio = rng.random()
+            if sorteio < 0.9:
+                status, fim_real = 'Finalizada', fim_previsto + timedelta(days=rng.randrange(-10, 20))
+            elif sorteio < 0.95:
+                status = 'Cancelada'
+        yield {
+            'id': i, 'cliente_id': _enviesado(rng, clientes), 'descricao': f'Demanda {i:06d}',
+            'data_inicio': inicio, 'data_fim_prevista': fim_previsto, 'data_fim_real': fim_real,
+            'quantidade_prevista': rng.randrange(1, 50), 'status': status,
+            'created_at': agora, 'updated_at': agora
+        }
+
+def gerar_frota(rng, dataloggers, alocacoes, demandas, referencia, agora):
+    """Gera (dataloggers, alocações) com históricos sem sobreposição por datalogger."""
+    inicio_historico = referencia - timedelta(days=HISTORICO_DIAS)
+    por_datalogger = [alocacoes // dataloggers] * dataloggers
+    for indice in rng.sample(range(dataloggers), alocacoes % dataloggers):
+        por_datalogger[indice] += 1
+
+    lista_dataloggers = []
+    lista_alocacoes = []
+    for datalogger_id, quantidade in enumerate(por_datalogger, start=1):
+        ultima_calibracao = referencia - timedelta(days=rng.randrange(420))
+        em_campo = False
+        if quantidade:
+            # O histórico é dividido em janelas iguais, uma alocação por janela
+            janela = HISTORICO_DIAS / quantidade
+            em_campo = rng.random() < CHANCE_EM_CAMPO
+            for n in range(quantidade):
+                inicio_janela = inicio_historico + timedelta(days=int(n * janela))
+                fim_janela = inicio_historico + timedelta(days=int((n + 1) * janela))
+                saida = inicio_janela + timedelta(days=int(rng.random() * janela * 0.3))
+                prevista = saida + timedelta(days=_duracao(rng, 365))
+                aberta = em_campo and n == quantidade - 1
+                if aberta:
+                    retorno = None
+                else:
+                    retorno = min(prevista + timedelta(days=rng.randrange(-5, 11)), fim_janela - timedelta(days=1))
+                    retorno = max(retorno, saida)
+                lista_alocacoes.append({
+                    'datalogger_id': datalogger_id, 'demanda_id': _enviesado(rng, demandas),
+                    'data_saida': saida, 'data_retorno_prevista': prevista, 'data_retorno_real': retorno,
+                    'status': 'Em campo' if aberta else 'Retornado', 'created_at': agora, 'updated_at': agora
+                })
+
+        lista_dataloggers.append({
+            'id': datalogger_id, 'numero_serie': f'SN-{datalogger_id:08d}', 'modelo': _escolher(rng, MODELOS),
+            'status': 'Alocado' if em_campo else _escolher(rng, STATUS_SEM_ALOCACAO),
+            'data_aquisicao': inicio_historico - timedelta(days=rng.randrange(730)),
+            'ultima_calibracao': ultima_calibracao, 'proxima_calibracao': ultima_calibracao + timedelta(days=365),
+            'created_at': agora, 'updated_at': agora
+        })
+
+    for alocacao_id, alocacao in enumerate(lista_alocacoes, start=1):
+        alocacao['id'] = alocacao_id
+    return lista_dataloggers, lista_alocacoes
+
+
+def _inserir(conexao, tabela, linhas):
+    linhas = list(linhas)
+    for i in range(0, len(linhas), TAMANHO_LOTE):
+        conexao.execute(insert(tabela), linhas[i:i + TAMANHO_LOTE])
+    if conexao.dialect.name == 'postgresql' and linhas:
+        # Ids explícitos não avançam a sequência: ajusta para os POST do benchmark
+        conexao.execute(text(f"SELECT setval(pg_get_serial_sequence('{tabela.name}', 'id'), :maximo)"),
+                        {'maximo': len(linhas)})
+    return len(linhas)
+
+def popular(db, referencia, semente=42, clientes=50, demandas=500, dataloggers=1000, alocacoes=10000):
+    """Grava a frota num banco vazio e monta as tabelas derivadas (ocupação e alertas)."""
+    from src.models.alocacao import Alocacao
+    from src.models.cliente import Cliente
+    from src.models.datalogger import Datalogger
+    from src.models.demanda import Demanda
+    from src.services import ocupacao
+    from src.services.alertas import sincronizar_alertas
+
+    if db.session.scalar(select(func.count()).select_from(Datalogger)):
+        raise RuntimeError('O banco já tem dataloggers: use um banco vazio ou --reaproveitar')
+
+    rng = random.Random(semente)
+    agora = datetime.utcnow()
+    conexao = db.session.connection()
+    totais = {
+        'clientes': _inserir(conexao, Cliente.__table__, gerar_clientes(rng, clientes, agora)),
+        'demandas': _inserir(conexao, Demanda.__table__, gerar_demandas(rng, demandas, clientes, referencia, agora)),
+    }
+    lista_dataloggers, lista_alocacoes = gerar_frota(rng, dataloggers, alocacoes, demandas, referencia, agora)
+    totais['dataloggers'] = _inserir(conexao, Datalogger.__table__, lista_dataloggers)
+    totais['alocacoes'] = _inserir(conexao, Alocacao.__table__, lista_alocacoes)
+
+    ocupacao.reconstruir(conexao)
+    sincronizar_alertas(completo=True, hoje=referencia)
+    db.session.commit()
+    return totais
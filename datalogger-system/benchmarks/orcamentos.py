@@ -0,0 +1,130 @@
+"""Verifica o orçamento de consultas SQL de cada rota sobre a frota sintética.
+
+Uso: python -m benchmarks.orcamentos [--escala pequena] [--dataloggers N --alocacoes N]
+
+Roda os cenários de benchmarks.cenarios pelo test client e falha (código 1) se
+alguma requisição passar do orçamento de ORCAMENTOS ou repetir uma mesma
+consulta mais vezes que o limite (o sinal de N+1). Como o número de consultas
+não deve crescer com os dados, rodar em duas escalas pega um N+1 escondido.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date
+
+from benchmarks.cenarios import CENARIOS, Contexto
+from benchmarks.frota import ESCALAS
+
+# Máximo de consultas por requisição, por "METODO rota" (inclui a consulta de versões do ETag)
+ORCAMENTOS = {
+    'GET /api/admin/tarefas': 1,
+    'GET /api/users': 1,
+    'GET /api/users/<int:user_id>': 1,
+    'GET /api/dataloggers': 2,
+    'GET /api/dataloggers/<int:id>': 2,
+    'GET /api/dataloggers/calibracao-vencida': 2,
+    'GET /api/dataloggers/disponveis': 2,
+    'GET /api/clientes': 2,
+    'GET /api/clientes/<int:id>': 2,
+    'GET /api/clientes/<int:id>/demandas': 3,
+    'GET /api/demandas': 2,
+    'GET /api/demandas/<int:id>': 2,
+    'GET /api/demandas/<int:id>/alocacoes': 3,
+    'GET /api/alocacoes': 2,
+    'GET /api/alocacoes/<int:id>': 2,
+    'GET /api/alocacoes/em-campo': 2,
+    'GET /api/alocacoes/retornos-previstos': 2,
+    'GET /api/dashboard/resumo': 4,
+    'GET /api/dashboard/disponibilidade': 6,
+    'GET /api/dashboard/ocupacao-por-cliente': 2,
+    'GET /api/dashboard/historico-ocupacao': 4,
+    'GET /api/dashboard/alertas': 2,
+    'GET /api/export/<recurso>': 1,
+    'POST /api/users': 2,
+    'PUT /api/users/<int:user_id>': 3,
+    'DELETE /api/users/<int:user_id>': 2,
+    'POST /api/clientes': 3,
+    'PUT /api/clientes/<int:id>': 4,
+    'DELETE /api/clientes/<int:id>': 5,
+    'POST /api/dataloggers': 7,
+    'PUT /api/dataloggers/<int:id>': 7,
+    'DELETE /api/dataloggers/<int:id>': 8,
+    'POST /api/demandas': 5,
+    'PUT /api/demandas/<int:id>': 5,
+    'POST /api/demandas/<int:id>/finalizar': 10,
+    'POST /api/alocacoes': 11,
+    'PUT /api/alocacoes/<int:id>': 11,
+    'DELETE /api/alocacoes/<int:id>': 7,
+    'POST /api/alocacoes/<int:id>/retorno': 16,
+    'POST /api/alocacoes/lote': 8,
+    'POST /api/alocacoes/retorno-lote': 10,
+    'POST /api/dashboard/alertas/<int:id>/reconhecer': 4,
+    'POST /api/dashboard/alertas/<int:id>/reabrir': 4,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', choices=ESCALAS, default='pequena')
+    parser.add_argument('--dataloggers', type=int)
+    parser.add_argument('--alocacoes', type=int)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    escala = dict(ESCALAS[args.escala])
+    for tabela in ('dataloggers', 'alocacoes'):
+        if getattr(args, tabela) is not None:
+            escala[tabela] = getattr(args, tabela)
+
+    os.environ.setdefault('AGENDADOR_ATIVO', 'false')
+    from src.main import create_app
+    from src.models.user import db
+    from src.services.auditoria_sql import OrcamentoExcedido, orcamento_consultas
+    from src.services.migracoes import preparar_banco
+    from benchmarks.frota import popular
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'orcamentos.db')})
+    preparar_banco(app)
+
+    referencia = date.today()
+    with app.app_context():
+        totais = popular(db, referencia, semente=args.semente, **escala)
+        db.session.remove()
+
+    cliente = app.test_client()
+    falhas = []
+    sem_orcamento = set()
+
+    def req(metodo, rota, caminho=None, json=None, verificar=True):
+        chave = f'{metodo} {rota}'
+        if chave not in ORCAMENTOS:
+            sem_orcamento.add(chave)
+        orcamento = orcamento_consultas(ORCAMENTOS.get(chave), descricao=f'{chave} ({caminho or rota})')
+        try:
+            with orcamento:
+                resposta = cliente.open(caminho or rota, method=metodo, json=json)
+        except OrcamentoExcedido as e:
+            if verificar:
+                falhas.append(str(e))
+        return resposta.status_code, resposta.get_json(silent=True)
+
+    # Primeira rodada só aquece caches
+    aquecimento = lambda *a, **k: req(*a, verificar=False, **k)
+    for rodada in (aquecimento, req):
+        ctx = Contexto(random.Random(args.semente), totais, referencia)
+        for cenario in CENARIOS.values():
+            cenario.funcao(rodada, ctx)
+
+    for chave in sorted(sem_orcamento):
+        print(f"⚠️ Rota sem orçamento definido: {chave}")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print(f"✅ Todas as rotas dentro do orçamento ({escala['dataloggers']} dataloggers, {escala['alocacoes']} alocações)")
+
+
+if __name__ == '__main__':
+    main()
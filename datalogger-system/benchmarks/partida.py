@@ -0,0 +1,92 @@
+"""Mede a partida a frio do app: importação, create_app, aquecimento do pool e
+primeira requisição, cada rodada num processo Python novo.
+
+Uso: python -m benchmarks.partida [--rodadas 5] [--database-url URL]
+
+Falha (código 1) se a mediana de alguma etapa passar de ORCAMENTOS_MS.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento de cada etapa (mediana, ms). A importação é quase toda Flask/SQLAlchemy;
+# create_app não pode tocar no banco.
+ORCAMENTOS_MS = {
+    'importacao': 1500,
+    'create_app': 100,
+    'aquecimento': 500,
+    'primeira_requisicao': 250,
+    'ate_primeira_resposta': 2000,
+}
+
+CODIGO = '''
+import json, time
+inicio = time.perf_counter()
+from src.main import create_app, preparar_worker
+importado = time.perf_counter()
+app = create_app()
+criado = time.perf_counter()
+preparar_worker(app, agendador=False)
+aquecido = time.perf_counter()
+status = app.test_client().get('/api/clientes').status_code
+fim = time.perf_counter()
+print(json.dumps({
+    'status': status,
+    'importacao': (importado - inicio) * 1000,
+    'create_app': (criado - importado) * 1000,
+    'aquecimento': (aquecido - criado) * 1000,
+    'primeira_requisicao': (fim - aquecido) * 1000,
+    'ate_primeira_resposta': (fim - inicio) * 1000,
+}))
+'''
+
+
+def medir(database_url):
+    ambiente = dict(os.environ, DATABASE_URL=database_url, AGENDADOR_ATIVO='false')
+    saida = subprocess.run(
+        [sys.executable, '-c', CODIGO], cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    ).stdout
+    # O JSON é a última linha; antes dela podem vir avisos do app
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rodadas', type=int, default=5)
+    parser.add_argument('--database-url', help='banco já migrado (padrão: SQLite temporário migrado aqui)')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        sys.path.insert(0, RAIZ)
+        from src.main import create_app
+        from src.services.migracoes import preparar_banco
+
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'partida.db')
+        preparar_banco(create_app({'SQLALCHEMY_DATABASE_URI': database_url}))
+
+    rodadas = [medir(database_url) for _ in range(args.rodadas)]
+    if any(rodada['status'] != 200 for rodada in rodadas):
+        print(f"❌ Primeira requisição falhou: {[rodada['status'] for rodada in rodadas]}")
+        sys.exit(1)
+
+    estourados = []
+    for etapa, orcamento in ORCAMENTOS_MS.items():
+        mediana = statistics.median(rodada[etapa] for rodada in rodadas)
+        pior = max(rodada[etapa] for rodada in rodadas)
+        marca = '✅' if mediana <= orcamento else '❌'
+        print(f"{marca} {etapa:<22} mediana {mediana:7.1f} ms  pior {pior:7.1f} ms  (orçamento {orcamento} ms)")
+        if mediana > orcamento:
+            estourados.append(etapa)
+    if estourados:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
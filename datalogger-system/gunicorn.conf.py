@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Servidor de produção: workers com threads (gthread), configurável pelo ambiente
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+accesslog = '-'
+errorlog = '-'
+
+# Métricas do /metrics somadas entre os workers (prometheus_client em modo
+# multiprocesso); precisa estar no ambiente antes de o app ser importado
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'dataloggers-metricas'))
+
+
+def on_starting(server):
+    # Arquivos de uma execução anterior somariam contadores antigos
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio, exist_ok=True)
+
+    # Schema uma vez, no master, antes de subir os workers (MIGRAR_NO_INICIO=false
+    # quando o deploy roda "flask --app src.main admin migrar" à parte)
+    if os.environ.get('MIGRAR_NO_INICIO', 'true').lower() != 'false':
+        from src.main import create_app
+        from src.models.user import db
+        from src.services.migracoes import preparar_banco
+        app = create_app()
+        for migracao in preparar_banco(app):
+            server.log.info(f'Migração aplicada: {migracao}')
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Com preload_app o engine foi criado no master; descarta as conexões
+    # herdadas para que cada worker abra as suas
+    if preload_app:
+        from src.models.user import db
+        app = worker.app.wsgi()
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    from src.main import preparar_worker
+    try:
+        if preparar_worker(worker.wsgi):
+            worker.log.info('Worker pronto: pool aquecido')
+        else:
+            worker.log.warning('Worker não pronto: há migrações pendentes')
+    except Exception as e:
+        worker.log.warning(f'Falha ao preparar worker: {e}')
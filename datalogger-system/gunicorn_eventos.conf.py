@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+
+# Processo só dos streams de /api/eventos (mesmo app, no mesmo host dos workers
+# da API, que se falam pelo barramento de sockets Unix). Com o worker gevent cada
+# conexão aberta é uma greenlet, não uma thread: os streams não ocupam as threads
+# dos workers gthread do gunicorn.conf.py, que redirecionam /api/eventos para
+# EVENTOS_URL (o endereço público deste processo).
+bind = f"0.0.0.0:{os.environ.get('EVENTOS_PORT', 5001)}"
+workers = int(os.environ.get('EVENTOS_WORKERS', 1))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('EVENTOS_MAX_CONEXOES', 1000)) + 50
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+# O gevent adapta threading/socket ao iniciar o worker: o app (locks, filas e a
+# thread do barramento) precisa ser importado depois disso
+preload_app = False
+accesslog = '-'
+errorlog = '-'
+
+# Métricas à parte das da API: o on_starting do gunicorn.conf.py limpa o diretório dela
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.environ.get(
+    'EVENTOS_PROMETHEUS_DIR', os.path.join(tempfile.gettempdir(), 'dataloggers-metricas-eventos')
+)
+
+
+def on_starting(server):
+    # O schema é responsabilidade do processo da API (ou de "admin migrar")
+    diretorio = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(diretorio, ignore_errors=True)
+    os.makedirs(diretorio, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    from src.main import preparar_worker
+    # Este processo atende os streams em vez de redirecioná-los; as tarefas
+    # agendadas ficam com os workers da API
+    worker.wsgi.config['EVENTOS_URL'] = None
+    try:
+        if not preparar_worker(worker.wsgi, agendador=False):
+            worker.log.warning('Worker de eventos não pronto: há migrações pendentes')
+    except Exception as e:
+        worker.log.warning(f'Falha ao preparar worker de eventos: {e}')
@@ -3,7 +3,8 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import threading
+from flask import Flask
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
@@ -12,80 +13,163 @@ from src.routes.cliente import cliente_bp
 from src.routes.demanda import demanda_bp
 from src.routes.alocacao import alocacao_bp
 from src.routes.dashboard import dashboard_bp
+from src.routes.exportacao import exportacao_bp
+from src.routes.eventos import eventos_bp
+from src.routes.admin import admin_bp
+from src.services.banco import (
+    aquecer_pool, aquecer_replicas, binds_leitura, binds_replicas, configurar_engines, eh_replica,
+    estado_replicas, normalizar_url, opcoes_engine, registrar_replicas, urls_replicas
+)
+from src.services.compressao import registrar_compressao_json
+from src.services.estaticos import ArquivosEstaticos
+from src.services.metricas import registrar_metricas, verificar_banco
+from src.services.auditoria_sql import registrar_auditoria_sql
+from src.services.migracoes import migracoes_pendentes, preparar_banco
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
-
-# Habilitar CORS para permitir requisições do frontend
-CORS(app)
-
-# Registrar blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(datalogger_bp, url_prefix='/api')
-app.register_blueprint(cliente_bp, url_prefix='/api')
-app.register_blueprint(demanda_bp, url_prefix='/api')
-app.register_blueprint(alocacao_bp, url_prefix='/api')
-app.register_blueprint(dashboard_bp, url_prefix='/api')
-
-# Configuração do banco de dados - PostgreSQL primeiro, SQLite como fallback
-database_url = os.environ.get('DATABASE_URL')
-if database_url:
-    # PostgreSQL (Railway) - corrigir URL se necessário
-    if database_url.startswith('postgres://'):
-        database_url = database_url.replace('postgres://', 'postgresql://', 1)
-    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-    print(f"🐘 Usando PostgreSQL: {database_url[:50]}...")
-else:
-    # SQLite (desenvolvimento local)
-    sqlite_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{sqlite_path}"
-    print(f"📁 Usando SQLite: {sqlite_path}")
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Importar todos os modelos para garantir que as tabelas sejam criadas
+# Importar todos os modelos para que o create_all de preparar_banco os conheça
 from src.models.datalogger import Datalogger
 from src.models.cliente import Cliente
 from src.models.demanda import Demanda
 from src.models.alocacao import Alocacao
+from src.models.versao_tabela import VersaoTabela
+from src.models.ocupacao_diaria import OcupacaoDiaria
+from src.models.alerta import Alerta
+from src.models.tarefa_agendada import TarefaAgendada
+import src.services.versoes  # registra os eventos de versionamento das tabelas
+import src.services.tarefas  # registra as tarefas do agendador
+from src.services.agendador import iniciar_agendador
+
+PASTA = os.path.dirname(__file__)
+
+
+def database_uri():
+    """PostgreSQL (DATABASE_URL) primeiro, SQLite local como fallback."""
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        # PostgreSQL (Railway) - corrigir URL se necessário
+        return normalizar_url(database_url)
+    # SQLite (desenvolvimento local)
+    return f"sqlite:///{os.path.join(PASTA, 'database', 'app.db')}"
+
+
+def create_app(config=None):
+    """Monta o app sem acessar o banco.
+
+    O schema é criado pelo comando ``flask --app src.main admin migrar`` (o
+    gunicorn.conf.py o executa uma vez no master) e cada worker aquece o pool
+    em ``preparar_worker``; até lá ``/ready`` responde 503.
+    """
+    app = Flask(__name__, static_folder=os.path.join(PASTA, 'static'))
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI']))
+    # Perfil SQLite: pool somente leitura sobre o mesmo arquivo; réplicas de leitura
+    # opcionais (DATABASE_REPLICA_URLS) para as rotas GET (ver services/banco.py)
+    app.config.setdefault('DATABASE_REPLICA_URLS', urls_replicas())
+    app.config.setdefault('SQLALCHEMY_BINDS', {
+        **binds_leitura(app.config['SQLALCHEMY_DATABASE_URI']),
+        **binds_replicas(app.config['DATABASE_REPLICA_URLS']),
+    })
+
+    # Habilitar CORS para permitir requisições do frontend
+    CORS(app)
+
+    # Métricas por endpoint (latência, SQL, tamanho das respostas) em /metrics
+    registrar_metricas(app)
 
-db.init_app(app)
+    # Auditoria de SQL por requisição (N+1, consultas lentas) com SQL_AUDITORIA=true
+    registrar_auditoria_sql(app)
 
-try:
+    # Leituras do cliente que acabou de escrever ficam no principal (read-your-writes)
+    registrar_replicas(app)
+
+    # Comprimir respostas JSON grandes (gzip/brotli conforme Accept-Encoding)
+    registrar_compressao_json(app)
+
+    # Registrar blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(datalogger_bp, url_prefix='/api')
+    app.register_blueprint(cliente_bp, url_prefix='/api')
+    app.register_blueprint(demanda_bp, url_prefix='/api')
+    app.register_blueprint(alocacao_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(exportacao_bp, url_prefix='/api')
+    app.register_blueprint(eventos_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+
+    db.init_app(app)
     with app.app_context():
-        # Criar diretório do banco se for SQLite
-        if not database_url:
-            os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
-        
-        print("🔄 Criando tabelas do banco de dados...")
-        db.create_all()
-        print("✅ Tabelas criadas com sucesso!")
-        
-except Exception as e:
-    print(f"❌ Erro ao criar tabelas: {e}")
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
-@app.route('/health')
-def health_check():
-    return {"status": "ok", "database": "connected"}
+        configurar_engines(db.engines)
+    app.extensions['prontidao'] = {'pronto': False, 'conexoes': 0, 'lock': threading.Lock()}
+
+    arquivos_estaticos = ArquivosEstaticos(app.static_folder)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        if app.static_folder is None:
+            return "Static folder not configured", 404
+        return arquivos_estaticos.responder(path)
+
+    @app.route('/health')
+    def health_check():
+        try:
+            latencia_ms = verificar_banco()
+        except Exception as e:
+            return {"status": "error", "database": "disconnected", "error": str(e)}, 503
+        resposta = {"status": "ok", "database": "connected", "latencia_ms": latencia_ms}
+        replicas = estado_replicas(db.engines)
+        if replicas:
+            resposta["replicas"] = replicas
+        return resposta
+
+    @app.route('/ready')
+    def ready_check():
+        prontidao = app.extensions['prontidao']
+        if not prontidao['pronto']:
+            # Worker que não passou por preparar_worker (ou cujo aquecimento falhou) tenta agora
+            try:
+                preparar_worker(app, agendador=False)
+            except Exception as e:
+                return {"status": "starting", "error": str(e)}, 503
+        if not prontidao['pronto']:
+            return {"status": "starting", "migracoes_pendentes": prontidao.get('migracoes_pendentes', [])}, 503
+        return {"status": "ready", "conexoes_aquecidas": prontidao['conexoes']}
+
+    return app
+
+
+def preparar_worker(app, agendador=True):
+    """Aquece o pool de conexões e inicia o agendador; depois disso /ready responde 200.
+
+    Com migrações pendentes o worker continua não pronto (rode ``admin migrar``).
+    """
+    prontidao = app.extensions['prontidao']
+    with prontidao['lock']:
+        if not prontidao['pronto']:
+            with app.app_context():
+                pendentes = migracoes_pendentes(db.engine)
+                prontidao['migracoes_pendentes'] = pendentes
+                if not pendentes:
+                    prontidao['conexoes'] = sum(
+                        aquecer_pool(engine) for chave, engine in db.engines.items() if not eh_replica(chave)
+                    ) + aquecer_replicas(db.engines)
+                    prontidao['pronto'] = True
+    if agendador:
+        iniciar_agendador(app)
+    return prontidao['pronto']
+
 
 if __name__ == '__main__':
+    app = create_app()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') != 'production'
+    print(f"📁 Banco: {app.config['SQLALCHEMY_DATABASE_URI'][:50]}...")
+    for migracao in preparar_banco(app):
+        print(f"✅ Migração aplicada: {migracao}")
+    preparar_worker(app)
     print(f"🚀 Iniciando aplicação na porta {port}")
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,26 @@
+from sqlalchemy import text
+
+# Índices compostos/parciais para os filtros de status e datas usados pelo
+# dashboard, alertas e listagens. Sintaxe aceita por PostgreSQL e SQLite.
+INDICES = [
+    # Retornos previstos, alertas de atraso e projeção de disponibilidade
+    "CREATE INDEX IF NOT EXISTS ix_alocacoes_em_campo_retorno_prevista "
+    "ON alocacoes (status, data_retorno_prevista) WHERE status = 'Em campo'",
+    "CREATE INDEX IF NOT EXISTS ix_alocacoes_status_data_saida ON alocacoes (status, data_saida)",
+    # Histórico de ocupação (janela data_saida/data_retorno_real)
+    "CREATE INDEX IF NOT EXISTS ix_alocacoes_data_saida_retorno_real ON alocacoes (data_saida, data_retorno_real)",
+    # Chaves estrangeiras combinadas com status
+    "CREATE INDEX IF NOT EXISTS ix_alocacoes_demanda_status ON alocacoes (demanda_id, status)",
+    "CREATE INDEX IF NOT EXISTS ix_alocacoes_datalogger_status ON alocacoes (datalogger_id, status)",
+    "CREATE INDEX IF NOT EXISTS ix_dataloggers_status ON dataloggers (status)",
+    # Calibrações vencidas/próximas
+    "CREATE INDEX IF NOT EXISTS ix_dataloggers_proxima_calibracao "
+    "ON dataloggers (proxima_calibracao) WHERE proxima_calibracao IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_demandas_status ON demandas (status)",
+    "CREATE INDEX IF NOT EXISTS ix_demandas_cliente_status ON demandas (cliente_id, status)",
+]
+
+
+def upgrade(conexao):
+    for comando in INDICES:
+        conexao.execute(text(comando))
@@ -0,0 +1,19 @@
+from sqlalchemy import text
+
+
+def upgrade(conexao):
+    # No máximo uma alocação 'Em campo' por datalogger; garante no banco o que
+    # a reserva condicional do datalogger garante na aplicação
+    duplicados = conexao.execute(text(
+        "SELECT datalogger_id FROM alocacoes WHERE status = 'Em campo' "
+        "GROUP BY datalogger_id HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if duplicados:
+        raise RuntimeError(
+            f'Dataloggers com mais de uma alocação em campo: {duplicados}. '
+            'Corrija os registros antes de aplicar esta migração.'
+        )
+    conexao.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_alocacoes_datalogger_em_campo "
+        "ON alocacoes (datalogger_id) WHERE status = 'Em campo'"
+    ))
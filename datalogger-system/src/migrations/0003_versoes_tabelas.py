@@ -0,0 +1,17 @@
+from sqlalchemy import text
+
+# Tabelas versionadas quando esta migração foi escrita (as posteriores semeiam a
+# própria linha, como a 0006 para alertas)
+TABELAS = ('dataloggers', 'clientes', 'demandas', 'alocacoes')
+
+
+def upgrade(conexao):
+    conexao.execute(text(
+        'CREATE TABLE IF NOT EXISTS versoes_tabelas ('
+        'tabela VARCHAR(50) NOT NULL, versao BIGINT NOT NULL, PRIMARY KEY (tabela))'
+    ))
+    for tabela in TABELAS:
+        conexao.execute(text(
+            'INSERT INTO versoes_tabelas (tabela, versao) '
+            'SELECT :tabela, 0 WHERE NOT EXISTS (SELECT 1 FROM versoes_tabelas WHERE tabela = :tabela)'
+        ), {'tabela': tabela})
@@ -0,0 +1,8 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade(conexao):
+    # Quantidade de dataloggers prevista para a demanda (usada na projeção de disponibilidade)
+    colunas = {coluna['name'] for coluna in inspect(conexao).get_columns('demandas')}
+    if 'quantidade_prevista' not in colunas:
+        conexao.execute(text('ALTER TABLE demandas ADD COLUMN quantidade_prevista INTEGER'))
@@ -0,0 +1,53 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import Date, Integer, String, column, insert, table, text
+
+TAMANHO_LOTE = 1000
+UM_DIA = timedelta(days=1)
+
+OCUPACAO_DIARIA = table(
+    'ocupacao_diaria',
+    column('data', Date), column('cliente_id', Integer), column('modelo', String), column('alocados', Integer)
+)
+
+
+def _linhas(intervalos):
+    # Diferenças por chave: +1 na saída e -1 no dia seguinte ao retorno;
+    # acumuladas entre eventos consecutivos viram os alocados de cada dia
+    eventos = defaultdict(lambda: defaultdict(int))
+    for inicio, fim, cliente_id, modelo in intervalos:
+        if fim < inicio:
+            continue
+        eventos[(cliente_id, modelo)][inicio] += 1
+        eventos[(cliente_id, modelo)][fim + UM_DIA] -= 1
+
+    for (cliente_id, modelo), por_data in eventos.items():
+        datas = sorted(por_data)
+        acumulado = 0
+        for atual, proxima in zip(datas, datas[1:]):
+            acumulado += por_data[atual]
+            if not acumulado:
+                continue
+            dia = atual
+            while dia < proxima:
+                yield {'data': dia, 'cliente_id': cliente_id, 'modelo': modelo, 'alocados': acumulado}
+                dia += UM_DIA
+
+
+def upgrade(conexao):
+    # Rollup diário de ocupação, carregado com o histórico das alocações encerradas
+    conexao.execute(text(
+        'CREATE TABLE IF NOT EXISTS ocupacao_diaria ('
+        'data DATE NOT NULL, cliente_id INTEGER NOT NULL, modelo VARCHAR(100) NOT NULL, '
+        'alocados INTEGER NOT NULL, PRIMARY KEY (data, cliente_id, modelo))'
+    ))
+    conexao.execute(text('DELETE FROM ocupacao_diaria'))
+    intervalos = conexao.execute(text(
+        'SELECT a.data_saida, a.data_retorno_real, d.cliente_id, l.modelo FROM alocacoes a '
+        'JOIN demandas d ON d.id = a.demanda_id '
+        'JOIN dataloggers l ON l.id = a.datalogger_id '
+        'WHERE a.data_retorno_real IS NOT NULL'
+    ).columns(data_saida=Date, data_retorno_real=Date)).all()
+    linhas = list(_linhas(intervalos))
+    for i in range(0, len(linhas), TAMANHO_LOTE):
+        conexao.execute(insert(OCUPACAO_DIARIA), linhas[i:i + TAMANHO_LOTE])
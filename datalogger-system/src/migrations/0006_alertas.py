@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+
+def upgrade(conexao):
+    # Alertas materializados; as rotas de escrita e a tarefa virada_alertas preenchem a tabela
+    id_automatico = 'SERIAL' if conexao.dialect.name == 'postgresql' else 'INTEGER'
+    conexao.execute(text(
+        'CREATE TABLE IF NOT EXISTS alertas ('
+        f'id {id_automatico} NOT NULL, chave VARCHAR(100) NOT NULL, tipo VARCHAR(30) NOT NULL, '
+        'prioridade VARCHAR(10) NOT NULL, nivel INTEGER NOT NULL, datalogger_id INTEGER, '
+        'alocacao_id INTEGER, demanda_id INTEGER, numero_serie VARCHAR(100), data_referencia DATE NOT NULL, '
+        'reconhecido_em TIMESTAMP, adiado_ate DATE, created_at TIMESTAMP, updated_at TIMESTAMP, '
+        'PRIMARY KEY (id), UNIQUE (chave))'
+    ))
+    for coluna in ('tipo', 'nivel', 'datalogger_id', 'alocacao_id'):
+        conexao.execute(text(f'CREATE INDEX IF NOT EXISTS ix_alertas_{coluna} ON alertas ({coluna})'))
+    conexao.execute(text(
+        "INSERT INTO versoes_tabelas (tabela, versao) "
+        "SELECT 'alertas', 0 WHERE NOT EXISTS (SELECT 1 FROM versoes_tabelas WHERE tabela = 'alertas')"
+    ))
@@ -0,0 +1,11 @@
+from sqlalchemy import text
+
+
+def upgrade(conexao):
+    # Estado do agendador de tarefas; as linhas são criadas quando o agendador inicia
+    conexao.execute(text(
+        'CREATE TABLE IF NOT EXISTS tarefas_agendadas ('
+        'nome VARCHAR(100) NOT NULL, proxima_execucao TIMESTAMP, ultima_execucao TIMESTAMP, '
+        'ultimo_status VARCHAR(20), ultimo_erro TEXT, duracao_ms INTEGER, em_execucao_desde TIMESTAMP, '
+        'executado_por VARCHAR(100), PRIMARY KEY (nome))'
+    ))
@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import text
+
+
+def upgrade(conexao):
+    # A chave dos alertas deixa de incluir a data de referência: mudar o vencimento
+    # ou o retorno previsto atualiza o alerta (mantendo reconhecimento e adiamento)
+    por_chave = {}
+    for alerta_id, tipo, datalogger_id, alocacao_id in conexao.execute(text(
+        'SELECT id, tipo, datalogger_id, alocacao_id FROM alertas ORDER BY id'
+    )):
+        # Chave nova: tipo base (calibração ou atraso) + registro de origem
+        if tipo == 'retorno_atrasado':
+            chave = f'retorno_atrasado:{alocacao_id}'
+        else:
+            chave = f'calibracao:{datalogger_id}'
+        por_chave.setdefault(chave, []).append(alerta_id)
+
+    # Mais de um alerta por origem: fica o mais recente
+    repetidos = [{'id': alerta_id} for ids in por_chave.values() for alerta_id in ids[:-1]]
+    if repetidos:
+        conexao.execute(text('DELETE FROM alertas WHERE id = :id'), repetidos)
+    novas = [{'id': ids[-1], 'chave': chave} for chave, ids in por_chave.items()]
+    if novas:
+        conexao.execute(text('UPDATE alertas SET chave = :chave WHERE id = :id'), novas)
+
+    # A virada do dia agora é só da tarefa agendada: a primeira passada do
+    # agendador recalcula os alertas (e preenche a tabela numa instalação nova)
+    agora = datetime.now().replace(microsecond=0)
+    agendada = conexao.execute(
+        text("UPDATE tarefas_agendadas SET proxima_execucao = :agora WHERE nome = 'virada_alertas'"),
+        {'agora': agora}
+    ).rowcount
+    if not agendada:
+        conexao.execute(
+            text("INSERT INTO tarefas_agendadas (nome, proxima_execucao) VALUES ('virada_alertas', :agora)"),
+            {'agora': agora}
+        )
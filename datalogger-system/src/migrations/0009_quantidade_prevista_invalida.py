@@ -0,0 +1,13 @@
+from sqlalchemy import text
+
+
+def upgrade(conexao):
+    # O SQLite aceitava texto em quantidade_prevista (INTEGER sem validação na API),
+    # o que derrubava a projeção de disponibilidade; valores inválidos viram NULL
+    if conexao.dialect.name == 'sqlite':
+        conexao.execute(text(
+            "UPDATE demandas SET quantidade_prevista = NULL "
+            "WHERE typeof(quantidade_prevista) NOT IN ('integer', 'null') OR quantidade_prevista < 0"
+        ))
+    else:
+        conexao.execute(text('UPDATE demandas SET quantidade_prevista = NULL WHERE quantidade_prevista < 0'))
@@ -0,0 +1,28 @@
+from sqlalchemy import text
+
+
+def upgrade(conexao):
+    # A tabela passa a guardar também os alertas que ainda não valem (a leitura
+    # filtra pela data): cria os que faltam, um por datalogger com vencimento de
+    # calibração e um por alocação em campo com retorno previsto
+    conexao.execute(text(
+        "INSERT INTO alertas (chave, tipo, prioridade, nivel, datalogger_id, numero_serie, data_referencia, created_at, updated_at) "
+        "SELECT 'calibracao:' || d.id, "
+        "CASE WHEN d.proxima_calibracao <= CURRENT_DATE THEN 'calibracao_vencida' ELSE 'calibracao_proxima' END, "
+        "CASE WHEN d.proxima_calibracao <= CURRENT_DATE THEN 'alta' ELSE 'media' END, "
+        "CASE WHEN d.proxima_calibracao <= CURRENT_DATE THEN 0 ELSE 1 END, "
+        "d.id, d.numero_serie, d.proxima_calibracao, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+        "FROM dataloggers d "
+        "WHERE d.proxima_calibracao IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM alertas a WHERE a.chave = 'calibracao:' || d.id)"
+    ))
+    conexao.execute(text(
+        "INSERT INTO alertas (chave, tipo, prioridade, nivel, datalogger_id, alocacao_id, demanda_id, numero_serie, data_referencia, created_at, updated_at) "
+        "SELECT 'retorno_atrasado:' || al.id, 'retorno_atrasado', 'alta', 0, "
+        "al.datalogger_id, al.id, al.demanda_id, d.numero_serie, al.data_retorno_prevista, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+        "FROM alocacoes al LEFT JOIN dataloggers d ON d.id = al.datalogger_id "
+        "WHERE al.status = 'Em campo' AND al.data_retorno_prevista IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM alertas a WHERE a.chave = 'retorno_atrasado:' || al.id)"
+    ))
+    # Respostas em cache (ETag) da listagem de alertas deixam de valer
+    conexao.execute(text("UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'alertas'"))
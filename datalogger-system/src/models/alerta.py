@@ -0,0 +1,75 @@
+from datetime import datetime, date
+from src.models.user import db
+
+PRIORIDADES = {'alta': 0, 'media': 1, 'baixa': 2}
+
+MENSAGENS = {
+    'calibracao_vencida': 'Datalogger {numero_serie} com calibração vencida há {dias} dias',
+    'calibracao_proxima': 'Datalogger {numero_serie} precisa de calibração em {dias} dias',
+    'retorno_atrasado': 'Datalogger {numero_serie} está {dias} dias em atraso',
+}
+
+PRIORIDADE_TIPO = {'calibracao_vencida': 'alta', 'calibracao_proxima': 'media', 'retorno_atrasado': 'alta'}
+
+class Alerta(db.Model):
+    __tablename__ = 'alertas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Identidade estável: tipo base + registro de origem (ver services/alertas.chave_alerta)
+    chave = db.Column(db.String(100), unique=True, nullable=False)
+    # tipo/prioridade/nivel gravados valem para a data da última sincronização; a
+    # leitura usa tipo_em(hoje), que não depende de a virada do dia ter rodado
+    tipo = db.Column(db.String(30), nullable=False, index=True)  # calibracao_vencida, calibracao_proxima, retorno_atrasado
+    prioridade = db.Column(db.String(10), nullable=False)  # alta, media, baixa
+    nivel = db.Column(db.Integer, nullable=False, index=True)  # ordem da prioridade (0 = alta)
+    datalogger_id = db.Column(db.Integer, nullable=True, index=True)
+    alocacao_id = db.Column(db.Integer, nullable=True, index=True)
+    demanda_id = db.Column(db.Integer, nullable=True)
+    numero_serie = db.Column(db.String(100), nullable=True)
+    data_referencia = db.Column(db.Date, nullable=False)  # vencimento da calibração ou retorno previsto
+    reconhecido_em = db.Column(db.DateTime, nullable=True)
+    adiado_ate = db.Column(db.Date, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Alerta {self.chave}>'
+
+    def estado(self, hoje=None):
+        hoje = hoje or date.today()
+        if self.reconhecido_em:
+            return 'reconhecido'
+        if self.adiado_ate and self.adiado_ate > hoje:
+            return 'adiado'
+        return 'aberto'
+
+    def tipo_em(self, hoje):
+        if self.tipo == 'retorno_atrasado':
+            return self.tipo
+        return 'calibracao_vencida' if self.data_referencia <= hoje else 'calibracao_proxima'
+
+    def to_dict(self, hoje=None):
+        hoje = hoje or date.today()
+        tipo = self.tipo_em(hoje)
+        if tipo == 'calibracao_proxima':
+            dias = (self.data_referencia - hoje).days
+        else:
+            dias = (hoje - self.data_referencia).days
+        dados = {
+            'id': self.id,
+            'tipo': tipo,
+            'prioridade': PRIORIDADE_TIPO[tipo],
+            'mensagem': MENSAGENS[tipo].format(numero_serie=self.numero_serie, dias=dias),
+            'datalogger_id': self.datalogger_id,
+            'estado': self.estado(hoje),
+            'reconhecido_em': self.reconhecido_em.isoformat() if self.reconhecido_em else None,
+            'adiado_ate': self.adiado_ate.isoformat() if self.adiado_ate else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+        if tipo == 'retorno_atrasado':
+            dados['alocacao_id'] = self.alocacao_id
+            dados['demanda_id'] = self.demanda_id
+            dados['dias_atraso'] = dias
+        else:
+            dados['data_vencimento'] = self.data_referencia.isoformat()
+        return dados
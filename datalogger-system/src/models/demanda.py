@@ -11,6 +11,7 @@ class Demanda(db.Model):
     data_inicio = db.Column(db.Date, nullable=False)
     data_fim_prevista = db.Column(db.Date, nullable=False)
     data_fim_real = db.Column(db.Date, nullable=True)
+    quantidade_prevista = db.Column(db.Integer, nullable=True)  # Dataloggers previstos para a demanda
     status = db.Column(db.String(20), nullable=False, default='Ativa')  # Ativa, Finalizada, Cancelada
     observacoes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -31,6 +32,7 @@ class Demanda(db.Model):
             'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
             'data_fim_prevista': self.data_fim_prevista.isoformat() if self.data_fim_prevista else None,
             'data_fim_real': self.data_fim_real.isoformat() if self.data_fim_real else None,
+            'quantidade_prevista': self.quantidade_prevista,
             'status': self.status,
             'observacoes': self.observacoes,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -0,0 +1,14 @@
+from src.models.user import db
+
+class OcupacaoDiaria(db.Model):
+    __tablename__ = 'ocupacao_diaria'
+    
+    # Dataloggers alocados por dia, cliente e modelo, considerando apenas as
+    # alocações com data_retorno_real definida (as em aberto são somadas na leitura)
+    data = db.Column(db.Date, primary_key=True)
+    cliente_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    modelo = db.Column(db.String(100), primary_key=True)
+    alocados = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<OcupacaoDiaria {self.data} cliente:{self.cliente_id} {self.modelo}={self.alocados}>'
@@ -0,0 +1,30 @@
+from src.models.user import db
+
+class TarefaAgendada(db.Model):
+    __tablename__ = 'tarefas_agendadas'
+    
+    # Estado persistido de cada tarefa registrada no agendador (horário local do servidor)
+    nome = db.Column(db.String(100), primary_key=True)
+    proxima_execucao = db.Column(db.DateTime, nullable=True)
+    ultima_execucao = db.Column(db.DateTime, nullable=True)
+    ultimo_status = db.Column(db.String(20), nullable=True)  # sucesso, erro
+    ultimo_erro = db.Column(db.Text, nullable=True)
+    duracao_ms = db.Column(db.Integer, nullable=True)
+    # Trava de execução única entre workers: quem conseguir marcar a linha executa
+    em_execucao_desde = db.Column(db.DateTime, nullable=True)
+    executado_por = db.Column(db.String(100), nullable=True)
+
+    def __repr__(self):
+        return f'<TarefaAgendada {self.nome}>'
+
+    def to_dict(self):
+        return {
+            'nome': self.nome,
+            'proxima_execucao': self.proxima_execucao.isoformat() if self.proxima_execucao else None,
+            'ultima_execucao': self.ultima_execucao.isoformat() if self.ultima_execucao else None,
+            'ultimo_status': self.ultimo_status,
+            'ultimo_erro': self.ultimo_erro,
+            'duracao_ms': self.duracao_ms,
+            'em_execucao_desde': self.em_execucao_desde.isoformat() if self.em_execucao_desde else None,
+            'executado_por': self.executado_por
+        }
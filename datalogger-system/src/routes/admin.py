@@ -0,0 +1,64 @@
+import os
+import click
+from flask import Blueprint, current_app, request, jsonify
+from src.models.user import db
+from src.models.tarefa_agendada import TarefaAgendada
+from src.services.agendador import TAREFAS, disparar, executar
+from src.services.migracoes import preparar_banco
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.before_request
+def verificar_token():
+    # Com ADMIN_TOKEN definido, as rotas de administração exigem "Authorization: Bearer <token>"
+    token = os.environ.get('ADMIN_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Não autorizado'}), 401
+
+@admin_bp.route('/admin/tarefas', methods=['GET'])
+def get_tarefas():
+    try:
+        estados = {estado.nome: estado for estado in TarefaAgendada.query.filter(TarefaAgendada.nome.in_(TAREFAS))}
+        tarefas = []
+        for nome in sorted(TAREFAS):
+            registrada = TAREFAS[nome]
+            item = estados[nome].to_dict() if nome in estados else TarefaAgendada(nome=nome).to_dict()
+            item['agenda'] = registrada.agenda.expressao
+            item['descricao'] = registrada.descricao
+            tarefas.append(item)
+        return jsonify(tarefas), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/admin/tarefas/<nome>/executar', methods=['POST'])
+def executar_tarefa(nome):
+    try:
+        if nome not in TAREFAS:
+            return jsonify({'error': 'Tarefa não encontrada'}), 404
+        if not disparar(current_app._get_current_object(), nome):
+            return jsonify({'error': 'Tarefa já está em execução'}), 409
+        return jsonify({'message': f'Tarefa {nome} iniciada'}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.cli.command('tarefa')
+@click.argument('nome')
+def executar_tarefa_cli(nome):
+    """Executa uma tarefa agendada agora, neste processo."""
+    if nome not in TAREFAS:
+        raise click.BadParameter(f"tarefas disponíveis: {', '.join(sorted(TAREFAS))}")
+    resultado = executar(nome, forcar=True)
+    if resultado is None:
+        print(f"⏳ Tarefa {nome} já está em execução em outro processo")
+    else:
+        print(f"{'✅' if resultado else '❌'} Tarefa {nome} {'concluída' if resultado else 'falhou'}")
+
+@admin_bp.cli.command('migrar')
+def migrar_cli():
+    """Cria as tabelas e aplica as migrações pendentes."""
+    print(f"🔄 Preparando banco: {current_app.config['SQLALCHEMY_DATABASE_URI'][:50]}...")
+    aplicadas = preparar_banco(current_app)
+    for migracao in aplicadas:
+        print(f"✅ Migração aplicada: {migracao}")
+    print("✅ Banco atualizado")
@@ -1,30 +1,47 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db
 from src.models.alocacao import Alocacao
 from src.models.datalogger import Datalogger
 from src.models.demanda import Demanda
+from src.services.consultas import consulta_alocacoes, filtrar_alocacoes
+from src.services.paginacao import paginar, ParametroInvalido
+from src.services.leitura_rapida import leitura_alocacoes, linha_para_dict, resposta_json
+from src.services.ocupacao import encerrar_alocacoes, intervalos, registrar_variacao
+from src.services.alertas import sincronizar_alertas
+from src.services.eventos import registrar_alteracoes
+from src.services.versoes import com_etag
 
 alocacao_bp = Blueprint('alocacao', __name__)
 
+ORDENACOES = ('id', 'status', 'data_saida', 'data_retorno_prevista', 'data_retorno_real', 'created_at')
+INDICE_EM_CAMPO = 'ux_alocacoes_datalogger_em_campo'  # migração 0002
+
+def _em_campo_duplicada(erro):
+    """Diz se o IntegrityError veio do índice único parcial de alocações em campo."""
+    diag = getattr(erro.orig, 'diag', None)
+    if diag is not None:
+        # PostgreSQL informa o nome da constraint violada
+        return getattr(diag, 'constraint_name', None) == INDICE_EM_CAMPO
+    # SQLite só informa as colunas do índice
+    return 'UNIQUE constraint failed: alocacoes.datalogger_id' in str(erro.orig)
+
+def _erro_integridade(erro):
+    db.session.rollback()
+    if _em_campo_duplicada(erro):
+        return jsonify({'error': 'Datalogger já possui alocação em campo'}), 409
+    return jsonify({'error': f'Dados inválidos: {erro.orig}'}), 400
+
 @alocacao_bp.route('/alocacoes', methods=['GET'])
+@com_etag('alocacoes', 'dataloggers', 'demandas', 'clientes')
 def get_alocacoes():
     try:
-        status_filter = request.args.get('status')
-        demanda_filter = request.args.get('demanda_id')
-        datalogger_filter = request.args.get('datalogger_id')
-        
-        query = Alocacao.query
-        
-        if status_filter:
-            query = query.filter(Alocacao.status == status_filter)
-        if demanda_filter:
-            query = query.filter(Alocacao.demanda_id == demanda_filter)
-        if datalogger_filter:
-            query = query.filter(Alocacao.datalogger_id == datalogger_filter)
-            
-        alocacoes = query.all()
-        return jsonify([alocacao.to_dict() for alocacao in alocacoes]), 200
+        query = filtrar_alocacoes(leitura_alocacoes(), request.args)
+        return resposta_json(paginar(query, Alocacao, ORDENACOES, linha_para_dict))
+    except ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -33,13 +50,6 @@ def create_alocacao():
     try:
         data = request.get_json()
         
-        # Verificar se datalogger existe e está disponível
-        datalogger = Datalogger.query.get(data['datalogger_id'])
-        if not datalogger:
-            return jsonify({'error': 'Datalogger não encontrado'}), 404
-        if datalogger.status != 'Estoque':
-            return jsonify({'error': 'Datalogger não está disponível para alocação'}), 400
-        
         # Verificar se demanda existe e está ativa
         demanda = Demanda.query.get(data['demanda_id'])
         if not demanda:
@@ -56,22 +66,127 @@ def create_alocacao():
             observacoes=data.get('observacoes')
         )
         
-        # Atualizar status do datalogger
-        datalogger.status = 'Alocado'
-        datalogger.updated_at = datetime.utcnow()
+        # Reservar o datalogger de forma atômica: o UPDATE só afeta a linha se
+        # ela ainda estiver em estoque, sem janela entre leitura e escrita
+        reservado = db.session.execute(
+            update(Datalogger)
+            .where(Datalogger.id == data['datalogger_id'], Datalogger.status == 'Estoque')
+            .values(status='Alocado', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not reservado:
+            db.session.rollback()
+            if not Datalogger.query.get(data['datalogger_id']):
+                return jsonify({'error': 'Datalogger não encontrado'}), 404
+            return jsonify({'error': 'Datalogger não está disponível para alocação'}), 400
+        registrar_alteracoes('datalogger', [(data['datalogger_id'], 'Alocado')])
         
         db.session.add(alocacao)
+        db.session.flush()
+        sincronizar_alertas(alocacoes=[alocacao.id])
         db.session.commit()
         
         return jsonify(alocacao.to_dict()), 201
+    except IntegrityError as e:
+        return _erro_integridade(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@alocacao_bp.route('/alocacoes/lote', methods=['POST'])
+def create_alocacoes_lote():
+    try:
+        data = request.get_json()
+        
+        demanda = Demanda.query.get(data['demanda_id'])
+        if not demanda:
+            return jsonify({'error': 'Demanda não encontrada'}), 404
+        if demanda.status != 'Ativa':
+            return jsonify({'error': 'Demanda não está ativa'}), 400
+        
+        data_saida = datetime.strptime(data['data_saida'], '%Y-%m-%d').date()
+        data_retorno_prevista = datetime.strptime(data['data_retorno_prevista'], '%Y-%m-%d').date()
+        resultados = []
+        
+        if data.get('datalogger_ids'):
+            if not isinstance(data['datalogger_ids'], list):
+                raise ParametroInvalido('datalogger_ids deve ser uma lista')
+            # Validação em uma consulta para todos os ids informados
+            ids = list(dict.fromkeys(_inteiro(i, 'datalogger_id') for i in data['datalogger_ids']))
+            status_por_id = dict(db.session.query(Datalogger.id, Datalogger.status).filter(Datalogger.id.in_(ids)).all())
+            selecionados = []
+            for datalogger_id in ids:
+                if datalogger_id not in status_por_id:
+                    resultados.append({'datalogger_id': datalogger_id, 'sucesso': False, 'erro': 'Datalogger não encontrado'})
+                elif status_por_id[datalogger_id] != 'Estoque':
+                    resultados.append({'datalogger_id': datalogger_id, 'sucesso': False, 'erro': 'Datalogger não está disponível para alocação'})
+                else:
+                    selecionados.append(datalogger_id)
+        elif data.get('quantidade') is not None:
+            # LIMIT negativo no SQLite é "sem limite": alocaria o estoque inteiro
+            quantidade = _inteiro(data['quantidade'], 'quantidade', minimo=1)
+            query = db.session.query(Datalogger.id).filter(Datalogger.status == 'Estoque')
+            if data.get('modelo'):
+                query = query.filter(Datalogger.modelo == data['modelo'])
+            selecionados = [i for (i,) in query.order_by(Datalogger.id).limit(quantidade).all()]
+            if len(selecionados) < quantidade:
+                return jsonify({'error': f'Apenas {len(selecionados)} dataloggers disponíveis em estoque'}), 400
+        else:
+            return jsonify({'error': 'Informe datalogger_ids ou quantidade'}), 400
+        
+        if not selecionados:
+            return jsonify({'alocadas': 0, 'resultados': resultados}), 400
+        
+        agora = datetime.utcnow()
+        # Atualização em lote condicionada ao status: se outra requisição alocou
+        # algum destes dataloggers no meio tempo, o lote inteiro é desfeito
+        atualizados = db.session.execute(
+            update(Datalogger)
+            .where(Datalogger.id.in_(selecionados), Datalogger.status == 'Estoque')
+            .values(status='Alocado', updated_at=agora)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if atualizados != len(selecionados):
+            db.session.rollback()
+            return jsonify({'error': 'Dataloggers alocados por outra operação, tente novamente'}), 409
+        
+        inseridas = db.session.execute(
+            insert(Alocacao).returning(Alocacao.id, Alocacao.datalogger_id),
+            [
+                {
+                    'datalogger_id': datalogger_id,
+                    'demanda_id': demanda.id,
+                    'data_saida': data_saida,
+                    'data_retorno_prevista': data_retorno_prevista,
+                    'status': 'Em campo',
+                    'observacoes': data.get('observacoes')
+                }
+                for datalogger_id in selecionados
+            ]
+        ).all()
+        sincronizar_alertas(alocacoes=[alocacao_id for alocacao_id, _ in inseridas])
+        registrar_alteracoes('datalogger', [(datalogger_id, 'Alocado') for datalogger_id in selecionados])
+        registrar_alteracoes('alocacao', [(alocacao_id, 'Em campo') for alocacao_id, _ in inseridas], acao='criado')
+        db.session.commit()
+        
+        for alocacao_id, datalogger_id in inseridas:
+            resultados.append({'datalogger_id': datalogger_id, 'sucesso': True, 'alocacao_id': alocacao_id})
+        
+        return jsonify({'alocadas': len(inseridas), 'resultados': resultados}), 201
+    except ParametroInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except IntegrityError as e:
+        return _erro_integridade(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @alocacao_bp.route('/alocacoes/<int:id>', methods=['GET'])
+@com_etag('alocacoes', 'dataloggers', 'demandas', 'clientes')
 def get_alocacao(id):
     try:
-        alocacao = Alocacao.query.get_or_404(id)
+        alocacao = consulta_alocacoes().get_or_404(id)
         return jsonify(alocacao.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -81,6 +196,7 @@ def update_alocacao(id):
     try:
         alocacao = Alocacao.query.get_or_404(id)
         data = request.get_json()
+        antes = intervalos(Alocacao.id == id)
         
         # Atualizar campos básicos
         for field in ['observacoes']:
@@ -96,6 +212,9 @@ def update_alocacao(id):
             alocacao.data_retorno_real = datetime.strptime(data['data_retorno_real'], '%Y-%m-%d').date()
         
         alocacao.updated_at = datetime.utcnow()
+        db.session.flush()
+        registrar_variacao(antes, intervalos(Alocacao.id == id))
+        sincronizar_alertas(alocacoes=[id])
         db.session.commit()
         
         return jsonify(alocacao.to_dict()), 200
@@ -103,19 +222,44 @@ def update_alocacao(id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _inteiro(valor, campo, minimo=None):
+    # bool é int em Python e 1.5 viraria 1: os dois são recusados
+    if isinstance(valor, bool) or (isinstance(valor, float) and not valor.is_integer()):
+        raise ParametroInvalido(f'{campo} inválido: {valor!r}')
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        raise ParametroInvalido(f'{campo} inválido: {valor!r}')
+    if minimo is not None and numero < minimo:
+        raise ParametroInvalido(f'{campo} deve ser no mínimo {minimo}')
+    return numero
+
+def _data(valor, campo):
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ParametroInvalido(f'{campo} inválida (use AAAA-MM-DD)')
+
 @alocacao_bp.route('/alocacoes/<int:id>/retorno', methods=['POST'])
 def registrar_retorno(id):
     try:
         alocacao = Alocacao.query.get_or_404(id)
-        data = request.get_json()
+        data = request.get_json() or {}
+        data_retorno_real = _data(data.get('data_retorno_real'), 'data_retorno_real') or date.today()
         
-        if alocacao.status == 'Retornado':
+        agora = datetime.utcnow()
+        if not encerrar_alocacoes(Alocacao.id == id, agora):
+            db.session.rollback()
             return jsonify({'error': 'Alocação já foi finalizada'}), 400
+        # Depois do UPDATE: a linha já está travada por esta transação
+        antes = intervalos(Alocacao.id == id)
         
         # Registrar retorno
         alocacao.status = 'Retornado'
-        alocacao.data_retorno_real = datetime.strptime(data['data_retorno_real'], '%Y-%m-%d').date() if data.get('data_retorno_real') else date.today()
-        alocacao.updated_at = datetime.utcnow()
+        alocacao.data_retorno_real = data_retorno_real
+        alocacao.updated_at = agora
         
         if data.get('observacoes'):
             alocacao.observacoes = data['observacoes']
@@ -128,11 +272,93 @@ def registrar_retorno(id):
                 datalogger.status = 'Calibração'
             else:
                 datalogger.status = 'Estoque'
-            datalogger.updated_at = datetime.utcnow()
+            datalogger.updated_at = agora
         
+        db.session.flush()
+        registrar_variacao(antes, intervalos(Alocacao.id == id))
+        sincronizar_alertas(alocacoes=[id])
         db.session.commit()
         
         return jsonify(alocacao.to_dict()), 200
+    except ParametroInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@alocacao_bp.route('/alocacoes/retorno-lote', methods=['POST'])
+def registrar_retorno_lote():
+    try:
+        data = request.get_json() or {}
+        itens = data.get('alocacoes') or []
+        if not itens or not isinstance(itens, list):
+            return jsonify({'error': 'Informe a lista de alocacoes'}), 400
+        
+        # Validação de todos os itens antes de qualquer escrita
+        data_padrao = _data(data.get('data_retorno_real'), 'data_retorno_real') or date.today()
+        pedidos = {}
+        for item in itens:
+            if not isinstance(item, dict):
+                raise ParametroInvalido('Cada item deve ser um objeto com id')
+            alocacao_id = _inteiro(item.get('id'), 'id')
+            if alocacao_id not in pedidos:
+                pedidos[alocacao_id] = {
+                    'data_retorno_real': _data(item.get('data_retorno_real'), 'data_retorno_real') or data_padrao,
+                    'observacoes': item.get('observacoes'),
+                    'enviar_calibracao': bool(item.get('enviar_calibracao')),
+                }
+        
+        agora = datetime.utcnow()
+        retornadas = encerrar_alocacoes(Alocacao.id.in_(pedidos), agora)
+        
+        resultados = []
+        if retornadas:
+            condicao = Alocacao.id.in_(retornadas)
+            antes = intervalos(condicao)
+            alteracoes = []
+            for alocacao_id in retornadas:
+                alteracao = {'id': alocacao_id, 'data_retorno_real': pedidos[alocacao_id]['data_retorno_real']}
+                if pedidos[alocacao_id]['observacoes']:
+                    alteracao['observacoes'] = pedidos[alocacao_id]['observacoes']
+                alteracoes.append(alteracao)
+            # UPDATE em lote por chave primária (executemany), só das alocações encerradas aqui
+            db.session.execute(update(Alocacao), alteracoes)
+            registrar_variacao(antes, intervalos(condicao))
+            sincronizar_alertas(alocacoes=list(retornadas))
+            registrar_alteracoes('alocacao', [(alocacao_id, 'Retornado') for alocacao_id in retornadas])
+            
+            para_calibracao = [d for a, d in retornadas.items() if pedidos[a]['enviar_calibracao']]
+            para_estoque = [d for a, d in retornadas.items() if not pedidos[a]['enviar_calibracao']]
+            for novo_status, datalogger_ids in (('Calibração', para_calibracao), ('Estoque', para_estoque)):
+                if datalogger_ids:
+                    db.session.execute(
+                        update(Datalogger)
+                        .where(Datalogger.id.in_(datalogger_ids))
+                        .values(status=novo_status, updated_at=agora)
+                        .execution_options(synchronize_session=False)
+                    )
+                    registrar_alteracoes('datalogger', [(datalogger_id, novo_status) for datalogger_id in datalogger_ids])
+        
+        # As não encerradas aqui: inexistentes ou já finalizadas (inclusive por outra requisição)
+        faltantes = [alocacao_id for alocacao_id in pedidos if alocacao_id not in retornadas]
+        existentes = set()
+        if faltantes:
+            existentes = {i for (i,) in db.session.query(Alocacao.id).filter(Alocacao.id.in_(faltantes)).all()}
+        db.session.commit()
+        
+        for alocacao_id in pedidos:
+            if alocacao_id in retornadas:
+                resultados.append({'id': alocacao_id, 'sucesso': True, 'datalogger_id': retornadas[alocacao_id]})
+            elif alocacao_id in existentes:
+                resultados.append({'id': alocacao_id, 'sucesso': False, 'erro': 'Alocação já foi finalizada'})
+            else:
+                resultados.append({'id': alocacao_id, 'sucesso': False, 'erro': 'Alocação não encontrada'})
+        
+        return jsonify({'retornadas': len(retornadas), 'resultados': resultados}), 200
+    except ParametroInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -141,6 +367,7 @@ def registrar_retorno(id):
 def delete_alocacao(id):
     try:
         alocacao = Alocacao.query.get_or_404(id)
+        registrar_variacao(intervalos(Alocacao.id == id), [])
         
         # Se a alocação está em campo, retornar datalogger ao estoque
         if alocacao.status == 'Em campo':
@@ -150,6 +377,8 @@ def delete_alocacao(id):
                 datalogger.updated_at = datetime.utcnow()
         
         db.session.delete(alocacao)
+        db.session.flush()
+        sincronizar_alertas(alocacoes=[id])
         db.session.commit()
         
         return jsonify({'message': 'Alocação excluída com sucesso'}), 200
@@ -158,20 +387,22 @@ def delete_alocacao(id):
         return jsonify({'error': str(e)}), 500
 
 @alocacao_bp.route('/alocacoes/em-campo', methods=['GET'])
+@com_etag('alocacoes', 'dataloggers', 'demandas', 'clientes')
 def get_alocacoes_em_campo():
     try:
-        alocacoes = Alocacao.query.filter_by(status='Em campo').all()
-        return jsonify([alocacao.to_dict() for alocacao in alocacoes]), 200
+        alocacoes = leitura_alocacoes().filter(Alocacao.status == 'Em campo').all()
+        return resposta_json([linha_para_dict(alocacao) for alocacao in alocacoes])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @alocacao_bp.route('/alocacoes/retornos-previstos', methods=['GET'])
+@com_etag('alocacoes', 'dataloggers', 'demandas', 'clientes')
 def get_retornos_previstos():
     try:
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
         
-        query = Alocacao.query.filter_by(status='Em campo')
+        query = leitura_alocacoes().filter(Alocacao.status == 'Em campo')
         
         if data_inicio:
             query = query.filter(Alocacao.data_retorno_prevista >= datetime.strptime(data_inicio, '%Y-%m-%d').date())
@@ -179,7 +410,7 @@ def get_retornos_previstos():
             query = query.filter(Alocacao.data_retorno_prevista <= datetime.strptime(data_fim, '%Y-%m-%d').date())
         
         alocacoes = query.order_by(Alocacao.data_retorno_prevista).all()
-        return jsonify([alocacao.to_dict() for alocacao in alocacoes]), 200
+        return resposta_json([linha_para_dict(alocacao) for alocacao in alocacoes])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
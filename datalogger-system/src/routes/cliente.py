@@ -2,14 +2,21 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 from src.models.user import db
 from src.models.cliente import Cliente
+from src.services.leitura_rapida import leitura_clientes, leitura_demandas, linha_para_dict, resposta_json
+from src.services.paginacao import paginar, ParametroInvalido
+from src.services.versoes import com_etag
 
 cliente_bp = Blueprint('cliente', __name__)
 
+ORDENACOES = ('id', 'nome', 'created_at')
+
 @cliente_bp.route('/clientes', methods=['GET'])
+@com_etag('clientes')
 def get_clientes():
     try:
-        clientes = Cliente.query.all()
-        return jsonify([cliente.to_dict() for cliente in clientes]), 200
+        return resposta_json(paginar(leitura_clientes(), Cliente, ORDENACOES, linha_para_dict))
+    except ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -35,6 +42,7 @@ def create_cliente():
         return jsonify({'error': str(e)}), 500
 
 @cliente_bp.route('/clientes/<int:id>', methods=['GET'])
+@com_etag('clientes')
 def get_cliente(id):
     try:
         cliente = Cliente.query.get_or_404(id)
@@ -81,12 +89,13 @@ def delete_cliente(id):
         return jsonify({'error': str(e)}), 500
 
 @cliente_bp.route('/clientes/<int:id>/demandas', methods=['GET'])
+@com_etag('clientes', 'demandas')
 def get_cliente_demandas(id):
     try:
         cliente = Cliente.query.get_or_404(id)
         from src.models.demanda import Demanda
-        demandas = Demanda.query.filter_by(cliente_id=id).all()
-        return jsonify([demanda.to_dict() for demanda in demandas]), 200
+        demandas = leitura_demandas().filter(Demanda.cliente_id == id).all()
+        return resposta_json([linha_para_dict(demanda) for demanda in demandas])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
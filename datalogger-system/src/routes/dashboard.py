@@ -1,115 +1,49 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, and_
+from sqlalchemy import func
 from src.models.user import db
 from src.models.datalogger import Datalogger
 from src.models.cliente import Cliente
 from src.models.demanda import Demanda
 from src.models.alocacao import Alocacao
+from src.models.alerta import Alerta
+from src.services.alertas import condicao_prioridade, condicao_tipo, condicao_visiveis
+from src.services.resumo import resumo_estoque
+from src.services.paginacao import paginar, ParametroInvalido
+from src.services.versoes import com_etag
+from src.services.leitura_rapida import resposta_json
+from src.services.projecao import projetar_disponibilidade, detalhar_dia
+from src.services.ocupacao import reconstruir, serie_alocados
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/dashboard/resumo', methods=['GET'])
+@com_etag('dataloggers', 'demandas', 'alocacoes')
 def get_resumo_estoque():
     try:
-        # Contadores por status de datalogger
-        total_dataloggers = Datalogger.query.count()
-        em_estoque = Datalogger.query.filter_by(status='Estoque').count()
-        alocados = Datalogger.query.filter_by(status='Alocado').count()
-        em_calibracao = Datalogger.query.filter_by(status='Calibração').count()
-        em_manutencao = Datalogger.query.filter_by(status='Manutenção').count()
-        
-        # Demandas ativas
-        demandas_ativas = Demanda.query.filter_by(status='Ativa').count()
-        
-        # Alocações em campo
-        alocacoes_em_campo = Alocacao.query.filter_by(status='Em campo').count()
-        
-        # Calibrações vencidas
-        hoje = date.today()
-        calibracoes_vencidas = Datalogger.query.filter(
-            Datalogger.proxima_calibracao <= hoje,
-            Datalogger.proxima_calibracao.isnot(None)
-        ).count()
-        
-        # Retornos previstos próximos (próximos 7 dias)
-        data_limite = hoje + timedelta(days=7)
-        retornos_proximos = Alocacao.query.filter(
-            and_(
-                Alocacao.status == 'Em campo',
-                Alocacao.data_retorno_prevista <= data_limite,
-                Alocacao.data_retorno_prevista >= hoje
-            )
-        ).count()
-        
-        resumo = {
-            'total_dataloggers': total_dataloggers,
-            'em_estoque': em_estoque,
-            'alocados': alocados,
-            'em_calibracao': em_calibracao,
-            'em_manutencao': em_manutencao,
-            'demandas_ativas': demandas_ativas,
-            'alocacoes_em_campo': alocacoes_em_campo,
-            'calibracoes_vencidas': calibracoes_vencidas,
-            'retornos_proximos': retornos_proximos,
-            'taxa_ocupacao': round((alocados / total_dataloggers * 100), 2) if total_dataloggers > 0 else 0
-        }
-        
-        return jsonify(resumo), 200
+        return jsonify(resumo_estoque()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @dashboard_bp.route('/dashboard/disponibilidade', methods=['GET'])
+@com_etag('dataloggers', 'alocacoes', 'demandas', 'clientes')
 def get_projecao_disponibilidade():
     try:
         dias_projecao = int(request.args.get('dias', 30))
         data_inicio = date.today()
-        data_fim = data_inicio + timedelta(days=dias_projecao)
-        
-        # Buscar todas as alocações em campo com retorno previsto no período
-        alocacoes = Alocacao.query.filter(
-            and_(
-                Alocacao.status == 'Em campo',
-                Alocacao.data_retorno_prevista >= data_inicio,
-                Alocacao.data_retorno_prevista <= data_fim
-            )
-        ).order_by(Alocacao.data_retorno_prevista).all()
-        
-        # Agrupar por data de retorno
-        retornos_por_data = {}
-        for alocacao in alocacoes:
-            data_str = alocacao.data_retorno_prevista.isoformat()
-            if data_str not in retornos_por_data:
-                retornos_por_data[data_str] = []
-            retornos_por_data[data_str].append(alocacao.to_dict())
         
-        # Calcular disponibilidade acumulada
-        disponibilidade_atual = Datalogger.query.filter_by(status='Estoque').count()
-        projecao = []
+        # Drill-down de um dia: itens que entram e saem do estoque naquela data
+        if request.args.get('data'):
+            dia = datetime.strptime(request.args['data'], '%Y-%m-%d').date()
+            return resposta_json(detalhar_dia(dia, data_inicio))
         
-        for i in range(dias_projecao + 1):
-            data_atual = data_inicio + timedelta(days=i)
-            data_str = data_atual.isoformat()
-            
-            retornos_dia = len(retornos_por_data.get(data_str, []))
-            disponibilidade_atual += retornos_dia
-            
-            projecao.append({
-                'data': data_str,
-                'disponibilidade': disponibilidade_atual,
-                'retornos': retornos_dia,
-                'detalhes_retornos': retornos_por_data.get(data_str, [])
-            })
-        
-        return jsonify({
-            'projecao': projecao,
-            'disponibilidade_atual': Datalogger.query.filter_by(status='Estoque').count(),
-            'total_dataloggers': Datalogger.query.count()
-        }), 200
+        detalhes = request.args.get('detalhes', 'false').lower() == 'true'
+        return resposta_json(projetar_disponibilidade(data_inicio, dias_projecao, detalhes))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @dashboard_bp.route('/dashboard/ocupacao-por-cliente', methods=['GET'])
+@com_etag('clientes', 'demandas', 'alocacoes')
 def get_ocupacao_por_cliente():
     try:
         # Buscar alocações ativas agrupadas por cliente
@@ -136,118 +70,177 @@ def get_ocupacao_por_cliente():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Entre os alertas visíveis a data de referência ordena por prioridade: vencidos e
+# atrasados (até hoje) antes dos próximos, os mais antigos primeiro
+ORDENACOES_ALERTAS = ('data_referencia', 'id', 'created_at')
+ESTADOS_ALERTA = ('aberto', 'reconhecido', 'adiado', 'todos')
+
 @dashboard_bp.route('/dashboard/alertas', methods=['GET'])
+@com_etag('dataloggers', 'alocacoes', 'alertas')
 def get_alertas():
     try:
-        alertas = []
         hoje = date.today()
         
-        # Calibrações vencidas
-        calibracoes_vencidas = Datalogger.query.filter(
-            Datalogger.proxima_calibracao <= hoje,
-            Datalogger.proxima_calibracao.isnot(None)
-        ).all()
-        
-        for dl in calibracoes_vencidas:
-            dias_vencido = (hoje - dl.proxima_calibracao).days
-            alertas.append({
-                'tipo': 'calibracao_vencida',
-                'prioridade': 'alta',
-                'mensagem': f'Datalogger {dl.numero_serie} com calibração vencida há {dias_vencido} dias',
-                'datalogger_id': dl.id,
-                'data_vencimento': dl.proxima_calibracao.isoformat()
-            })
-        
-        # Calibrações próximas (próximos 30 dias)
-        data_limite = hoje + timedelta(days=30)
-        calibracoes_proximas = Datalogger.query.filter(
-            and_(
-                Datalogger.proxima_calibracao > hoje,
-                Datalogger.proxima_calibracao <= data_limite,
-                Datalogger.proxima_calibracao.isnot(None)
-            )
-        ).all()
-        
-        for dl in calibracoes_proximas:
-            dias_restantes = (dl.proxima_calibracao - hoje).days
-            alertas.append({
-                'tipo': 'calibracao_proxima',
-                'prioridade': 'media',
-                'mensagem': f'Datalogger {dl.numero_serie} precisa de calibração em {dias_restantes} dias',
-                'datalogger_id': dl.id,
-                'data_vencimento': dl.proxima_calibracao.isoformat()
-            })
-        
-        # Retornos atrasados
-        alocacoes_atrasadas = Alocacao.query.filter(
-            and_(
-                Alocacao.status == 'Em campo',
-                Alocacao.data_retorno_prevista < hoje
-            )
-        ).all()
-        
-        for alocacao in alocacoes_atrasadas:
-            dias_atraso = (hoje - alocacao.data_retorno_prevista).days
-            alertas.append({
-                'tipo': 'retorno_atrasado',
-                'prioridade': 'alta',
-                'mensagem': f'Datalogger {alocacao.datalogger.numero_serie} está {dias_atraso} dias em atraso',
-                'alocacao_id': alocacao.id,
-                'datalogger_id': alocacao.datalogger_id,
-                'demanda_id': alocacao.demanda_id,
-                'dias_atraso': dias_atraso
-            })
-        
-        # Ordenar por prioridade
-        ordem_prioridade = {'alta': 0, 'media': 1, 'baixa': 2}
-        alertas.sort(key=lambda x: ordem_prioridade.get(x['prioridade'], 3))
-        
-        return jsonify(alertas), 200
+        estado = request.args.get('estado', 'aberto')
+        if estado not in ESTADOS_ALERTA:
+            return jsonify({'error': 'Estado inválido (use aberto, reconhecido, adiado ou todos)'}), 400
+        
+        # A tabela também guarda alertas que ainda não valem: data, tipo e
+        # prioridade são avaliados aqui, sem depender da virada do dia
+        query = Alerta.query.filter(condicao_visiveis(hoje))
+        if request.args.get('tipo'):
+            query = query.filter(condicao_tipo(request.args['tipo'], hoje))
+        if request.args.get('prioridade'):
+            query = query.filter(condicao_prioridade(request.args['prioridade'], hoje))
+        if estado == 'aberto':
+            query = query.filter(Alerta.reconhecido_em.is_(None), db.or_(Alerta.adiado_ate.is_(None), Alerta.adiado_ate <= hoje))
+        elif estado == 'reconhecido':
+            query = query.filter(Alerta.reconhecido_em.isnot(None))
+        elif estado == 'adiado':
+            query = query.filter(Alerta.reconhecido_em.is_(None), Alerta.adiado_ate > hoje)
+        
+        # Ordenação padrão por prioridade (alta primeiro, ver ORDENACOES_ALERTAS)
+        return jsonify(paginar(query, Alerta, ORDENACOES_ALERTAS, lambda alerta: alerta.to_dict(hoje), padrao='data_referencia')), 200
+    except ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@dashboard_bp.route('/dashboard/alertas/<int:id>/reconhecer', methods=['POST'])
+def reconhecer_alerta(id):
+    try:
+        alerta = db.session.get(Alerta, id)
+        if alerta is None:
+            return jsonify({'error': 'Alerta não encontrado'}), 404
+        alerta.reconhecido_em = datetime.utcnow()
+        alerta.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        return jsonify(alerta.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/dashboard/alertas/<int:id>/adiar', methods=['POST'])
+def adiar_alerta(id):
+    try:
+        alerta = db.session.get(Alerta, id)
+        if alerta is None:
+            return jsonify({'error': 'Alerta não encontrado'}), 404
+        data = request.get_json() or {}
+        
+        if data.get('ate'):
+            try:
+                alerta.adiado_ate = datetime.strptime(data['ate'], '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                return jsonify({'error': 'ate inválida (use AAAA-MM-DD)'}), 400
+        else:
+            dias = data.get('dias', 1)
+            if isinstance(dias, bool) or not isinstance(dias, int) or dias < 1:
+                return jsonify({'error': 'dias deve ser um inteiro maior que zero'}), 400
+            alerta.adiado_ate = date.today() + timedelta(days=dias)
+        alerta.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        return jsonify(alerta.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/dashboard/alertas/<int:id>/reabrir', methods=['POST'])
+def reabrir_alerta(id):
+    try:
+        alerta = db.session.get(Alerta, id)
+        if alerta is None:
+            return jsonify({'error': 'Alerta não encontrado'}), 404
+        alerta.reconhecido_em = None
+        alerta.adiado_ate = None
+        alerta.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        return jsonify(alerta.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+GRANULARIDADES = ('dia', 'semana', 'mes')
+
+def _inicio_periodo(dia, granularidade):
+    if granularidade == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if granularidade == 'mes':
+        return dia.replace(day=1)
+    return dia
+
 @dashboard_bp.route('/dashboard/historico-ocupacao', methods=['GET'])
+@com_etag('dataloggers', 'alocacoes', 'demandas')
 def get_historico_ocupacao():
     try:
-        dias_historico = int(request.args.get('dias', 30))
-        data_fim = date.today()
-        data_inicio = data_fim - timedelta(days=dias_historico)
-        
-        # Buscar alocações que estavam ativas no período
-        alocacoes = Alocacao.query.filter(
-            and_(
-                Alocacao.data_saida <= data_fim,
-                db.or_(
-                    Alocacao.data_retorno_real.is_(None),
-                    Alocacao.data_retorno_real >= data_inicio
-                )
-            )
-        ).all()
-        
-        # Calcular ocupação por dia
+        granularidade = request.args.get('granularidade', 'dia')
+        if granularidade not in GRANULARIDADES:
+            return jsonify({'error': 'Granularidade inválida (use dia, semana ou mes)'}), 400
+
+        if request.args.get('data_fim'):
+            data_fim = datetime.strptime(request.args['data_fim'], '%Y-%m-%d').date()
+        else:
+            data_fim = date.today()
+        if request.args.get('data_inicio'):
+            data_inicio = datetime.strptime(request.args['data_inicio'], '%Y-%m-%d').date()
+        else:
+            data_inicio = data_fim - timedelta(days=int(request.args.get('dias', 30)))
+        if data_inicio > data_fim:
+            return jsonify({'error': 'data_inicio deve ser anterior a data_fim'}), 400
+
+        # Filtros opcionais; o modelo também restringe o total da frota
+        cliente_id = request.args.get('cliente_id', type=int)
+        modelo = request.args.get('modelo')
+        frota = db.session.query(func.count(Datalogger.id))
+        if modelo:
+            frota = frota.filter(Datalogger.modelo == modelo)
+        total_dataloggers = frota.scalar()
+        serie = serie_alocados(data_inicio, data_fim, cliente_id, modelo)
+
+        def taxa(alocados):
+            return round(alocados / total_dataloggers * 100, 2) if total_dataloggers > 0 else 0
+
+        if granularidade == 'dia':
+            historico = [
+                {
+                    'data': (data_inicio + timedelta(days=i)).isoformat(),
+                    'alocados': alocados,
+                    'disponivel': total_dataloggers - alocados,
+                    'taxa_ocupacao': taxa(alocados)
+                }
+                for i, alocados in enumerate(serie)
+            ]
+            return jsonify(historico), 200
+
+        # Semana/mês: média e pico de alocados em cada período
+        periodos = {}
+        for i, alocados in enumerate(serie):
+            chave = _inicio_periodo(data_inicio + timedelta(days=i), granularidade)
+            periodos.setdefault(chave, []).append(alocados)
+
         historico = []
-        total_dataloggers = Datalogger.query.count()
-        
-        for i in range(dias_historico + 1):
-            data_atual = data_inicio + timedelta(days=i)
-            
-            # Contar quantos dataloggers estavam alocados nesta data
-            alocados_na_data = 0
-            for alocacao in alocacoes:
-                if (alocacao.data_saida <= data_atual and 
-                    (alocacao.data_retorno_real is None or alocacao.data_retorno_real >= data_atual)):
-                    alocados_na_data += 1
-            
-            taxa_ocupacao = (alocados_na_data / total_dataloggers * 100) if total_dataloggers > 0 else 0
-            
+        for chave in sorted(periodos):
+            valores = periodos[chave]
+            media = round(sum(valores) / len(valores), 2)
             historico.append({
-                'data': data_atual.isoformat(),
-                'alocados': alocados_na_data,
-                'disponivel': total_dataloggers - alocados_na_data,
-                'taxa_ocupacao': round(taxa_ocupacao, 2)
+                'data': chave.isoformat(),
+                'alocados': media,
+                'pico_alocados': max(valores),
+                'disponivel': round(total_dataloggers - media, 2),
+                'taxa_ocupacao': taxa(media),
+                'dias': len(valores)
             })
-        
+
         return jsonify(historico), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@dashboard_bp.cli.command('reconstruir-ocupacao')
+def reconstruir_ocupacao_cli():
+    """Recalcula a tabela ocupacao_diaria a partir das alocações."""
+    linhas = reconstruir(db.session)
+    db.session.commit()
+    print(f"✅ {linhas} linhas de ocupação diária recalculadas")
@@ -1,21 +1,28 @@
+import click
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date
 from src.models.user import db
 from src.models.datalogger import Datalogger
+from src.services.consultas import filtrar_dataloggers
+from src.services.paginacao import paginar, ParametroInvalido
+from src.services.importacao import importar_dataloggers, ler_planilha
+from src.services.leitura_rapida import leitura_dataloggers, linha_para_dict, resposta_json
+from src.services.ocupacao import intervalos, registrar_variacao
+from src.services.alertas import sincronizar_alertas
+from src.services.versoes import com_etag
 
 datalogger_bp = Blueprint('datalogger', __name__)
 
+ORDENACOES = ('id', 'numero_serie', 'modelo', 'status', 'data_aquisicao', 'proxima_calibracao', 'created_at')
+
 @datalogger_bp.route('/dataloggers', methods=['GET'])
+@com_etag('dataloggers')
 def get_dataloggers():
     try:
-        status_filter = request.args.get('status')
-        query = Datalogger.query
-        
-        if status_filter:
-            query = query.filter(Datalogger.status == status_filter)
-            
-        dataloggers = query.all()
-        return jsonify([dl.to_dict() for dl in dataloggers]), 200
+        query = filtrar_dataloggers(leitura_dataloggers(), request.args)
+        return resposta_json(paginar(query, Datalogger, ORDENACOES, linha_para_dict))
+    except ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -45,6 +52,8 @@ def create_datalogger():
             datalogger.proxima_calibracao = datetime.strptime(data['proxima_calibracao'], '%Y-%m-%d').date()
         
         db.session.add(datalogger)
+        db.session.flush()
+        sincronizar_alertas(dataloggers=[datalogger.id])
         db.session.commit()
         
         return jsonify(datalogger.to_dict()), 201
@@ -52,7 +61,35 @@ def create_datalogger():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@datalogger_bp.route('/dataloggers/importar', methods=['POST'])
+def importar_dataloggers_arquivo():
+    try:
+        arquivo = request.files.get('arquivo')
+        if not arquivo or not arquivo.filename:
+            return jsonify({'error': 'Envie o arquivo CSV/XLSX no campo "arquivo"'}), 400
+        
+        relatorio = importar_dataloggers(ler_planilha(arquivo.stream, arquivo.filename))
+        
+        return jsonify(relatorio), 200
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@datalogger_bp.cli.command('importar')
+@click.argument('caminho')
+def importar_dataloggers_cli(caminho):
+    """Importa dataloggers de um arquivo CSV/XLSX."""
+    with open(caminho, 'rb') as arquivo:
+        relatorio = importar_dataloggers(ler_planilha(arquivo, caminho))
+    for erro in relatorio['erros']:
+        print(f"Linha {erro['linha']}: {erro['erro']} ({erro['numero_serie']})")
+    print(f"✅ {relatorio['importados']} de {relatorio['total']} dataloggers importados")
+
 @datalogger_bp.route('/dataloggers/<int:id>', methods=['GET'])
+@com_etag('dataloggers')
 def get_datalogger(id):
     try:
         datalogger = Datalogger.query.get_or_404(id)
@@ -72,6 +109,11 @@ def update_datalogger(id):
             if existing:
                 return jsonify({'error': 'Número de série já existe'}), 400
         
+        # Troca de modelo move as alocações encerradas do datalogger no rollup de ocupação
+        from src.models.alocacao import Alocacao
+        troca_modelo = 'modelo' in data and data['modelo'] != datalogger.modelo
+        antes = intervalos(Alocacao.datalogger_id == id) if troca_modelo else []
+        
         # Atualizar campos
         for field in ['numero_serie', 'modelo', 'status', 'observacoes']:
             if field in data:
@@ -86,6 +128,10 @@ def update_datalogger(id):
             datalogger.proxima_calibracao = datetime.strptime(data['proxima_calibracao'], '%Y-%m-%d').date()
         
         datalogger.updated_at = datetime.utcnow()
+        if troca_modelo:
+            db.session.flush()
+            registrar_variacao(antes, intervalos(Alocacao.datalogger_id == id))
+        sincronizar_alertas(dataloggers=[id])
         db.session.commit()
         
         return jsonify(datalogger.to_dict()), 200
@@ -105,6 +151,8 @@ def delete_datalogger(id):
             return jsonify({'error': 'Não é possível excluir datalogger com alocações ativas'}), 400
         
         db.session.delete(datalogger)
+        db.session.flush()
+        sincronizar_alertas(dataloggers=[id])
         db.session.commit()
         
         return jsonify({'message': 'Datalogger excluído com sucesso'}), 200
@@ -113,22 +161,24 @@ def delete_datalogger(id):
         return jsonify({'error': str(e)}), 500
 
 @datalogger_bp.route('/dataloggers/disponveis', methods=['GET'])
+@com_etag('dataloggers')
 def get_dataloggers_disponveis():
     try:
-        dataloggers = Datalogger.query.filter_by(status='Estoque').all()
-        return jsonify([dl.to_dict() for dl in dataloggers]), 200
+        dataloggers = leitura_dataloggers().filter(Datalogger.status == 'Estoque').all()
+        return resposta_json([linha_para_dict(dl) for dl in dataloggers])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @datalogger_bp.route('/dataloggers/calibracao-vencida', methods=['GET'])
+@com_etag('dataloggers')
 def get_dataloggers_calibracao_vencida():
     try:
         hoje = date.today()
-        dataloggers = Datalogger.query.filter(
+        dataloggers = leitura_dataloggers().filter(
             Datalogger.proxima_calibracao <= hoje,
             Datalogger.proxima_calibracao.isnot(None)
         ).all()
-        return jsonify([dl.to_dict() for dl in dataloggers]), 200
+        return resposta_json([linha_para_dict(dl) for dl in dataloggers])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
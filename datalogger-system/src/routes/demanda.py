@@ -1,26 +1,43 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date
+from sqlalchemy import and_, update
 from src.models.user import db
 from src.models.demanda import Demanda
 from src.models.cliente import Cliente
+from src.services.consultas import consulta_demandas, filtrar_demandas
+from src.services.paginacao import paginar, ParametroInvalido
+from src.services.leitura_rapida import leitura_alocacoes, leitura_demandas, linha_para_dict, resposta_json
+from src.services.ocupacao import encerrar_alocacoes, intervalos, registrar_variacao
+from src.services.alertas import sincronizar_alertas
+from src.services.eventos import registrar_alteracoes
+from src.services.versoes import com_etag
 
 demanda_bp = Blueprint('demanda', __name__)
 
+ORDENACOES = ('id', 'status', 'data_inicio', 'data_fim_prevista', 'created_at')
+
+def _quantidade_prevista(valor):
+    # Entra em contas da projeção de disponibilidade: inteiro >= 0 ou vazio
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, bool) or (isinstance(valor, float) and not valor.is_integer()):
+        raise ParametroInvalido(f'quantidade_prevista inválida: {valor!r}')
+    try:
+        quantidade = int(valor)
+    except (TypeError, ValueError):
+        raise ParametroInvalido(f'quantidade_prevista inválida: {valor!r}')
+    if quantidade < 0:
+        raise ParametroInvalido('quantidade_prevista não pode ser negativa')
+    return quantidade
+
 @demanda_bp.route('/demandas', methods=['GET'])
+@com_etag('demandas', 'clientes')
 def get_demandas():
     try:
-        status_filter = request.args.get('status')
-        cliente_filter = request.args.get('cliente_id')
-        
-        query = Demanda.query
-        
-        if status_filter:
-            query = query.filter(Demanda.status == status_filter)
-        if cliente_filter:
-            query = query.filter(Demanda.cliente_id == cliente_filter)
-            
-        demandas = query.all()
-        return jsonify([demanda.to_dict() for demanda in demandas]), 200
+        query = filtrar_demandas(leitura_demandas(), request.args)
+        return resposta_json(paginar(query, Demanda, ORDENACOES, linha_para_dict))
+    except ParametroInvalido as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -40,6 +57,7 @@ def create_demanda():
             data_inicio=datetime.strptime(data['data_inicio'], '%Y-%m-%d').date(),
             data_fim_prevista=datetime.strptime(data['data_fim_prevista'], '%Y-%m-%d').date(),
             status=data.get('status', 'Ativa'),
+            quantidade_prevista=_quantidade_prevista(data.get('quantidade_prevista')),
             observacoes=data.get('observacoes')
         )
         
@@ -50,14 +68,18 @@ def create_demanda():
         db.session.commit()
         
         return jsonify(demanda.to_dict()), 201
+    except ParametroInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @demanda_bp.route('/demandas/<int:id>', methods=['GET'])
+@com_etag('demandas', 'clientes')
 def get_demanda(id):
     try:
-        demanda = Demanda.query.get_or_404(id)
+        demanda = consulta_demandas().get_or_404(id)
         return jsonify(demanda.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -74,8 +96,16 @@ def update_demanda(id):
             if not cliente:
                 return jsonify({'error': 'Cliente não encontrado'}), 404
         
+        if 'quantidade_prevista' in data:
+            data['quantidade_prevista'] = _quantidade_prevista(data['quantidade_prevista'])
+        
+        # Troca de cliente move as alocações encerradas da demanda no rollup de ocupação
+        from src.models.alocacao import Alocacao
+        troca_cliente = 'cliente_id' in data and data['cliente_id'] != demanda.cliente_id
+        antes = intervalos(Alocacao.demanda_id == id) if troca_cliente else []
+        
         # Atualizar campos básicos
-        for field in ['cliente_id', 'descricao', 'status', 'observacoes']:
+        for field in ['cliente_id', 'descricao', 'status', 'quantidade_prevista', 'observacoes']:
             if field in data:
                 setattr(demanda, field, data[field])
         
@@ -88,9 +118,15 @@ def update_demanda(id):
             demanda.data_fim_real = datetime.strptime(data['data_fim_real'], '%Y-%m-%d').date()
         
         demanda.updated_at = datetime.utcnow()
+        if troca_cliente:
+            db.session.flush()
+            registrar_variacao(antes, intervalos(Alocacao.demanda_id == id))
         db.session.commit()
         
         return jsonify(demanda.to_dict()), 200
+    except ParametroInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -124,21 +160,32 @@ def finalizar_demanda(id):
         demanda.data_fim_real = datetime.strptime(data['data_fim_real'], '%Y-%m-%d').date() if data.get('data_fim_real') else date.today()
         demanda.updated_at = datetime.utcnow()
         
-        # Finalizar todas as alocações da demanda
+        # Encerrar as alocações em campo num UPDATE condicional: as que um /retorno
+        # concorrente encerrou primeiro não voltam e ficam fora das variações
         from src.models.alocacao import Alocacao
         from src.models.datalogger import Datalogger
         
-        alocacoes = Alocacao.query.filter_by(demanda_id=id, status='Em campo').all()
-        for alocacao in alocacoes:
-            alocacao.status = 'Retornado'
-            alocacao.data_retorno_real = demanda.data_fim_real
-            alocacao.updated_at = datetime.utcnow()
-            
-            # Atualizar status do datalogger para estoque
-            datalogger = Datalogger.query.get(alocacao.datalogger_id)
-            if datalogger:
-                datalogger.status = 'Estoque'
-                datalogger.updated_at = datetime.utcnow()
+        agora = datetime.utcnow()
+        encerradas = encerrar_alocacoes(and_(Alocacao.demanda_id == id, Alocacao.status == 'Em campo'), agora)
+        if encerradas:
+            finalizadas = Alocacao.id.in_(encerradas)
+            antes = intervalos(finalizadas)
+            db.session.execute(
+                update(Alocacao)
+                .where(finalizadas)
+                .values(data_retorno_real=demanda.data_fim_real)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.execute(
+                update(Datalogger)
+                .where(Datalogger.id.in_(encerradas.values()))
+                .values(status='Estoque', updated_at=agora)
+                .execution_options(synchronize_session=False)
+            )
+            registrar_variacao(antes, intervalos(finalizadas))
+            sincronizar_alertas(alocacoes=list(encerradas))
+            registrar_alteracoes('alocacao', [(alocacao_id, 'Retornado') for alocacao_id in encerradas])
+            registrar_alteracoes('datalogger', [(datalogger_id, 'Estoque') for datalogger_id in encerradas.values()])
         
         db.session.commit()
         
@@ -148,12 +195,13 @@ def finalizar_demanda(id):
         return jsonify({'error': str(e)}), 500
 
 @demanda_bp.route('/demandas/<int:id>/alocacoes', methods=['GET'])
+@com_etag('alocacoes', 'dataloggers', 'demandas', 'clientes')
 def get_demanda_alocacoes(id):
     try:
         demanda = Demanda.query.get_or_404(id)
         from src.models.alocacao import Alocacao
-        alocacoes = Alocacao.query.filter_by(demanda_id=id).all()
-        return jsonify([alocacao.to_dict() for alocacao in alocacoes]), 200
+        alocacoes = leitura_alocacoes().filter(Alocacao.demanda_id == id).all()
+        return resposta_json([linha_para_dict(alocacao) for alocacao in alocacoes])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,57 @@
+import os
+import queue
+import time
+from flask import Blueprint, current_app, jsonify, redirect, Response
+from src.services.eventos import central_eventos, LimiteConexoes
+from src.services.leitura_rapida import codificar_json
+
+eventos_bp = Blueprint('eventos', __name__)
+
+INTERVALO_PING = 15
+# Conexões são encerradas periodicamente; o EventSource reconecta sozinho
+DURACAO_MAXIMA = int(os.environ.get('EVENTOS_DURACAO_MAXIMA', 300))
+# Com o processo lotado o navegador espera mais antes de tentar de novo (ms)
+ESPERA_LOTADO = 15000
+# Endereço público do processo de eventos; vazio: o próprio worker atende o stream
+URL_EVENTOS = os.environ.get('EVENTOS_URL')
+
+@eventos_bp.route('/eventos', methods=['GET'])
+def stream_eventos():
+    # Nos workers gthread cada stream prenderia uma thread: com EVENTOS_URL eles
+    # redirecionam para o processo de eventos (gunicorn_eventos.conf.py, worker gevent)
+    destino = current_app.config.get('EVENTOS_URL', URL_EVENTOS)
+    if destino:
+        return redirect(destino, 307)
+    try:
+        central = central_eventos()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def gerar():
+        # A assinatura é feita aqui, e não antes do Response: se o stream nunca
+        # começar a ser lido, não fica fila nenhuma presa na central
+        try:
+            fila = central.assinar()
+        except LimiteConexoes:
+            # Resposta 200 que termina logo: o EventSource tenta de novo depois do
+            # retry (com um 503 ele desistiria da conexão de vez)
+            yield f'retry: {ESPERA_LOTADO}\n\n'
+            return
+        # Nenhuma consulta ao banco por cliente: só espera notificações na fila
+        try:
+            yield 'retry: 3000\n\n'
+            limite = time.monotonic() + DURACAO_MAXIMA
+            while time.monotonic() < limite:
+                try:
+                    evento = fila.get(timeout=INTERVALO_PING)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                yield 'event: alteracao\ndata: ' + codificar_json(evento).decode() + '\n\n'
+        finally:
+            central.cancelar(fila)
+
+    return Response(gerar(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
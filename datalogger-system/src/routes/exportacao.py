@@ -0,0 +1,74 @@
+import csv
+import io
+from datetime import date
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from src.models.alocacao import Alocacao
+from src.models.cliente import Cliente
+from src.models.datalogger import Datalogger
+from src.models.demanda import Demanda
+from src.services.consultas import filtrar_alocacoes, filtrar_dataloggers, filtrar_demandas
+from src.services.leitura_rapida import (
+    leitura_alocacoes, leitura_clientes, leitura_dataloggers, leitura_demandas, codificar_json
+)
+
+exportacao_bp = Blueprint('exportacao', __name__)
+
+# Linhas buscadas por lote do cursor; a memória fica limitada a um lote
+TAMANHO_LOTE = 1000
+
+RECURSOS = {
+    'dataloggers': (Datalogger, lambda args: filtrar_dataloggers(leitura_dataloggers(), args)),
+    'clientes': (Cliente, lambda args: leitura_clientes()),
+    'demandas': (Demanda, lambda args: filtrar_demandas(leitura_demandas(), args)),
+    'alocacoes': (Alocacao, lambda args: filtrar_alocacoes(leitura_alocacoes(), args)),
+}
+
+def _linhas_ndjson(linhas):
+    for linha in linhas:
+        yield codificar_json(linha._asdict()) + b'\n'
+
+def _linhas_csv(linhas, colunas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def drenar():
+        valor = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return valor
+
+    escritor.writerow(colunas)
+    yield drenar()
+    for linha in linhas:
+        escritor.writerow([v.isoformat() if isinstance(v, date) else v for v in linha])
+        yield drenar()
+
+@exportacao_bp.route('/export/<recurso>', methods=['GET'])
+def exportar(recurso):
+    try:
+        if recurso not in RECURSOS:
+            return jsonify({'error': 'Recurso inválido'}), 404
+        formato = request.args.get('format', 'ndjson')
+        if formato not in ('ndjson', 'csv'):
+            return jsonify({'error': 'Formato inválido (use ndjson ou csv)'}), 400
+
+        modelo, montar_consulta = RECURSOS[recurso]
+        # yield_per busca em lotes (cursor do lado do servidor no PostgreSQL)
+        consulta = montar_consulta(request.args)
+        registros = consulta.order_by(modelo.id).yield_per(TAMANHO_LOTE)
+
+        if formato == 'csv':
+            colunas = [coluna['name'] for coluna in consulta.column_descriptions]
+            corpo = _linhas_csv(registros, colunas)
+            mimetype = 'text/csv'
+        else:
+            corpo = _linhas_ndjson(registros)
+            mimetype = 'application/x-ndjson'
+
+        return Response(
+            stream_with_context(corpo),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={recurso}.{formato}'}
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
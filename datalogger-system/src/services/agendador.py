@@ -0,0 +1,254 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.tarefa_agendada import TarefaAgendada
+from src.services.banco import somente_leitura
+
+INTERVALO = int(os.environ.get('AGENDADOR_INTERVALO', 30))
+IDENTIDADE = f'{socket.gethostname()}:{os.getpid()}'
+
+
+class Agenda:
+    """Expressão no formato do cron: ``minuto hora dia mês dia-da-semana``.
+
+    Aceita ``*``, listas (``1,15``), faixas (``1-5``) e passos (``*/10``);
+    dia da semana 0 ou 7 é domingo. Como no cron, se dia e dia da semana
+    forem ambos restritos basta um deles coincidir.
+    """
+
+    LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expressao):
+        partes = expressao.split()
+        if len(partes) != 5:
+            raise ValueError(f'Agenda inválida: {expressao}')
+        self.expressao = expressao
+        self.minutos, self.horas, self.dias, self.meses, dias_semana = [
+            self._campo(parte, *limites) for parte, limites in zip(partes, self.LIMITES)
+        ]
+        self.dias_semana = {dia % 7 for dia in dias_semana}
+        self.dia_restrito = not partes[2].startswith('*')
+        self.semana_restrita = not partes[4].startswith('*')
+
+    @staticmethod
+    def _campo(texto, minimo, maximo):
+        valores = set()
+        for item in texto.split(','):
+            faixa, _, passo = item.partition('/')
+            if faixa == '*':
+                inicio, fim = minimo, maximo
+            elif '-' in faixa:
+                inicio, fim = (int(v) for v in faixa.split('-', 1))
+            else:
+                inicio = int(faixa)
+                fim = maximo if passo else inicio
+            passo = int(passo) if passo else 1
+            if not minimo <= inicio <= fim <= maximo or passo < 1:
+                raise ValueError(f'Campo de agenda inválido: {texto}')
+            valores.update(range(inicio, fim + 1, passo))
+        return valores
+
+    def _dia_valido(self, momento):
+        dia_semana = (momento.weekday() + 1) % 7
+        if self.dia_restrito and self.semana_restrita:
+            return momento.day in self.dias or dia_semana in self.dias_semana
+        return momento.day in self.dias and dia_semana in self.dias_semana
+
+    def proxima(self, depois):
+        """Primeiro horário da agenda estritamente posterior a ``depois``."""
+        momento = depois.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = momento + timedelta(days=366 * 5)
+        while momento < limite:
+            if momento.month not in self.meses:
+                momento = (momento.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._dia_valido(momento):
+                momento = momento.replace(hour=0, minute=0) + timedelta(days=1)
+            elif momento.hour not in self.horas:
+                momento = momento.replace(minute=0) + timedelta(hours=1)
+            elif momento.minute not in self.minutos:
+                momento += timedelta(minutes=1)
+            else:
+                return momento
+        raise ValueError(f'Agenda sem próxima execução: {self.expressao}')
+
+
+class Tarefa:
+    def __init__(self, nome, agenda, funcao, descricao, tempo_maximo):
+        self.nome = nome
+        self.agenda = agenda
+        self.funcao = funcao
+        self.descricao = descricao
+        self.tempo_maximo = tempo_maximo
+
+
+# Registro das tarefas (ver services/tarefas.py)
+TAREFAS = {}
+
+def tarefa(nome, agenda, tempo_maximo=3600):
+    """Registra a função como tarefa agendada.
+
+    ``tempo_maximo`` (segundos) é a validade da trava: se o worker que executa
+    morrer, outro pode assumir depois desse prazo.
+    """
+    def decorador(funcao):
+        TAREFAS[nome] = Tarefa(nome, Agenda(agenda), funcao, (funcao.__doc__ or '').strip(), tempo_maximo)
+        return funcao
+    return decorador
+
+
+def _agora():
+    return datetime.now().replace(microsecond=0)
+
+def garantir_linhas():
+    """Cria o estado das tarefas novas e ajusta a próxima execução de agendas alteradas."""
+    agora = _agora()
+    estados = {estado.nome: estado for estado in TarefaAgendada.query.filter(TarefaAgendada.nome.in_(TAREFAS))}
+    for nome, registrada in TAREFAS.items():
+        proxima = registrada.agenda.proxima(agora)
+        estado = estados.get(nome)
+        if estado is None:
+            db.session.add(TarefaAgendada(nome=nome, proxima_execucao=proxima))
+        elif estado.proxima_execucao is None or estado.proxima_execucao > proxima:
+            estado.proxima_execucao = proxima
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Outro worker criou as mesmas linhas ao mesmo tempo
+        db.session.rollback()
+
+def _adquirir(registrada, agora, forcar=False):
+    # UPDATE condicional: só um worker consegue marcar a tarefa como em execução
+    condicoes = [
+        TarefaAgendada.nome == registrada.nome,
+        or_(
+            TarefaAgendada.em_execucao_desde.is_(None),
+            TarefaAgendada.em_execucao_desde < agora - timedelta(seconds=registrada.tempo_maximo)
+        )
+    ]
+    if not forcar:
+        condicoes.append(TarefaAgendada.proxima_execucao <= agora)
+    obtida = db.session.execute(
+        update(TarefaAgendada)
+        .where(*condicoes)
+        .values(em_execucao_desde=agora, executado_por=IDENTIDADE)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if not obtida and db.session.get(TarefaAgendada, registrada.nome) is None:
+        # Processo sem agendador ativo ainda não criou o estado da tarefa
+        garantir_linhas()
+        return _adquirir(registrada, agora, forcar)
+    return obtida == 1
+
+def _rodar(registrada, inicio):
+    erro = None
+    cronometro = time.perf_counter()
+    try:
+        registrada.funcao()
+    except Exception as e:
+        db.session.rollback()
+        erro = f'{type(e).__name__}: {e}'
+        print(f"❌ Tarefa {registrada.nome} falhou: {erro}")
+    duracao_ms = int((time.perf_counter() - cronometro) * 1000)
+
+    db.session.execute(
+        update(TarefaAgendada)
+        .where(TarefaAgendada.nome == registrada.nome)
+        .values(
+            ultima_execucao=inicio,
+            ultimo_status='erro' if erro else 'sucesso',
+            ultimo_erro=erro,
+            duracao_ms=duracao_ms,
+            proxima_execucao=registrada.agenda.proxima(_agora()),
+            em_execucao_desde=None
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return erro is None
+
+def executar(nome, forcar=False):
+    """Executa a tarefa neste processo se obtiver a trava.
+
+    Sem ``forcar`` só executa se estiver vencida. Retorna None quando não
+    executou, senão True/False conforme o sucesso.
+    """
+    registrada = TAREFAS[nome]
+    inicio = _agora()
+    if not _adquirir(registrada, inicio, forcar):
+        return None
+    return _rodar(registrada, inicio)
+
+def disparar(app, nome):
+    """Obtém a trava e executa a tarefa em segundo plano. False se já estiver em execução."""
+    registrada = TAREFAS[nome]
+    inicio = _agora()
+    if not _adquirir(registrada, inicio, forcar=True):
+        return False
+
+    def rodar():
+        with app.app_context():
+            try:
+                _rodar(registrada, inicio)
+            finally:
+                db.session.remove()
+
+    threading.Thread(target=rodar, daemon=True, name=f'tarefa-{nome}').start()
+    return True
+
+def executar_pendentes():
+    agora = _agora()
+    # Só leitura (sem o lock de escrita do SQLite): quem decide é o UPDATE condicional de _adquirir
+    with somente_leitura(db.session):
+        vencidas = [
+            nome for (nome,) in db.session.query(TarefaAgendada.nome).filter(
+                TarefaAgendada.nome.in_(TAREFAS),
+                TarefaAgendada.proxima_execucao <= agora
+            )
+        ]
+        db.session.rollback()
+    for nome in vencidas:
+        executar(nome)
+
+
+_iniciado = False
+_lock_inicio = threading.Lock()
+
+def iniciar_agendador(app):
+    """Inicia a thread do agendador neste processo (uma vez; AGENDADOR_ATIVO=false desliga)."""
+    global _iniciado
+    if os.environ.get('AGENDADOR_ATIVO', 'true').lower() == 'false':
+        return False
+    with _lock_inicio:
+        if _iniciado:
+            return False
+        _iniciado = True
+
+    with app.app_context():
+        try:
+            garantir_linhas()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Erro ao registrar tarefas: {e}")
+        finally:
+            db.session.remove()
+
+    def laco():
+        while True:
+            time.sleep(INTERVALO)
+            with app.app_context():
+                try:
+                    executar_pendentes()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"❌ Erro no agendador: {e}")
+                finally:
+                    db.session.remove()
+
+    threading.Thread(target=laco, daemon=True, name='agendador').start()
+    return True
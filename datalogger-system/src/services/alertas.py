@@ -0,0 +1,151 @@
+from datetime import date, timedelta
+from sqlalchemy import and_, delete, false, or_, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.user import db
+from src.models.alerta import Alerta, PRIORIDADE_TIPO, PRIORIDADES
+from src.models.alocacao import Alocacao
+from src.models.datalogger import Datalogger
+
+DIAS_AVISO_CALIBRACAO = 30
+TIPOS_CALIBRACAO = ('calibracao_vencida', 'calibracao_proxima')
+CAMPOS_ORIGEM = ('datalogger_id', 'alocacao_id', 'demanda_id', 'numero_serie')
+# Mudam sem trocar a identidade do alerta (vencimento adiado, próxima que venceu)
+CAMPOS_ATUALIZADOS = CAMPOS_ORIGEM + ('tipo', 'prioridade', 'nivel', 'data_referencia')
+
+
+# Alertas materializados: um por datalogger com vencimento de calibração e um
+# por alocação em campo, inclusive os que ainda não valem (vencimento fora do
+# aviso, retorno no prazo). A leitura filtra pela data (condicao_visiveis) e
+# deriva o tipo (Alerta.tipo_em), então a passagem dos dias não depende de
+# reescrever a tabela. As rotas que alteram dataloggers ou alocações sincronizam
+# só os registros afetados, na mesma transação; a tarefa virada_alertas faz a
+# sincronização completa diária, que só repara divergências.
+
+def chave_alerta(tipo, origem_id):
+    """Identidade do alerta: um por datalogger (calibração) ou por alocação (atraso)."""
+    base = 'calibracao' if tipo in TIPOS_CALIBRACAO else tipo
+    return f'{base}:{origem_id}'
+
+def _alerta(tipo, prioridade, origem_id, data_referencia, **campos):
+    return dict(
+        chave=chave_alerta(tipo, origem_id),
+        tipo=tipo,
+        prioridade=prioridade,
+        nivel=PRIORIDADES[prioridade],
+        data_referencia=data_referencia,
+        **campos
+    )
+
+def _calibracoes(hoje, condicao):
+    for datalogger_id, numero_serie, vencimento in db.session.query(
+        Datalogger.id, Datalogger.numero_serie, Datalogger.proxima_calibracao
+    ).filter(
+        Datalogger.proxima_calibracao.isnot(None),
+        condicao
+    ):
+        tipo = 'calibracao_vencida' if vencimento <= hoje else 'calibracao_proxima'
+        yield _alerta(
+            tipo, PRIORIDADE_TIPO[tipo], datalogger_id, vencimento,
+            datalogger_id=datalogger_id, alocacao_id=None, demanda_id=None, numero_serie=numero_serie
+        )
+
+def _retornos(condicao):
+    for alocacao_id, datalogger_id, demanda_id, numero_serie, prevista in db.session.query(
+        Alocacao.id, Alocacao.datalogger_id, Alocacao.demanda_id, Datalogger.numero_serie, Alocacao.data_retorno_prevista
+    ).outerjoin(
+        Datalogger, Datalogger.id == Alocacao.datalogger_id
+    ).filter(
+        Alocacao.status == 'Em campo',
+        Alocacao.data_retorno_prevista.isnot(None),
+        condicao
+    ):
+        yield _alerta(
+            'retorno_atrasado', 'alta', alocacao_id, prevista,
+            datalogger_id=datalogger_id, alocacao_id=alocacao_id, demanda_id=demanda_id, numero_serie=numero_serie
+        )
+
+def condicao_visiveis(hoje):
+    """Alertas que valem na data: calibração dentro do aviso e retorno previsto já passado."""
+    return or_(
+        and_(Alerta.tipo.in_(TIPOS_CALIBRACAO), Alerta.data_referencia <= hoje + timedelta(days=DIAS_AVISO_CALIBRACAO)),
+        and_(Alerta.tipo == 'retorno_atrasado', Alerta.data_referencia < hoje)
+    )
+
+def condicao_tipo(tipo, hoje):
+    """Filtro pelo tipo na data (o mesmo de Alerta.tipo_em), não pelo gravado."""
+    if tipo == 'calibracao_vencida':
+        return and_(Alerta.tipo.in_(TIPOS_CALIBRACAO), Alerta.data_referencia <= hoje)
+    if tipo == 'calibracao_proxima':
+        return and_(Alerta.tipo.in_(TIPOS_CALIBRACAO), Alerta.data_referencia > hoje)
+    return Alerta.tipo == tipo
+
+def condicao_prioridade(prioridade, hoje):
+    # Entre os visíveis, alta é o que já venceu ou atrasou (data de referência até hoje)
+    if prioridade == 'alta':
+        return Alerta.data_referencia <= hoje
+    if prioridade == 'media':
+        return Alerta.data_referencia > hoje
+    return false()
+
+def _inserir_novos(dialeto):
+    # Duas transações podem criar o mesmo alerta ao mesmo tempo: a chave única decide
+    comando = (postgresql.insert if dialeto == 'postgresql' else sqlite.insert)(Alerta.__table__)
+    return comando.on_conflict_do_nothing(index_elements=['chave'])
+
+def sincronizar_alertas(dataloggers=(), alocacoes=(), completo=False, hoje=None):
+    """Recalcula os alertas dos dataloggers/alocações informados (ou todos).
+
+    Cria os que passaram a valer, remove os que deixaram de valer e atualiza
+    os demais no lugar (tipo, prioridade, data de referência e dados de
+    origem); reconhecimento e adiamento são mantidos enquanto o alerta
+    existir. Não faz commit.
+    """
+    hoje = hoje or date.today()
+    dataloggers = list(dataloggers)
+    alocacoes = list(alocacoes)
+
+    desejados = []
+    escopos = []
+    if completo:
+        desejados += _calibracoes(hoje, true())
+        desejados += _retornos(true())
+        escopos.append(true())
+    else:
+        if dataloggers:
+            desejados += _calibracoes(hoje, Datalogger.id.in_(dataloggers))
+            escopos.append(and_(Alerta.tipo.in_(TIPOS_CALIBRACAO), Alerta.datalogger_id.in_(dataloggers)))
+        if dataloggers or alocacoes:
+            # O número de série do datalogger também aparece nos alertas de atraso
+            desejados += _retornos(or_(
+                Alocacao.id.in_(alocacoes), Alocacao.datalogger_id.in_(dataloggers)
+            ))
+            escopos.append(and_(Alerta.tipo == 'retorno_atrasado', or_(
+                Alerta.alocacao_id.in_(alocacoes), Alerta.datalogger_id.in_(dataloggers)
+            )))
+    if not escopos:
+        return
+
+    desejados = {alerta['chave']: alerta for alerta in desejados}
+    existentes = {
+        linha.chave: linha
+        for linha in db.session.execute(
+            select(Alerta.id, Alerta.chave, *[Alerta.__table__.c[campo] for campo in CAMPOS_ATUALIZADOS])
+            .where(or_(*escopos))
+        )
+    }
+
+    novos = [alerta for chave, alerta in desejados.items() if chave not in existentes]
+    removidos = [linha.id for chave, linha in existentes.items() if chave not in desejados]
+    alterados = [
+        dict({campo: desejados[chave][campo] for campo in CAMPOS_ATUALIZADOS}, id=linha.id)
+        for chave, linha in existentes.items()
+        if chave in desejados and any(getattr(linha, campo) != desejados[chave][campo] for campo in CAMPOS_ATUALIZADOS)
+    ]
+
+    if novos:
+        db.session.execute(_inserir_novos(db.session.get_bind().dialect.name), novos)
+    if removidos:
+        db.session.execute(delete(Alerta).where(Alerta.id.in_(removidos)).execution_options(synchronize_session=False))
+    if alterados:
+        db.session.execute(update(Alerta), alterados)
+
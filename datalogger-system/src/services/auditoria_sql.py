@@ -0,0 +1,158 @@
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ContextDecorator
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Modo de desenvolvimento/teste: SQL_AUDITORIA=true registra as consultas de
+# cada requisição, avisa sobre formatos repetidos (o sinal de N+1) e sobre
+# consultas lentas, e devolve o total no cabeçalho X-SQL-Consultas.
+ATIVA = os.environ.get('SQL_AUDITORIA', 'false').lower() in ('1', 'true', 'yes', 'sim')
+LIMITE_REPETICOES = int(os.environ.get('SQL_REPETICOES_LIMITE', 5))
+LENTA_MS = float(os.environ.get('SQL_LENTA_MS', 200))
+
+_PARAMETRO = re.compile(r'%\(\w+\)s|%s|\?')
+_LISTA = re.compile(r'\?(?:\s*,\s*\?)+')
+_ESPACOS = re.compile(r'\s+')
+
+_local = threading.local()
+
+
+class OrcamentoExcedido(AssertionError):
+    pass
+
+
+def formato(comando):
+    """Consulta sem os parâmetros: listas do IN de tamanhos diferentes têm o mesmo formato."""
+    comando = _PARAMETRO.sub('?', comando)
+    comando = _LISTA.sub('?...', comando)
+    return _ESPACOS.sub(' ', comando).strip()
+
+
+class Coleta:
+    """Consultas executadas na thread enquanto a coleta está ativa."""
+
+    def __init__(self):
+        self.consultas = []  # (comando, parametros, duracao em segundos)
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def tempo_ms(self):
+        return sum(duracao for _, _, duracao in self.consultas) * 1000
+
+    def repetidas(self, limite=LIMITE_REPETICOES):
+        contagem = Counter(formato(comando) for comando, _, _ in self.consultas)
+        return [(texto, vezes) for texto, vezes in contagem.most_common() if vezes > limite]
+
+    def relatorio(self, limite=LIMITE_REPETICOES):
+        linhas = [f'{self.total} consultas, {self.tempo_ms:.1f} ms em SQL']
+        for texto, vezes in self.repetidas(limite):
+            linhas.append(f'  {vezes}x {texto[:300]}')
+        return '\n'.join(linhas)
+
+
+def _coletas():
+    if not hasattr(_local, 'coletas'):
+        _local.coletas = []
+    return _local.coletas
+
+def _origem():
+    if has_request_context():
+        return f'{request.method} {request.path}'
+    return threading.current_thread().name
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    if _coletas() or ATIVA:
+        conexao.info.setdefault('auditoria_inicio', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    inicios = conexao.info.get('auditoria_inicio')
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    for coleta in _coletas():
+        coleta.consultas.append((comando, parametros, duracao))
+    if ATIVA and duracao * 1000 >= LENTA_MS:
+        print(f"🐢 Consulta lenta ({duracao * 1000:.0f} ms) em {_origem()}: {_ESPACOS.sub(' ', comando)[:500]} "
+              f"parâmetros={str(parametros)[:500]}")
+
+@event.listens_for(Engine, 'handle_error')
+def _erro_consulta(contexto):
+    conexao = contexto.connection
+    if conexao is not None and conexao.info.get('auditoria_inicio'):
+        conexao.info['auditoria_inicio'].pop()
+
+
+class orcamento_consultas(ContextDecorator):
+    """Falha com OrcamentoExcedido se o bloco passar de ``maximo`` consultas
+    ou repetir um mesmo formato de consulta mais de ``repeticoes`` vezes.
+
+        with orcamento_consultas(3):
+            cliente.get('/api/alocacoes')
+
+    Conta as consultas desta thread (o test client do Flask atende na mesma).
+    ``repeticoes=None`` desliga a detecção de N+1.
+    """
+
+    def __init__(self, maximo=None, repeticoes=LIMITE_REPETICOES, descricao=None):
+        self.maximo = maximo
+        self.repeticoes = repeticoes
+        self.descricao = descricao
+        self.coleta = None
+
+    def __enter__(self):
+        self.coleta = Coleta()
+        _coletas().append(self.coleta)
+        return self.coleta
+
+    def __exit__(self, tipo, valor, rastro):
+        _coletas().remove(self.coleta)
+        if tipo is None:
+            self.verificar()
+        return False
+
+    def verificar(self):
+        problemas = []
+        if self.maximo is not None and self.coleta.total > self.maximo:
+            problemas.append(f'{self.coleta.total} consultas (orçamento: {self.maximo})')
+        if self.repeticoes is not None and self.coleta.repetidas(self.repeticoes):
+            problemas.append(f'consulta repetida mais de {self.repeticoes} vezes (N+1)')
+        if problemas:
+            titulo = f'{self.descricao}: ' if self.descricao else ''
+            limite = self.repeticoes if self.repeticoes is not None else LIMITE_REPETICOES
+            raise OrcamentoExcedido(f"{titulo}{'; '.join(problemas)}\n{self.coleta.relatorio(limite)}")
+
+
+def registrar_auditoria_sql(app):
+    """Com SQL_AUDITORIA=true, audita as consultas de cada requisição."""
+    if not ATIVA:
+        return
+
+    @app.before_request
+    def iniciar_coleta():
+        g.auditoria_sql = Coleta()
+        _coletas().append(g.auditoria_sql)
+
+    @app.after_request
+    def avaliar_coleta(resposta):
+        coleta = g.get('auditoria_sql')
+        if coleta is not None:
+            resposta.headers['X-SQL-Consultas'] = str(coleta.total)
+            if coleta.repetidas():
+                print(f"⚠️ Possível N+1 em {_origem()}: {coleta.relatorio()}")
+        return resposta
+
+    @app.teardown_request
+    def encerrar_coleta(erro=None):
+        coleta = g.pop('auditoria_sql', None)
+        if coleta is not None and coleta in _coletas():
+            _coletas().remove(coleta)
@@ -0,0 +1,385 @@
+import itertools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+
+BIND_LEITURA = 'leitura'
+PREFIXO_REPLICA = 'replica_'
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+COOKIE_PRINCIPAL = 'ler_principal'
+
+
+def _env_int(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+def _env_bool(nome, padrao):
+    return os.environ.get(nome, str(padrao)).lower() in ('1', 'true', 'yes', 'sim')
+
+def normalizar_url(database_url):
+    # Railway/Heroku usam o esquema antigo postgres://
+    if database_url.startswith('postgres://'):
+        return database_url.replace('postgres://', 'postgresql://', 1)
+    return database_url
+
+def opcoes_engine(database_url):
+    """Opções do engine SQLAlchemy lidas do ambiente (pool e timeouts)."""
+    if database_url.startswith('sqlite'):
+        if not perfil_sqlite(database_url):
+            return {}
+        return {'connect_args': {'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+
+    opcoes = {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+    timeout_ms = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
+    if timeout_ms and database_url.startswith('postgresql'):
+        opcoes['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+    return opcoes
+
+def aquecer_pool(engine, quantidade=None):
+    """Abre (e devolve ao pool) conexões antes do primeiro request do worker."""
+    if quantidade is None:
+        quantidade = engine.pool.size() if hasattr(engine.pool, 'size') else 1
+    conexoes = []
+    try:
+        for _ in range(quantidade):
+            conexoes.append(engine.connect())
+    finally:
+        for conexao in conexoes:
+            conexao.close()
+    return len(conexoes)
+
+
+# Perfil SQLite (instalações de um nó só, sem DATABASE_URL): WAL para leitores
+# não esperarem escritores, transações de escrita com BEGIN IMMEDIATE (a espera
+# pelo lock respeita o busy_timeout em vez de falhar com "database is locked")
+# e um pool só de leitura, usado por SessaoRoteada, para as consultas das
+# requisições GET. Transações de leitura usam BEGIN simples e não pegam o lock.
+
+_ESCRITA = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|ALTER|DROP)\b', re.IGNORECASE)
+
+def perfil_sqlite(database_url):
+    """Arquivo SQLite com o perfil ativo (SQLITE_PERFIL=false volta ao padrão do driver)."""
+    if not database_url.startswith('sqlite') or not _env_bool('SQLITE_PERFIL', True):
+        return False
+    caminho = make_url(database_url).database
+    return bool(caminho) and caminho != ':memory:' and not caminho.startswith('file:')
+
+def binds_leitura(database_url):
+    """SQLALCHEMY_BINDS com o engine somente leitura sobre o mesmo arquivo."""
+    if not perfil_sqlite(database_url) or not _env_bool('SQLITE_POOL_LEITURA', True):
+        return {}
+    return {BIND_LEITURA: {
+        'url': url_somente_leitura(database_url),
+        'pool_size': _env_int('SQLITE_POOL_LEITURA_TAMANHO', 10),
+        'max_overflow': _env_int('SQLITE_POOL_LEITURA_EXTRA', 10),
+        'connect_args': {'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000},
+    }}
+
+def url_somente_leitura(database_url):
+    """O mesmo arquivo SQLite aberto em modo somente leitura (falha se não existir)."""
+    caminho = os.path.abspath(make_url(database_url).database)
+    return f'sqlite:///file:{caminho}?mode=ro&uri=true'
+
+def _pragmas(cursor, somente_leitura):
+    if somente_leitura:
+        cursor.execute('PRAGMA query_only = ON')
+    else:
+        cursor.execute('PRAGMA journal_mode = WAL')
+        cursor.execute('PRAGMA synchronous = NORMAL')
+    cursor.execute(f"PRAGMA busy_timeout = {_env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+    cursor.execute(f"PRAGMA mmap_size = {_env_int('SQLITE_MMAP_MB', 256) * 1024 * 1024}")
+    # Valor negativo: tamanho em KiB, não em páginas
+    cursor.execute(f"PRAGMA cache_size = -{_env_int('SQLITE_CACHE_MB', 64) * 1024}")
+    cursor.execute('PRAGMA temp_store = MEMORY')
+
+def configurar_sqlite(engine, somente_leitura=False):
+    @event.listens_for(engine, 'connect')
+    def ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            _pragmas(cursor, somente_leitura)
+        finally:
+            cursor.close()
+        if not somente_leitura:
+            # O driver não abre transações sozinho: quem abre é o primeiro comando (abaixo)
+            conexao_dbapi.isolation_level = None
+
+    if not somente_leitura:
+        @event.listens_for(engine, 'begin')
+        def ao_iniciar(conexao):
+            if conexao.get_execution_options().get('isolation_level') != 'AUTOCOMMIT':
+                conexao.info['begin_pendente'] = True
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def antes_comando(conexao, cursor, comando, parametros, contexto, executemany):
+            if not conexao.info.pop('begin_pendente', False):
+                return
+            # BEGIN IMMEDIATE se a transação vai escrever (SessaoRoteada avisa em
+            # conexao.info['escrita'] quando ela lê antes de escrever); senão BEGIN simples.
+            # Direto no driver: BEGIN não entra na contagem de consultas das métricas
+            escrita = conexao.info.pop('escrita', False) or _ESCRITA.match(comando)
+            conexao.connection.driver_connection.execute('BEGIN IMMEDIATE' if escrita else 'BEGIN')
+
+        @event.listens_for(engine, 'commit')
+        @event.listens_for(engine, 'rollback')
+        def ao_encerrar(conexao):
+            # Transação sem nenhum comando: nada foi aberto no driver
+            conexao.info.pop('begin_pendente', None)
+            conexao.info.pop('escrita', None)
+
+def configurar_engines(engines):
+    """Aplica o perfil SQLite aos engines do app (sem abrir conexões)."""
+    for chave, engine in engines.items():
+        somente_leitura = chave == BIND_LEITURA or eh_replica(chave)
+        if perfil_sqlite(str(engine.url)) or chave == BIND_LEITURA:
+            configurar_sqlite(engine, somente_leitura=somente_leitura)
+        if eh_replica(chave):
+            monitorar_replica(chave, engine)
+
+def manutencao_sqlite(engine):
+    """PRAGMA optimize e checkpoint do WAL; devolve o resultado do checkpoint ou None fora do perfil."""
+    if not perfil_sqlite(str(engine.url)):
+        return None
+    # Conexão crua: o checkpoint não pode rodar dentro da transação aberta pelo evento begin
+    conexao = engine.raw_connection()
+    try:
+        cursor = conexao.cursor()
+        cursor.execute('PRAGMA optimize')
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        ocupado, paginas_log, paginas_copiadas = cursor.fetchone()
+        cursor.close()
+    finally:
+        conexao.close()
+    return {'ocupado': bool(ocupado), 'paginas_log': paginas_log, 'paginas_copiadas': paginas_copiadas}
+
+
+# Réplicas de leitura (DATABASE_REPLICA_URLS): as leituras das requisições
+# GET/HEAD vão a uma réplica saudável, em rodízio. Escritas, tarefas em segundo
+# plano e o cliente que acabou de escrever (cookie ler_principal, por
+# REPLICA_FIXACAO_S segundos) ficam no principal. A saúde de cada réplica é
+# verificada a cada REPLICA_VERIFICACAO_S por uma das requisições que a usariam;
+# uma falha de conexão a tira do rodízio até a próxima verificação.
+
+class EstadoReplica:
+    def __init__(self, chave):
+        self.chave = chave
+        self.saudavel = True
+        self.erro = None
+        self.atraso_s = None
+        self.verificar_em = 0.0  # time.monotonic(); 0 = verificar na primeira escolha
+        self.lock = threading.Lock()
+
+_replicas = {}  # engine -> EstadoReplica
+_rodizio = itertools.count()
+
+def urls_replicas():
+    """DATABASE_REPLICA_URLS (separadas por vírgula) ou DATABASE_REPLICA_URL."""
+    valor = os.environ.get('DATABASE_REPLICA_URLS') or os.environ.get('DATABASE_REPLICA_URL', '')
+    return [normalizar_url(url.strip()) for url in valor.split(',') if url.strip()]
+
+def eh_replica(chave):
+    return isinstance(chave, str) and chave.startswith(PREFIXO_REPLICA)
+
+def binds_replicas(urls):
+    """SQLALCHEMY_BINDS das réplicas (replica_0, replica_1, ...)."""
+    binds = {}
+    for indice, url in enumerate(urls):
+        opcoes = opcoes_engine(url)
+        if url.startswith('postgresql'):
+            connect_args = opcoes.setdefault('connect_args', {})
+            # Uma escrita que escape para a réplica falha em vez de divergir do principal
+            connect_args['options'] = f"{connect_args.get('options', '')} -c default_transaction_read_only=on".strip()
+            connect_args['connect_timeout'] = _env_int('REPLICA_TIMEOUT_CONEXAO_S', 2)
+        elif perfil_sqlite(url):
+            # Réplica local para testes: um arquivo ausente é falha de conexão, não um banco vazio novo
+            url = url_somente_leitura(url)
+        binds[f'{PREFIXO_REPLICA}{indice}'] = {'url': url, **opcoes}
+    return binds
+
+def monitorar_replica(chave, engine):
+    _replicas[engine] = EstadoReplica(chave)
+
+    @event.listens_for(engine, 'handle_error')
+    def ao_falhar(contexto):
+        # Sem conexão (falha ao conectar) ou conexão perdida: fora do rodízio
+        if contexto.is_disconnect or contexto.connection is None:
+            marcar_indisponivel(engine, contexto.original_exception)
+
+def marcar_indisponivel(engine, erro):
+    estado = _replicas.get(engine)
+    if estado is None:
+        return
+    if estado.saudavel:
+        print(f"⚠️ Réplica {estado.chave} indisponível: {erro}")
+    estado.saudavel = False
+    estado.erro = str(erro)[:200]
+    estado.verificar_em = time.monotonic() + _env_int('REPLICA_VERIFICACAO_S', 15)
+
+def verificar_replica(engine):
+    """Ping na réplica; no PostgreSQL também mede o atraso de replicação
+    (limite opcional em REPLICA_ATRASO_MAXIMO_S)."""
+    estado = _replicas[engine]
+    try:
+        with engine.connect() as conexao:
+            if engine.dialect.name == 'postgresql':
+                atraso = conexao.execute(text(
+                    'SELECT CASE WHEN NOT pg_is_in_recovery() THEN NULL '
+                    'WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+                    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+                )).scalar()
+            else:
+                atraso = conexao.execute(text('SELECT NULL')).scalar()
+        maximo = _env_int('REPLICA_ATRASO_MAXIMO_S', 0)
+        if maximo and atraso is not None and atraso > maximo:
+            raise RuntimeError(f'atraso de replicação de {atraso:.0f}s (máximo {maximo}s)')
+    except Exception as e:
+        marcar_indisponivel(engine, e)
+        return False
+    if not estado.saudavel:
+        print(f"✅ Réplica {estado.chave} de volta ao rodízio")
+    estado.saudavel = True
+    estado.erro = None
+    estado.atraso_s = float(atraso) if atraso is not None else None
+    estado.verificar_em = time.monotonic() + _env_int('REPLICA_VERIFICACAO_S', 15)
+    return True
+
+def escolher_replica(engines):
+    """Próxima réplica saudável em rodízio, ou None se não houver."""
+    agora = time.monotonic()
+    saudaveis = []
+    for chave in sorted(chave for chave in engines if eh_replica(chave)):
+        engine = engines[chave]
+        estado = _replicas.get(engine)
+        if estado is None:
+            continue
+        # Uma thread verifica; as outras seguem com o último estado conhecido
+        if agora >= estado.verificar_em and estado.lock.acquire(blocking=False):
+            try:
+                verificar_replica(engine)
+            finally:
+                estado.lock.release()
+        if estado.saudavel:
+            saudaveis.append(engine)
+    if not saudaveis:
+        return None
+    return saudaveis[next(_rodizio) % len(saudaveis)]
+
+def aquecer_replicas(engines):
+    """Verifica e aquece as réplicas; uma réplica fora do ar não impede o worker de ficar pronto."""
+    total = 0
+    for chave, engine in engines.items():
+        if eh_replica(chave) and engine in _replicas and verificar_replica(engine):
+            try:
+                total += aquecer_pool(engine)
+            except Exception as e:
+                marcar_indisponivel(engine, e)
+    return total
+
+def estado_replicas(engines):
+    estados = {}
+    for chave, engine in engines.items():
+        estado = _replicas.get(engine)
+        if eh_replica(chave) and estado is not None:
+            estados[chave] = {'saudavel': estado.saudavel, 'atraso_s': estado.atraso_s, 'erro': estado.erro}
+    return estados
+
+def fixado_no_principal():
+    """O cliente escreveu há menos de REPLICA_FIXACAO_S segundos (read-your-writes)."""
+    if not has_request_context():
+        return False
+    try:
+        return float(request.cookies.get(COOKIE_PRINCIPAL, 0)) > time.time()
+    except ValueError:
+        return False
+
+def registrar_replicas(app):
+    """Depois de uma escrita bem-sucedida, fixa as leituras do cliente no principal."""
+    if not any(eh_replica(chave) for chave in app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    @app.after_request
+    def fixar_no_principal(resposta):
+        if request.method not in METODOS_LEITURA and resposta.status_code < 400:
+            segundos = _env_int('REPLICA_FIXACAO_S', 5)
+            resposta.set_cookie(COOKIE_PRINCIPAL, f'{time.time() + segundos:.3f}', max_age=segundos,
+                                httponly=True, samesite='Lax')
+        return resposta
+
+@contextmanager
+def somente_leitura(sessao):
+    """Trabalho em segundo plano que só lê: consultas no pool de leitura, sem o lock de escrita."""
+    anterior = sessao.info.get('somente_leitura')
+    sessao.info['somente_leitura'] = True
+    try:
+        yield sessao
+    finally:
+        sessao.info['somente_leitura'] = anterior
+
+
+class SessaoRoteada(Session):
+    """Envia as consultas de leitura a uma réplica ou ao engine ``leitura``, quando configurados.
+
+    Vão ao engine principal: escritas (DML e flush), tudo o que a sessão fizer
+    depois de escrever na transação corrente, e qualquer comando em requisições
+    que não sejam GET/HEAD, que leem e escrevem sobre o mesmo estado. Tarefas em
+    segundo plano também leem e depois escrevem: ficam no principal, exceto
+    dentro de ``somente_leitura``. Réplicas só atendem requisições e cada
+    requisição fica na mesma réplica do começo ao fim.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._pode_ler(clause):
+            leitura = self._engine_leitura()
+            if leitura is not None:
+                return leitura
+        self.info['usou_principal'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _pode_ler(self, clause):
+        if clause is None or getattr(clause, 'is_dml', False) or self._flushing:
+            return False
+        if self.info.get('usou_principal'):
+            return False
+        return _contexto_de_leitura(self)
+
+    def replica_atual(self):
+        """Réplica que atende as leituras desta requisição, ou None (principal ou pool local,
+        que enxergam os mesmos dados). Caches de resultados devem separar as duas origens."""
+        if not has_request_context() or request.method not in METODOS_LEITURA or fixado_no_principal():
+            return None
+        if 'replica' not in g:
+            g.replica = escolher_replica(self._db.engines)
+        return g.replica
+
+    def _engine_leitura(self):
+        replica = self.replica_atual()
+        if replica is not None:
+            return replica
+        return self._db.engines.get(BIND_LEITURA)
+
+def _contexto_de_leitura(session):
+    if has_request_context():
+        return request.method in METODOS_LEITURA
+    return bool(session.info.get('somente_leitura'))
+
+@event.listens_for(SessaoRoteada, 'after_begin')
+def _inicio_transacao(session, transacao, conexao):
+    # Quem lê para depois escrever abre a transação já com o lock de escrita (perfil SQLite)
+    if not _contexto_de_leitura(session):
+        conexao.info['escrita'] = True
+
+@event.listens_for(SessaoRoteada, 'after_transaction_end')
+def _fim_transacao(session, transacao):
+    if transacao.parent is None:
+        session.info.pop('usou_principal', None)
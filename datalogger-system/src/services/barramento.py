@@ -0,0 +1,132 @@
+import json
+import os
+import queue
+import socket
+import threading
+import uuid
+
+TAMANHO_MAXIMO = 65536
+
+
+class Barramento:
+    """Publicação/assinatura entre os workers do mesmo host (substituto local de um Redis pub/sub).
+
+    Cada processo com assinantes abre um socket Unix de datagrama em
+    ``diretorio``; ``publicar`` envia a mensagem a todos os sockets presentes.
+    Sem assinantes não há socket nem thread, e publicar só lista o diretório.
+    Onde não há sockets Unix, a entrega fica restrita ao próprio processo.
+    """
+
+    def __init__(self, diretorio, ao_receber):
+        self.diretorio = diretorio
+        self.ao_receber = ao_receber
+        self.usa_socket = hasattr(socket, 'AF_UNIX')
+        self._assinantes = 0
+        self._lock = threading.Lock()
+        self._socket = None
+        self._caminho = None
+        self._local = None
+
+    def publicar(self, mensagem):
+        dados = json.dumps(mensagem, separators=(',', ':')).encode()
+        if not self.usa_socket:
+            if self._local is not None:
+                self._local.put(dados)
+            return
+        try:
+            nomes = os.listdir(self.diretorio)
+        except FileNotFoundError:
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as envio:
+            envio.setblocking(False)
+            for nome in nomes:
+                if not nome.endswith('.sock'):
+                    continue
+                caminho = os.path.join(self.diretorio, nome)
+                try:
+                    envio.sendto(dados, caminho)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Socket de um processo que terminou sem limpar
+                    try:
+                        os.unlink(caminho)
+                    except OSError:
+                        pass
+                except OSError:
+                    # Fila do receptor cheia: a mensagem é descartada
+                    pass
+
+    def entrar(self):
+        with self._lock:
+            self._assinantes += 1
+            if self._assinantes == 1:
+                self._abrir()
+
+    def sair(self):
+        with self._lock:
+            self._assinantes -= 1
+            if self._assinantes == 0:
+                self._fechar()
+
+    def _abrir(self):
+        if self.usa_socket:
+            os.makedirs(self.diretorio, exist_ok=True)
+            self._caminho = os.path.join(self.diretorio, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.bind(self._caminho)
+            fonte = self._socket
+        else:
+            self._local = fonte = queue.Queue()
+        threading.Thread(target=self._escutar, args=(fonte,), daemon=True).start()
+
+    def _fechar(self):
+        # Datagrama vazio acorda a thread de escuta, que fecha o socket e termina
+        if self._socket is not None:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as envio:
+                envio.sendto(b'', self._caminho)
+            try:
+                os.unlink(self._caminho)
+            except OSError:
+                pass
+            self._socket = None
+        elif self._local is not None:
+            self._local.put(b'')
+            self._local = None
+
+    def _receber(self, fonte, bloquear):
+        if isinstance(fonte, queue.Queue):
+            try:
+                return fonte.get(block=bloquear)
+            except queue.Empty:
+                return None
+        fonte.setblocking(bloquear)
+        try:
+            return fonte.recv(TAMANHO_MAXIMO)
+        except BlockingIOError:
+            return None
+
+    def _escutar(self, fonte):
+        try:
+            while True:
+                dados = self._receber(fonte, True)
+                if not dados:
+                    return
+                # Junta o que já chegou para entregar uma rajada de commits de uma vez
+                lote = [dados]
+                while len(lote) < 100:
+                    dados = self._receber(fonte, False)
+                    if dados is None:
+                        break
+                    if not dados:
+                        self._entregar(lote)
+                        return
+                    lote.append(dados)
+                self._entregar(lote)
+        finally:
+            if not isinstance(fonte, queue.Queue):
+                fonte.close()
+
+    def _entregar(self, lote):
+        try:
+            self.ao_receber([json.loads(dados) for dados in lote])
+        except Exception as e:
+            print(f"❌ Erro ao distribuir eventos: {e}")
@@ -0,0 +1,53 @@
+import os
+import threading
+import time
+
+
+class SnapshotCache:
+    """Cache em memória de resultados calculados (snapshots) por chave.
+
+    Cada snapshot declara as tabelas de que depende; o commit de uma transação
+    que altera alguma delas chama ``invalidar(<tabela>, ...)`` (ver
+    ``services/versoes.py``) e os snapshots afetados são descartados. A
+    invalidação só alcança o processo que fez a escrita (e os que têm
+    assinantes de ``/api/eventos``): quem não pode servir dado defasado por
+    até ``ttl`` segundos põe na chave as versões das tabelas
+    (``versoes_lidas``).
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dados = {}
+
+    def obter(self, chave, calcular, depende_de=()):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._dados.get(chave)
+            if item and item['expira_em'] > agora:
+                return item['valor']
+
+        valor = calcular()
+
+        with self._lock:
+            # Chaves com versões antigas não voltam a ser lidas: descarta as expiradas
+            for expirada in [c for c, item in self._dados.items() if item['expira_em'] <= agora]:
+                del self._dados[expirada]
+            self._dados[chave] = {
+                'valor': valor,
+                'tabelas': frozenset(depende_de),
+                'expira_em': agora + self.ttl
+            }
+        return valor
+
+    def invalidar(self, *tabelas):
+        with self._lock:
+            if not tabelas:
+                self._dados.clear()
+                return
+            afetadas = set(tabelas)
+            for chave in [c for c, item in self._dados.items() if item['tabelas'] & afetadas]:
+                del self._dados[chave]
+
+
+snapshots = SnapshotCache(ttl=float(os.environ.get('SNAPSHOT_CACHE_TTL', 15)))
@@ -0,0 +1,43 @@
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip é oferecido
+    brotli = None
+
+CODIFICACOES = ('br', 'gzip') if brotli else ('gzip',)
+
+# Respostas JSON menores que isso não compensam o custo de comprimir
+TAMANHO_MINIMO = int(os.environ.get('COMPRESSAO_TAMANHO_MINIMO', 1024))
+
+
+def escolher_codificacao(disponiveis=CODIFICACOES):
+    return request.accept_encodings.best_match(disponiveis)
+
+def comprimir(dados, codificacao, maxima=False):
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=11 if maxima else 5)
+    return gzip.compress(dados, compresslevel=9 if maxima else 6)
+
+def registrar_compressao_json(app):
+    @app.after_request
+    def comprimir_json(resposta):
+        if (resposta.mimetype != 'application/json'
+                or resposta.status_code != 200
+                or resposta.direct_passthrough
+                or resposta.is_streamed
+                or 'Content-Encoding' in resposta.headers):
+            return resposta
+
+        dados = resposta.get_data()
+        resposta.vary.add('Accept-Encoding')
+        if len(dados) < TAMANHO_MINIMO:
+            return resposta
+
+        codificacao = escolher_codificacao()
+        if codificacao:
+            resposta.set_data(comprimir(dados, codificacao))
+            resposta.headers['Content-Encoding'] = codificacao
+        return resposta
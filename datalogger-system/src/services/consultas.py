@@ -0,0 +1,47 @@
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload
+from src.models.alocacao import Alocacao
+from src.models.datalogger import Datalogger
+from src.models.demanda import Demanda
+
+
+# Consultas base para as listagens: carregam junto (JOIN) os relacionamentos
+# lidos pelos to_dict(), evitando uma consulta extra por linha (N+1).
+
+def consulta_alocacoes():
+    return Alocacao.query.options(
+        joinedload(Alocacao.datalogger),
+        joinedload(Alocacao.demanda).joinedload(Demanda.cliente)
+    )
+
+def consulta_demandas():
+    return Demanda.query.options(joinedload(Demanda.cliente))
+
+
+# Filtros das listagens, compartilhados com as rotas de exportação
+
+def filtrar_dataloggers(query, args):
+    if args.get('status'):
+        query = query.filter(Datalogger.status == args['status'])
+    return query
+
+def filtrar_demandas(query, args):
+    if args.get('status'):
+        query = query.filter(Demanda.status == args['status'])
+    if args.get('cliente_id'):
+        query = query.filter(Demanda.cliente_id == args['cliente_id'])
+    return query
+
+def filtrar_alocacoes(query, args):
+    if args.get('status'):
+        query = query.filter(Alocacao.status == args['status'])
+    if args.get('demanda_id'):
+        query = query.filter(Alocacao.demanda_id == args['demanda_id'])
+    if args.get('datalogger_id'):
+        query = query.filter(Alocacao.datalogger_id == args['datalogger_id'])
+    return query
+
+
+def contar_se(condicao):
+    # Agregação condicional portátil (PostgreSQL e SQLite): COUNT(*) FILTER (WHERE ...)
+    return func.coalesce(func.sum(case((condicao, 1), else_=0)), 0)
@@ -0,0 +1,101 @@
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+from flask import Response, request, send_from_directory
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.compressao import CODIFICACOES, comprimir, escolher_codificacao
+
+EXTENSOES_COMPRIMIVEIS = ('.js', '.css', '.html', '.svg', '.json', '.map', '.txt')
+SUFIXOS = {'br': '.br', 'gzip': '.gz'}
+
+# Arquivos de assets/ têm hash no nome (build do Vite): podem ficar em cache para sempre
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_INDEX = 'no-cache'
+
+
+class ArquivosEstaticos:
+    """Serve o frontend buildado a partir de um índice montado na inicialização.
+
+    Evita ``os.path.exists`` por requisição, entrega variantes gzip/brotli
+    (pré-geradas em disco ou comprimidas uma vez e mantidas em memória)
+    conforme o ``Accept-Encoding`` e define o ``Cache-Control`` por tipo.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.arquivos = set()
+        if pasta and os.path.isdir(pasta):
+            for raiz, _, nomes in os.walk(pasta):
+                for nome in nomes:
+                    caminho = os.path.relpath(os.path.join(raiz, nome), pasta)
+                    self.arquivos.add(caminho.replace(os.sep, '/'))
+        self._comprimidos = {}
+        self._lock = threading.Lock()
+
+    def _variante(self, caminho, codificacao):
+        chave = (caminho, codificacao)
+        variante = self._comprimidos.get(chave)
+        if variante is None:
+            pre_gerado = caminho + SUFIXOS[codificacao]
+            if pre_gerado in self.arquivos:
+                with open(os.path.join(self.pasta, pre_gerado), 'rb') as arquivo:
+                    dados = arquivo.read()
+            else:
+                with open(os.path.join(self.pasta, caminho), 'rb') as arquivo:
+                    dados = comprimir(arquivo.read(), codificacao)
+            variante = (dados, hashlib.sha1(dados).hexdigest())
+            with self._lock:
+                self._comprimidos[chave] = variante
+        return variante
+
+    def responder(self, caminho):
+        if caminho not in self.arquivos:
+            caminho = 'index.html'
+            if caminho not in self.arquivos:
+                return "index.html not found", 404
+
+        codificacao = None
+        if caminho.endswith(EXTENSOES_COMPRIMIVEIS):
+            codificacao = escolher_codificacao()
+
+        if codificacao:
+            dados, etag = self._variante(caminho, codificacao)
+            resposta = Response(dados, mimetype=mimetypes.guess_type(caminho)[0] or 'application/octet-stream')
+            resposta.headers['Content-Encoding'] = codificacao
+            resposta.set_etag(f'{etag}-{codificacao}')
+            resposta.make_conditional(request)
+        else:
+            resposta = send_from_directory(self.pasta, caminho)
+
+        resposta.vary.add('Accept-Encoding')
+        resposta.headers['Cache-Control'] = CACHE_IMUTAVEL if caminho.startswith('assets/') else CACHE_INDEX
+        return resposta
+
+
+def pre_comprimir(pasta):
+    """Gera os arquivos .gz/.br ao lado dos assets (etapa de build)."""
+    gerados = []
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            if not nome.endswith(EXTENSOES_COMPRIMIVEIS):
+                continue
+            origem = os.path.join(raiz, nome)
+            with open(origem, 'rb') as arquivo:
+                dados = arquivo.read()
+            for codificacao in CODIFICACOES:
+                destino = origem + SUFIXOS[codificacao]
+                with open(destino, 'wb') as arquivo:
+                    arquivo.write(comprimir(dados, codificacao, maxima=True))
+                gerados.append(destino)
+    return gerados
+
+
+if __name__ == '__main__':
+    pasta_static = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+    for destino in pre_comprimir(pasta_static):
+        print(f"✅ {os.path.relpath(destino, pasta_static)} ({os.path.getsize(destino)} bytes)")
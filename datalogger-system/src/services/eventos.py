@@ -0,0 +1,146 @@
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.services.banco import somente_leitura
+from src.services.barramento import Barramento
+from src.services.cache import snapshots
+from src.services.resumo import resumo_estoque
+from src.services.versoes import OUVINTES_COMMIT
+
+ENTIDADES = {'dataloggers': 'datalogger', 'demandas': 'demanda', 'alocacoes': 'alocacao'}
+CHAVE_EVENTOS = 'eventos_pendentes'
+# Acima disso a notificação leva só o total e os clientes recarregam as listas
+LIMITE_ALTERACOES = 100
+TAMANHO_FILA = 100
+# Por processo; no worker gevent (gunicorn_eventos.conf.py) cada conexão é uma greenlet
+MAXIMO_CONEXOES = int(os.environ.get('EVENTOS_MAX_CONEXOES', 1000))
+
+
+class LimiteConexoes(Exception):
+    pass
+
+
+# Coleta das alterações da transação: objetos do ORM pelo flush e escritas em
+# lote via registrar_alteracoes(); a publicação acontece depois do commit
+# (chamada por services/versoes.py) e o rollback descarta tudo.
+
+def _anotar(session, entidade, id, status, acao):
+    session.info.setdefault(CHAVE_EVENTOS, []).append(
+        {'entidade': entidade, 'id': id, 'status': status, 'acao': acao}
+    )
+
+@event.listens_for(Session, 'after_flush')
+def _apos_flush(session, contexto):
+    for acao, objetos in (('criado', session.new), ('alterado', session.dirty), ('excluido', session.deleted)):
+        for obj in objetos:
+            entidade = ENTIDADES.get(getattr(obj, '__tablename__', None))
+            if entidade and (acao != 'alterado' or session.is_modified(obj)):
+                _anotar(session, entidade, obj.id, getattr(obj, 'status', None), acao)
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop(CHAVE_EVENTOS, None)
+
+def registrar_alteracoes(entidade, itens, acao='alterado'):
+    """Anota alterações feitas por UPDATE/INSERT em lote: ``itens`` são pares (id, status)."""
+    for id, status in itens:
+        _anotar(db.session, entidade, id, status, acao)
+
+def publicar_commit(session, tabelas):
+    alteracoes = session.info.pop(CHAVE_EVENTOS, [])
+    if not has_app_context():
+        return
+    try:
+        central_eventos().publicar({
+            'origem': os.getpid(),
+            'tabelas': sorted(tabelas),
+            'alteracoes': alteracoes[:LIMITE_ALTERACOES],
+            'total_alteracoes': len(alteracoes)
+        })
+    except Exception as e:
+        # O commit já foi feito: falha na notificação não vira erro da requisição
+        print(f"❌ Erro ao publicar eventos: {e}")
+
+OUVINTES_COMMIT.append(publicar_commit)
+
+
+class CentralEventos:
+    """Assinantes do stream de eventos deste processo.
+
+    Recebe as notificações do barramento, calcula os contadores do resumo uma
+    vez por rajada (não por cliente) e entrega a cada fila de assinante.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._filas = set()
+        self._lock = threading.Lock()
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        diretorio = os.environ.get('EVENTOS_DIRETORIO') or os.path.join(
+            tempfile.gettempdir(), 'dataloggers-eventos-' + hashlib.sha1(uri.encode()).hexdigest()[:10]
+        )
+        self.barramento = Barramento(diretorio, self._distribuir)
+
+    def assinar(self):
+        with self._lock:
+            if len(self._filas) >= MAXIMO_CONEXOES:
+                raise LimiteConexoes('Limite de conexões de eventos atingido')
+            fila = queue.Queue(maxsize=TAMANHO_FILA)
+            self._filas.add(fila)
+        self.barramento.entrar()
+        return fila
+
+    def cancelar(self, fila):
+        with self._lock:
+            self._filas.discard(fila)
+        self.barramento.sair()
+
+    def publicar(self, mensagem):
+        self.barramento.publicar(mensagem)
+
+    def _distribuir(self, mensagens):
+        tabelas = set()
+        alteracoes = []
+        total = 0
+        for mensagem in mensagens:
+            # Escritas de outros workers também invalidam os snapshots deste processo
+            if mensagem['origem'] != os.getpid() and mensagem['tabelas']:
+                snapshots.invalidar(*mensagem['tabelas'])
+            tabelas.update(mensagem['tabelas'])
+            alteracoes += mensagem['alteracoes']
+            total += mensagem['total_alteracoes']
+
+        with self.app.app_context():
+            try:
+                with somente_leitura(db.session):
+                    resumo = resumo_estoque()
+            finally:
+                db.session.remove()
+
+        evento = {
+            'tabelas': sorted(tabelas),
+            'alteracoes': alteracoes[-LIMITE_ALTERACOES:],
+            'total_alteracoes': total,
+            'resumo': resumo
+        }
+        with self._lock:
+            filas = list(self._filas)
+        for fila in filas:
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                pass  # cliente lento: perde notificações intermediárias
+
+
+def central_eventos():
+    app = current_app._get_current_object()
+    central = app.extensions.get('eventos')
+    if central is None:
+        central = app.extensions.setdefault('eventos', CentralEventos(app))
+    return central
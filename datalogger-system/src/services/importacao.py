@@ -0,0 +1,119 @@
+import csv
+import io
+from datetime import datetime, date
+from sqlalchemy import insert
+from src.models.user import db
+from src.models.datalogger import Datalogger
+from src.services.alertas import sincronizar_alertas
+from src.services.eventos import registrar_alteracoes
+
+TAMANHO_LOTE = 1000
+STATUS_VALIDOS = ('Estoque', 'Alocado', 'Calibração', 'Manutenção')
+CAMPOS_DATA = ('data_aquisicao', 'ultima_calibracao', 'proxima_calibracao')
+
+
+def ler_planilha(arquivo, nome_arquivo):
+    """Gera (número da linha, dict) a partir de um CSV ou XLSX com cabeçalho."""
+    if nome_arquivo.lower().endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError('Importação de XLSX requer o pacote openpyxl')
+        planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+        linhas = planilha.iter_rows(values_only=True)
+        cabecalho = [str(c or '').strip().lower() for c in next(linhas, [])]
+        for numero, valores in enumerate(linhas, start=2):
+            if any(v not in (None, '') for v in valores):
+                yield numero, dict(zip(cabecalho, valores))
+    else:
+        texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+        leitor = csv.DictReader(texto)
+        leitor.fieldnames = [c.strip().lower() for c in leitor.fieldnames or []]
+        for numero, linha in enumerate(leitor, start=2):
+            yield numero, linha
+
+def _data(valor):
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor).strip(), '%Y-%m-%d').date()
+
+def _validar(linha):
+    numero_serie = str(linha.get('numero_serie') or '').strip()
+    modelo = str(linha.get('modelo') or '').strip()
+    if not numero_serie:
+        raise ValueError('numero_serie obrigatório')
+    if not modelo:
+        raise ValueError('modelo obrigatório')
+    status = str(linha.get('status') or '').strip() or 'Estoque'
+    if status not in STATUS_VALIDOS:
+        raise ValueError(f'Status inválido: {status}')
+    registro = {
+        'numero_serie': numero_serie,
+        'modelo': modelo,
+        'status': status,
+        'observacoes': linha.get('observacoes') or None
+    }
+    for campo in CAMPOS_DATA:
+        try:
+            registro[campo] = _data(linha.get(campo))
+        except ValueError:
+            raise ValueError(f'{campo} inválida (use AAAA-MM-DD)')
+    return registro
+
+def _importar_lote(lote, vistos, erros):
+    # Uma consulta por lote para detectar números de série já cadastrados
+    series = [registro['numero_serie'] for _, registro in lote]
+    existentes = {s for (s,) in db.session.query(Datalogger.numero_serie).filter(Datalogger.numero_serie.in_(series))}
+
+    novos = []
+    for numero, registro in lote:
+        if registro['numero_serie'] in existentes:
+            erros.append({'linha': numero, 'numero_serie': registro['numero_serie'], 'erro': 'Número de série já existe'})
+        elif registro['numero_serie'] in vistos:
+            erros.append({'linha': numero, 'numero_serie': registro['numero_serie'], 'erro': 'Número de série repetido no arquivo'})
+        else:
+            vistos.add(registro['numero_serie'])
+            novos.append(registro)
+
+    if novos:
+        inseridos = db.session.execute(insert(Datalogger).returning(Datalogger.id, Datalogger.status), novos).all()
+        sincronizar_alertas(dataloggers=[datalogger_id for datalogger_id, _ in inseridos])
+        registrar_alteracoes('datalogger', inseridos, acao='criado')
+    return len(novos)
+
+def importar_dataloggers(linhas, tamanho_lote=TAMANHO_LOTE):
+    """Importa dataloggers em lotes (executemany por lote, uma única transação).
+
+    ``linhas`` é um iterável de (número da linha, dict). Retorna o relatório
+    com o total processado, o total importado e os erros por linha. Se algum
+    lote falhar no banco, nada é importado (rollback de tudo).
+    """
+    total = 0
+    importados = 0
+    erros = []
+    vistos = set()
+    lote = []
+
+    try:
+        for numero, linha in linhas:
+            total += 1
+            try:
+                lote.append((numero, _validar(linha)))
+            except ValueError as e:
+                erros.append({'linha': numero, 'numero_serie': linha.get('numero_serie'), 'erro': str(e)})
+            if len(lote) >= tamanho_lote:
+                importados += _importar_lote(lote, vistos, erros)
+                lote = []
+        if lote:
+            importados += _importar_lote(lote, vistos, erros)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    erros.sort(key=lambda erro: erro['linha'])
+    return {'total': total, 'importados': importados, 'erros': erros}
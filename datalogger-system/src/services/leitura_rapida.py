@@ -0,0 +1,101 @@
+import json
+from datetime import date
+from flask import Response
+from src.models.user import db
+from src.models.alocacao import Alocacao
+from src.models.cliente import Cliente
+from src.models.datalogger import Datalogger
+from src.models.demanda import Demanda
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da biblioteca padrão
+    orjson = None
+
+
+# Leitura sem ORM para as listagens: seleciona só as colunas usadas, como
+# tuplas rotuladas com as mesmas chaves dos to_dict() dos modelos, e os nomes
+# relacionados via JOIN. Cada linha vira dict com ``linha._asdict()``.
+
+def leitura_dataloggers():
+    return db.session.query(
+        Datalogger.id,
+        Datalogger.numero_serie,
+        Datalogger.modelo,
+        Datalogger.status,
+        Datalogger.data_aquisicao,
+        Datalogger.ultima_calibracao,
+        Datalogger.proxima_calibracao,
+        Datalogger.observacoes,
+        Datalogger.created_at,
+        Datalogger.updated_at
+    )
+
+def leitura_clientes():
+    return db.session.query(
+        Cliente.id,
+        Cliente.nome,
+        Cliente.contato,
+        Cliente.telefone,
+        Cliente.email,
+        Cliente.endereco,
+        Cliente.created_at,
+        Cliente.updated_at
+    )
+
+def leitura_demandas():
+    return db.session.query(
+        Demanda.id,
+        Demanda.cliente_id,
+        Cliente.nome.label('cliente_nome'),
+        Demanda.descricao,
+        Demanda.data_inicio,
+        Demanda.data_fim_prevista,
+        Demanda.data_fim_real,
+        Demanda.quantidade_prevista,
+        Demanda.status,
+        Demanda.observacoes,
+        Demanda.created_at,
+        Demanda.updated_at
+    ).select_from(Demanda).outerjoin(Cliente, Cliente.id == Demanda.cliente_id)
+
+def leitura_alocacoes():
+    return db.session.query(
+        Alocacao.id,
+        Alocacao.datalogger_id,
+        Datalogger.numero_serie.label('datalogger_numero_serie'),
+        Alocacao.demanda_id,
+        Demanda.descricao.label('demanda_descricao'),
+        Cliente.nome.label('cliente_nome'),
+        Alocacao.data_saida,
+        Alocacao.data_retorno_prevista,
+        Alocacao.data_retorno_real,
+        Alocacao.status,
+        Alocacao.observacoes,
+        Alocacao.created_at,
+        Alocacao.updated_at
+    ).select_from(Alocacao).outerjoin(
+        Datalogger, Datalogger.id == Alocacao.datalogger_id
+    ).outerjoin(
+        Demanda, Demanda.id == Alocacao.demanda_id
+    ).outerjoin(
+        Cliente, Cliente.id == Demanda.cliente_id
+    )
+
+def linha_para_dict(linha):
+    return linha._asdict()
+
+
+def _padrao_json(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(valor).__name__}')
+
+def codificar_json(dados):
+    """JSON compacto com chaves ordenadas (mesma forma do jsonify) e datas em ISO 8601."""
+    if orjson:
+        return orjson.dumps(dados, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(dados, sort_keys=True, separators=(',', ':'), default=_padrao_json).encode()
+
+def resposta_json(dados, status=200):
+    return Response(codificar_json(dados), status=status, mimetype='application/json')
@@ -0,0 +1,168 @@
+import os
+import time
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from src.models.user import db
+
+# Com gunicorn cada worker grava as métricas em PROMETHEUS_MULTIPROC_DIR
+# (definido em gunicorn.conf.py) e /metrics soma os arquivos de todos eles.
+MULTIPROCESSO = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+BUCKETS_TAMANHO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+BUCKETS_ESPERA = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+DURACAO = Histogram(
+    'http_request_duration_seconds', 'Duração das requisições',
+    ['endpoint', 'method', 'status']
+)
+TAMANHO_RESPOSTA = Histogram(
+    'http_response_size_bytes', 'Tamanho do corpo das respostas (após compressão)',
+    ['endpoint', 'method'], buckets=BUCKETS_TAMANHO
+)
+CONSULTAS_REQUISICAO = Histogram(
+    'http_request_sql_queries', 'Consultas SQL executadas por requisição',
+    ['endpoint', 'method'], buckets=BUCKETS_CONSULTAS
+)
+TEMPO_SQL_REQUISICAO = Histogram(
+    'http_request_sql_seconds', 'Tempo total em SQL por requisição',
+    ['endpoint', 'method']
+)
+CONSULTAS = Counter(
+    'sql_queries', 'Consultas SQL executadas (contexto: requisicao ou segundo_plano)',
+    ['contexto']
+)
+TEMPO_SQL = Counter(
+    'sql_query_seconds', 'Tempo acumulado em SQL', ['contexto']
+)
+ESPERA_POOL = Histogram(
+    'db_pool_checkout_wait_seconds', 'Espera para obter uma conexão do pool',
+    buckets=BUCKETS_ESPERA
+)
+CONEXOES_EM_USO = Gauge(
+    'db_pool_checked_out', 'Conexões retiradas do pool', multiprocess_mode='livesum'
+)
+
+ROTA_DESCONHECIDA = 'desconhecido'
+ROTAS_IGNORADAS = ('/metrics',)
+
+
+# Contagem de SQL: os eventos do engine somam no ``g`` da requisição corrente;
+# fora de requisições (agendador, eventos, CLI) só os contadores globais.
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    conexao.info.setdefault('metricas_inicio', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_consulta(conexao, cursor, comando, parametros, contexto, executemany):
+    inicios = conexao.info.get('metricas_inicio')
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    if has_request_context() and 'metricas_inicio' in g:
+        g.metricas_consultas += 1
+        g.metricas_tempo_sql += duracao
+        origem = 'requisicao'
+    else:
+        origem = 'segundo_plano'
+    CONSULTAS.labels(origem).inc()
+    TEMPO_SQL.labels(origem).inc(duracao)
+
+@event.listens_for(Engine, 'handle_error')
+def _erro_consulta(contexto):
+    # Consulta que falhou não chega ao after_cursor_execute
+    conexao = contexto.connection
+    if conexao is not None and conexao.info.get('metricas_inicio'):
+        conexao.info['metricas_inicio'].pop()
+
+@event.listens_for(Pool, 'checkout')
+def _retirada(conexao_dbapi, registro, proxy):
+    CONEXOES_EM_USO.inc()
+
+@event.listens_for(Pool, 'checkin')
+def _devolucao(conexao_dbapi, registro):
+    CONEXOES_EM_USO.dec()
+
+def _instrumentar_pool(pool):
+    # O pool não tem evento "antes de retirar": mede a espera envolvendo
+    # connect() desta instância (dispose() cria um pool novo, instrumentado
+    # de novo na próxima requisição)
+    if getattr(pool, '_metricas', False):
+        return
+    conectar = pool.connect
+
+    def connect():
+        inicio = time.perf_counter()
+        try:
+            return conectar()
+        finally:
+            ESPERA_POOL.observe(time.perf_counter() - inicio)
+
+    pool.connect = connect
+    pool._metricas = True
+
+
+def _endpoint():
+    # O padrão da rota (não o caminho) mantém a cardinalidade das séries baixa
+    return request.url_rule.rule if request.url_rule is not None else ROTA_DESCONHECIDA
+
+def _tamanho(resposta):
+    if resposta.is_streamed or resposta.direct_passthrough:
+        return resposta.content_length
+    return resposta.calculate_content_length()
+
+def registrar_metricas(app):
+    """Registra a coleta por requisição e o endpoint ``/metrics``.
+
+    Deve ser chamado antes dos demais ``after_request`` (como a compressão),
+    que o Flask executa em ordem inversa: assim o tamanho medido é o enviado.
+    """
+    @app.before_request
+    def iniciar_medicao():
+        if request.path in ROTAS_IGNORADAS:
+            return
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_consultas = 0
+        g.metricas_tempo_sql = 0.0
+        for engine in db.engines.values():
+            _instrumentar_pool(engine.pool)
+
+    @app.after_request
+    def registrar_medicao(resposta):
+        inicio = g.pop('metricas_inicio', None)
+        if inicio is None:
+            return resposta
+        endpoint = _endpoint()
+        metodo = request.method
+        # Em streams (SSE, exportações) mede até o início do envio do corpo
+        DURACAO.labels(endpoint, metodo, str(resposta.status_code)).observe(time.perf_counter() - inicio)
+        CONSULTAS_REQUISICAO.labels(endpoint, metodo).observe(g.metricas_consultas)
+        TEMPO_SQL_REQUISICAO.labels(endpoint, metodo).observe(g.metricas_tempo_sql)
+        tamanho = _tamanho(resposta)
+        if tamanho is not None:
+            TAMANHO_RESPOSTA.labels(endpoint, metodo).observe(tamanho)
+        return resposta
+
+    @app.route('/metrics')
+    def metricas():
+        if MULTIPROCESSO:
+            registro = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registro)
+        else:
+            registro = REGISTRY
+        return Response(generate_latest(registro), content_type=CONTENT_TYPE_LATEST)
+
+
+def verificar_banco():
+    """Ping barato no banco principal; devolve a latência em milissegundos."""
+    inicio = time.perf_counter()
+    with db.engine.connect() as conexao:
+        conexao.execute(text('SELECT 1'))
+    return round((time.perf_counter() - inicio) * 1000, 2)
@@ -0,0 +1,80 @@
+import importlib
+import os
+import re
+from datetime import datetime
+from sqlalchemy import text
+
+PASTA_MIGRACOES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+PADRAO_ARQUIVO = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+# Chave arbitrária do advisory lock do PostgreSQL: só um worker migra por vez
+CHAVE_LOCK = 7301946
+
+
+def listar_migracoes():
+    migracoes = []
+    for arquivo in sorted(os.listdir(PASTA_MIGRACOES)):
+        encontrado = PADRAO_ARQUIVO.match(arquivo)
+        if encontrado:
+            versao, nome = encontrado.groups()
+            migracoes.append((versao, nome, f'src.migrations.{versao}_{nome}'))
+    return migracoes
+
+def aplicar_migracoes(engine):
+    """Aplica, em ordem, as migrações de ``src/migrations`` ainda não registradas.
+
+    Cada arquivo ``NNNN_nome.py`` define ``upgrade(conexao)``; a migração e o
+    registro em ``schema_migrations`` rodam na mesma transação.
+    """
+    postgres = engine.dialect.name == 'postgresql'
+    aplicadas = []
+
+    with engine.connect() as conexao:
+        if postgres:
+            conexao.execute(text('SELECT pg_advisory_lock(:chave)'), {'chave': CHAVE_LOCK})
+        try:
+            conexao.execute(text(
+                'CREATE TABLE IF NOT EXISTS schema_migrations ('
+                'versao VARCHAR(4) PRIMARY KEY, nome VARCHAR(200) NOT NULL, aplicada_em TIMESTAMP NOT NULL)'
+            ))
+            conexao.commit()
+            ja_aplicadas = {v for (v,) in conexao.execute(text('SELECT versao FROM schema_migrations'))}
+            conexao.rollback()
+
+            for versao, nome, modulo in listar_migracoes():
+                if versao in ja_aplicadas:
+                    continue
+                with conexao.begin():
+                    importlib.import_module(modulo).upgrade(conexao)
+                    conexao.execute(
+                        text('INSERT INTO schema_migrations (versao, nome, aplicada_em) VALUES (:v, :n, :t)'),
+                        {'v': versao, 'n': nome, 't': datetime.utcnow()}
+                    )
+                aplicadas.append(f'{versao}_{nome}')
+        finally:
+            if postgres:
+                conexao.execute(text('SELECT pg_advisory_unlock(:chave)'), {'chave': CHAVE_LOCK})
+                conexao.commit()
+
+    return aplicadas
+
+def preparar_banco(app):
+    """Cria as tabelas e aplica as migrações pendentes (passo único do deploy, não a cada worker)."""
+    from src.models.user import db
+
+    with app.app_context():
+        uri = app.config['SQLALCHEMY_DATABASE_URI']
+        if uri.startswith('sqlite:///'):
+            os.makedirs(os.path.dirname(os.path.abspath(uri[len('sqlite:///'):])), exist_ok=True)
+        # Schema só no principal: o pool de leitura e as réplicas não recebem DDL
+        db.create_all(bind_key=None)
+        return aplicar_migracoes(db.engine)
+
+def migracoes_pendentes(engine):
+    with engine.connect() as conexao:
+        try:
+            ja_aplicadas = {v for (v,) in conexao.execute(text('SELECT versao FROM schema_migrations'))}
+        except Exception:
+            conexao.rollback()
+            ja_aplicadas = set()
+    return [f'{versao}_{nome}' for versao, nome, _ in listar_migracoes() if versao not in ja_aplicadas]
@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import delete, func, insert, select, text, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.user import db
+from src.models.alocacao import Alocacao
+from src.models.datalogger import Datalogger
+from src.models.demanda import Demanda
+from src.models.ocupacao_diaria import OcupacaoDiaria
+
+TAMANHO_LOTE = 1000
+UM_DIA = timedelta(days=1)
+
+
+# A tabela ocupacao_diaria guarda só as alocações encerradas (data_retorno_real
+# definida), cujo intervalo é fechado. As alocações em aberto crescem um dia a
+# cada dia e são somadas na leitura a partir de uma contagem agrupada por data
+# de saída; assim criar uma alocação não escreve na tabela e não há virada de dia.
+
+def _consulta_intervalos(condicao):
+    return (
+        select(Alocacao.data_saida, Alocacao.data_retorno_real, Demanda.cliente_id, Datalogger.modelo)
+        .join(Demanda, Demanda.id == Alocacao.demanda_id)
+        .join(Datalogger, Datalogger.id == Alocacao.datalogger_id)
+        .where(Alocacao.data_retorno_real.isnot(None), condicao)
+    )
+
+def encerrar_alocacoes(condicao, agora):
+    """Marca como retornadas as alocações da condição que ainda não foram; devolve {id: datalogger_id}.
+
+    UPDATE condicionado ao status, como na alocação: só uma requisição encerra
+    cada alocação, então a variação de ocupacao_diaria é registrada uma vez.
+    Intervalos, alertas e eventos devem ser calculados só sobre os ids devolvidos.
+    """
+    return dict(db.session.execute(
+        update(Alocacao)
+        .where(condicao, Alocacao.status != 'Retornado')
+        .values(status='Retornado', updated_at=agora)
+        .returning(Alocacao.id, Alocacao.datalogger_id)
+        .execution_options(synchronize_session=False)
+    ).all())
+
+def intervalos(condicao):
+    """Intervalos fechados (saída, retorno real, cliente, modelo) das alocações que atendem à condição."""
+    return db.session.execute(_consulta_intervalos(condicao)).all()
+
+def _variacoes_por_dia(removidos, adicionados):
+    # Diferenças por chave: +1 na saída e -1 no dia seguinte ao retorno;
+    # acumuladas entre eventos consecutivos viram a variação de cada dia
+    eventos = defaultdict(lambda: defaultdict(int))
+    for sinal, lista in ((-1, removidos), (1, adicionados)):
+        for inicio, fim, cliente_id, modelo in lista:
+            if fim < inicio:
+                continue
+            eventos[(cliente_id, modelo)][inicio] += sinal
+            eventos[(cliente_id, modelo)][fim + UM_DIA] -= sinal
+
+    for (cliente_id, modelo), por_data in eventos.items():
+        datas = sorted(por_data)
+        acumulado = 0
+        for atual, proxima in zip(datas, datas[1:]):
+            acumulado += por_data[atual]
+            if not acumulado:
+                continue
+            dia = atual
+            while dia < proxima:
+                yield {'data': dia, 'cliente_id': cliente_id, 'modelo': modelo, 'alocados': acumulado}
+                dia += UM_DIA
+
+def _somar_alocados(dialeto):
+    comando = (postgresql.insert if dialeto == 'postgresql' else sqlite.insert)(OcupacaoDiaria.__table__)
+    return comando.on_conflict_do_update(
+        index_elements=['data', 'cliente_id', 'modelo'],
+        set_={'alocados': OcupacaoDiaria.__table__.c.alocados + comando.excluded.alocados}
+    )
+
+def registrar_variacao(removidos, adicionados):
+    """Aplica na tabela a troca de intervalos de alocações, na transação da sessão.
+
+    Uso: ``antes = intervalos(cond)``, altera e faz flush, depois
+    ``registrar_variacao(antes, intervalos(cond))``.
+    """
+    linhas = list(_variacoes_por_dia(removidos, adicionados))
+    if linhas:
+        db.session.execute(_somar_alocados(db.session.get_bind().dialect.name), linhas)
+    return len(linhas)
+
+def reconstruir(conexao):
+    """Recalcula a tabela inteira a partir das alocações encerradas (carga do histórico).
+
+    ``conexao`` é uma Connection ou a sessão; o resultado vale no commit dela.
+    """
+    dialeto = conexao.dialect.name if hasattr(conexao, 'dialect') else conexao.get_bind().dialect.name
+    if dialeto == 'postgresql':
+        # Serializa com registrar_variacao: o lock espera as transações que já somaram
+        # variações (a contagem abaixo as enxerga) e segura as próximas até o commit,
+        # quando a variação delas se soma à tabela recalculada sem elas. Leituras seguem.
+        # No SQLite a transação de escrita (BEGIN IMMEDIATE) já é exclusiva.
+        conexao.execute(text('LOCK TABLE ocupacao_diaria IN EXCLUSIVE MODE'))
+    conexao.execute(delete(OcupacaoDiaria.__table__))
+    linhas = list(_variacoes_por_dia([], conexao.execute(_consulta_intervalos(true())).all()))
+    for i in range(0, len(linhas), TAMANHO_LOTE):
+        conexao.execute(insert(OcupacaoDiaria.__table__), linhas[i:i + TAMANHO_LOTE])
+    return len(linhas)
+
+
+def serie_alocados(data_inicio, data_fim, cliente_id=None, modelo=None):
+    """Dataloggers alocados em cada dia de [data_inicio, data_fim]."""
+    total_dias = (data_fim - data_inicio).days + 1
+    serie = [0] * total_dias
+
+    encerradas = db.session.query(
+        OcupacaoDiaria.data,
+        func.sum(OcupacaoDiaria.alocados)
+    ).filter(OcupacaoDiaria.data >= data_inicio, OcupacaoDiaria.data <= data_fim)
+    if cliente_id is not None:
+        encerradas = encerradas.filter(OcupacaoDiaria.cliente_id == cliente_id)
+    if modelo:
+        encerradas = encerradas.filter(OcupacaoDiaria.modelo == modelo)
+    for dia, alocados in encerradas.group_by(OcupacaoDiaria.data).all():
+        serie[(dia - data_inicio).days] += int(alocados)
+
+    em_aberto = db.session.query(
+        Alocacao.data_saida,
+        func.count(Alocacao.id)
+    ).filter(Alocacao.data_retorno_real.is_(None), Alocacao.data_saida <= data_fim)
+    if cliente_id is not None:
+        em_aberto = em_aberto.join(Demanda, Demanda.id == Alocacao.demanda_id).filter(Demanda.cliente_id == cliente_id)
+    if modelo:
+        em_aberto = em_aberto.join(Datalogger, Datalogger.id == Alocacao.datalogger_id).filter(Datalogger.modelo == modelo)
+
+    saidas = [0] * total_dias
+    for data_saida, quantidade in em_aberto.group_by(Alocacao.data_saida).all():
+        saidas[max((data_saida - data_inicio).days, 0)] += quantidade
+    acumulado = 0
+    for i in range(total_dias):
+        acumulado += saidas[i]
+        serie[i] += acumulado
+    return serie
@@ -0,0 +1,100 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import request
+from sqlalchemy import and_, or_
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 1000
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def _codificar_cursor(valor, id):
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    bruto = json.dumps([valor, id]).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+def _decodificar_cursor(cursor, coluna):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valor, id = json.loads(bruto)
+        if valor is not None:
+            tipo = coluna.type.python_type
+            if tipo is datetime:
+                valor = datetime.fromisoformat(valor)
+            elif tipo is date:
+                valor = date.fromisoformat(valor)
+            else:
+                valor = tipo(valor)
+        return valor, int(id)
+    except Exception:
+        raise ParametroInvalido('Cursor inválido')
+
+def _condicao_apos(coluna, chave, valor, id, decrescente):
+    # Registros posteriores a (valor, id) na ordem (coluna, id), nulos por último
+    id_depois = chave < id if decrescente else chave > id
+    if valor is None:
+        return and_(coluna.is_(None), id_depois)
+    depois = coluna < valor if decrescente else coluna > valor
+    condicao = or_(depois, and_(coluna == valor, id_depois))
+    if coluna.nullable:
+        condicao = or_(condicao, coluna.is_(None))
+    return condicao
+
+def paginar(query, modelo, ordenacoes, serializar=None, padrao='id'):
+    """Aplica ordenação e paginação por chave (keyset) à consulta.
+
+    Parâmetros da requisição: ``sort`` (campo, prefixado com ``-`` para ordem
+    decrescente), ``limit`` e ``cursor``. Sem ``limit``/``cursor`` a resposta
+    continua sendo a lista completa; com eles, retorna ``items`` e
+    ``next_cursor``. ``serializar`` converte cada registro em dict (padrão:
+    ``to_dict()`` do modelo); ``padrao`` é a ordenação quando ``sort`` não é informado.
+    """
+    if serializar is None:
+        serializar = lambda obj: obj.to_dict()
+    sort = request.args.get('sort', padrao)
+    decrescente = sort.startswith('-')
+    campo = sort.lstrip('-')
+    if campo not in ordenacoes:
+        raise ParametroInvalido(f'Ordenação inválida: {campo}')
+
+    coluna = modelo.__table__.c[campo]
+    chave = modelo.__table__.c.id
+    ordem = [coluna.desc(), chave.desc()] if decrescente else [coluna.asc(), chave.asc()]
+    if coluna.nullable:
+        ordem.insert(0, coluna.is_(None))
+    if campo == 'id':
+        ordem = ordem[-1:]
+
+    cursor = request.args.get('cursor')
+    limite = request.args.get('limit')
+    if cursor is None and limite is None:
+        return [serializar(obj) for obj in query.order_by(*ordem).all()]
+
+    try:
+        limite = min(max(int(limite or LIMITE_PADRAO), 1), LIMITE_MAXIMO)
+    except ValueError:
+        raise ParametroInvalido('Limite inválido')
+
+    if cursor:
+        valor, id = _decodificar_cursor(cursor, coluna)
+        if campo == 'id':
+            query = query.filter(chave < id if decrescente else chave > id)
+        else:
+            query = query.filter(_condicao_apos(coluna, chave, valor, id, decrescente))
+
+    registros = query.order_by(*ordem).limit(limite + 1).all()
+    proximo = None
+    if len(registros) > limite:
+        registros = registros[:limite]
+        ultimo = registros[-1]
+        proximo = _codificar_cursor(getattr(ultimo, campo), ultimo.id)
+
+    return {
+        'items': [serializar(obj) for obj in registros],
+        'next_cursor': proximo
+    }
@@ -0,0 +1,145 @@
+from datetime import timedelta
+from sqlalchemy import and_, func
+from src.models.user import db
+from src.models.alocacao import Alocacao
+from src.models.datalogger import Datalogger
+from src.models.demanda import Demanda
+from src.services.consultas import contar_se
+from src.services.leitura_rapida import leitura_alocacoes, leitura_dataloggers, leitura_demandas, linha_para_dict
+
+
+def _retornos_por_dia(inicio, fim):
+    return dict(
+        db.session.query(Alocacao.data_retorno_prevista, func.count(Alocacao.id))
+        .filter(
+            Alocacao.status == 'Em campo',
+            Alocacao.data_retorno_prevista >= inicio,
+            Alocacao.data_retorno_prevista <= fim
+        )
+        .group_by(Alocacao.data_retorno_prevista)
+        .all()
+    )
+
+def _calibracoes_por_dia(inicio, fim):
+    # Dataloggers em estoque saem para calibração no vencimento; os já
+    # vencidos contam como saída no primeiro dia da projeção
+    saidas = {}
+    for dia, quantidade in (
+        db.session.query(Datalogger.proxima_calibracao, func.count(Datalogger.id))
+        .filter(
+            Datalogger.status == 'Estoque',
+            Datalogger.proxima_calibracao.isnot(None),
+            Datalogger.proxima_calibracao <= fim
+        )
+        .group_by(Datalogger.proxima_calibracao)
+        .all()
+    ):
+        dia = max(dia, inicio)
+        saidas[dia] = saidas.get(dia, 0) + quantidade
+    return saidas
+
+def _demandas_por_dia(inicio, fim):
+    # Demandas ativas que começam na janela consomem a quantidade prevista
+    # ainda não alocada
+    alocadas = (
+        db.session.query(Alocacao.demanda_id, func.count(Alocacao.id).label('quantidade'))
+        .filter(Alocacao.status == 'Em campo')
+        .group_by(Alocacao.demanda_id)
+        .subquery()
+    )
+    saidas = {}
+    for dia, prevista, ja_alocada in (
+        db.session.query(Demanda.data_inicio, Demanda.quantidade_prevista, func.coalesce(alocadas.c.quantidade, 0))
+        .outerjoin(alocadas, alocadas.c.demanda_id == Demanda.id)
+        .filter(
+            Demanda.status == 'Ativa',
+            Demanda.quantidade_prevista.isnot(None),
+            Demanda.data_inicio >= inicio,
+            Demanda.data_inicio <= fim
+        )
+        .all()
+    ):
+        pendente = max(prevista - ja_alocada, 0)
+        if pendente:
+            saidas[dia] = saidas.get(dia, 0) + pendente
+    return saidas
+
+def projetar_disponibilidade(inicio, dias, detalhes=False):
+    """Série diária de disponibilidade a partir de contagens agrupadas por data.
+
+    disponibilidade(d) = estoque atual + retornos previstos até d
+                         - calibrações que vencem até d - demandas que começam até d
+    """
+    fim = inicio + timedelta(days=dias)
+
+    total_dataloggers, em_estoque = db.session.query(
+        func.count(Datalogger.id),
+        contar_se(Datalogger.status == 'Estoque')
+    ).one()
+    retornos_atrasados = db.session.query(func.count(Alocacao.id)).filter(
+        Alocacao.status == 'Em campo',
+        Alocacao.data_retorno_prevista < inicio
+    ).scalar()
+
+    retornos = _retornos_por_dia(inicio, fim)
+    calibracoes = _calibracoes_por_dia(inicio, fim)
+    demandas = _demandas_por_dia(inicio, fim)
+
+    detalhes_por_dia = {}
+    if detalhes:
+        for linha in leitura_alocacoes().filter(
+            Alocacao.status == 'Em campo',
+            Alocacao.data_retorno_prevista >= inicio,
+            Alocacao.data_retorno_prevista <= fim
+        ).order_by(Alocacao.data_retorno_prevista, Alocacao.id):
+            detalhes_por_dia.setdefault(linha.data_retorno_prevista, []).append(linha_para_dict(linha))
+
+    projecao = []
+    disponibilidade = em_estoque
+    for i in range(dias + 1):
+        dia = inicio + timedelta(days=i)
+        retornos_dia = retornos.get(dia, 0)
+        calibracoes_dia = calibracoes.get(dia, 0)
+        demandas_dia = demandas.get(dia, 0)
+        disponibilidade += retornos_dia - calibracoes_dia - demandas_dia
+
+        item = {
+            'data': dia.isoformat(),
+            'disponibilidade': disponibilidade,
+            'retornos': retornos_dia,
+            'saidas_calibracao': calibracoes_dia,
+            'saidas_demandas': demandas_dia
+        }
+        if detalhes:
+            item['detalhes_retornos'] = detalhes_por_dia.get(dia, [])
+        projecao.append(item)
+
+    return {
+        'projecao': projecao,
+        'disponibilidade_atual': em_estoque,
+        'total_dataloggers': total_dataloggers,
+        'retornos_atrasados': retornos_atrasados
+    }
+
+def detalhar_dia(dia, inicio):
+    """Itens que entram e saem do estoque em um dia da projeção."""
+    calibracao = Datalogger.proxima_calibracao <= dia if dia <= inicio else Datalogger.proxima_calibracao == dia
+    return {
+        'data': dia.isoformat(),
+        'retornos': [linha_para_dict(l) for l in leitura_alocacoes().filter(
+            Alocacao.status == 'Em campo',
+            Alocacao.data_retorno_prevista == dia
+        ).order_by(Alocacao.id)],
+        'calibracoes': [linha_para_dict(l) for l in leitura_dataloggers().filter(
+            Datalogger.status == 'Estoque',
+            Datalogger.proxima_calibracao.isnot(None),
+            calibracao
+        ).order_by(Datalogger.id)],
+        'demandas': [linha_para_dict(l) for l in leitura_demandas().filter(
+            and_(
+                Demanda.status == 'Ativa',
+                Demanda.quantidade_prevista.isnot(None),
+                Demanda.data_inicio == dia
+            )
+        ).order_by(Demanda.id)]
+    }
@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+from sqlalchemy import func, and_
+from src.models.user import db
+from src.models.datalogger import Datalogger
+from src.models.demanda import Demanda
+from src.models.alocacao import Alocacao
+from src.services.cache import snapshots
+from src.services.consultas import contar_se
+from src.services.versoes import versoes_lidas
+
+
+def _calcular_resumo(hoje):
+    # Uma única passada por tabela com agregação condicional
+    dl = db.session.query(
+        func.count(Datalogger.id),
+        contar_se(Datalogger.status == 'Estoque'),
+        contar_se(Datalogger.status == 'Alocado'),
+        contar_se(Datalogger.status == 'Calibração'),
+        contar_se(Datalogger.status == 'Manutenção'),
+        contar_se(and_(
+            Datalogger.proxima_calibracao.isnot(None),
+            Datalogger.proxima_calibracao <= hoje
+        ))
+    ).one()
+    total_dataloggers, em_estoque, alocados, em_calibracao, em_manutencao, calibracoes_vencidas = dl
+
+    demandas_ativas = db.session.query(
+        contar_se(Demanda.status == 'Ativa')
+    ).scalar()
+
+    # Retornos previstos próximos (próximos 7 dias)
+    data_limite = hoje + timedelta(days=7)
+    alocacoes_em_campo, retornos_proximos = db.session.query(
+        func.count(Alocacao.id),
+        contar_se(and_(
+            Alocacao.data_retorno_prevista <= data_limite,
+            Alocacao.data_retorno_prevista >= hoje
+        ))
+    ).filter(Alocacao.status == 'Em campo').one()
+
+    return {
+        'total_dataloggers': total_dataloggers,
+        'em_estoque': em_estoque,
+        'alocados': alocados,
+        'em_calibracao': em_calibracao,
+        'em_manutencao': em_manutencao,
+        'demandas_ativas': demandas_ativas,
+        'alocacoes_em_campo': alocacoes_em_campo,
+        'calibracoes_vencidas': calibracoes_vencidas,
+        'retornos_proximos': retornos_proximos,
+        'taxa_ocupacao': round((alocados / total_dataloggers * 100), 2) if total_dataloggers > 0 else 0
+    }
+
+def resumo_estoque(hoje=None):
+    """Contadores do dashboard, mantidos no cache de snapshots."""
+    hoje = hoje or date.today()
+    tabelas = ('dataloggers', 'demandas', 'alocacoes')
+    # A chave leva as versões das tabelas (as mesmas do ETag da rota): uma escrita
+    # feita por outro worker não invalida este cache, mas muda a chave. A data entra
+    # porque calibrações vencidas e retornos próximos mudam na virada do dia; a
+    # réplica, para um snapshot de réplica não ser servido como se fosse do principal
+    return snapshots.obter(
+        ('dashboard_resumo', hoje, db.session().replica_atual(), versoes_lidas(tabelas)),
+        lambda: _calcular_resumo(hoje),
+        depende_de=tabelas
+    )
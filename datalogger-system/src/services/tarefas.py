@@ -0,0 +1,25 @@
+from src.models.user import db
+from src.services.agendador import tarefa
+from src.services.alertas import sincronizar_alertas
+from src.services.banco import manutencao_sqlite
+from src.services.ocupacao import reconstruir
+
+
+# Tarefas de manutenção executadas pelo agendador (horário local do servidor)
+
+@tarefa('virada_alertas', '5 0 * * *')
+def virada_alertas():
+    """Sincronização completa dos alertas: repara divergências (a data do dia é avaliada na leitura)."""
+    sincronizar_alertas(completo=True)
+    db.session.commit()
+
+@tarefa('reconstruir_ocupacao', '30 3 * * *')
+def reconstruir_ocupacao():
+    """Recalcula a tabela ocupacao_diaria a partir das alocações."""
+    reconstruir(db.session)
+    db.session.commit()
+
+@tarefa('manutencao_sqlite', '15 * * * *')
+def otimizar_sqlite():
+    """PRAGMA optimize e checkpoint do WAL (só no perfil SQLite; nos demais bancos não faz nada)."""
+    manutencao_sqlite(db.engine)
@@ -0,0 +1,130 @@
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import g, has_request_context, request, make_response
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.versao_tabela import VersaoTabela
+from src.services.cache import snapshots
+
+TABELAS_VERSIONADAS = ('dataloggers', 'clientes', 'demandas', 'alocacoes', 'alertas')
+CHAVE_ALTERADAS = 'tabelas_alteradas'
+CHAVE_ENGINE = 'versoes_engine'
+
+# Funções chamadas após cada commit com (session, tabelas alteradas)
+OUVINTES_COMMIT = []
+
+
+# Rastreamento de escritas: toda transação que altera uma tabela versionada
+# incrementa a versão dela, seja por flush de objetos ou por INSERT/UPDATE/DELETE
+# em lote executados pela sessão. No PostgreSQL o incremento roda logo depois do
+# commit, numa transação curta à parte: dentro da transação, a linha da versão
+# ficaria travada até o commit e enfileiraria todas as escritas concorrentes na
+# mesma tabela. No SQLite (um escritor por vez) ele segue no mesmo commit.
+
+def _marcar(session, tabela):
+    if tabela in TABELAS_VERSIONADAS:
+        session.info.setdefault(CHAVE_ALTERADAS, set()).add(tabela)
+
+@event.listens_for(Session, 'after_flush')
+def _apos_flush(session, contexto):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        _marcar(session, getattr(obj, '__tablename__', None))
+
+@event.listens_for(Session, 'do_orm_execute')
+def _apos_comando(estado):
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        _marcar(estado.session, estado.statement.table.name)
+
+def _incrementar(tabelas):
+    # Ordem fixa das linhas evita deadlock entre transações concorrentes
+    return (
+        update(VersaoTabela)
+        .where(VersaoTabela.tabela.in_(sorted(tabelas)))
+        .values(versao=VersaoTabela.versao + 1)
+    )
+
+@event.listens_for(Session, 'before_commit')
+def _antes_commit(session):
+    session.flush()
+    tabelas = session.info.get(CHAVE_ALTERADAS)
+    if tabelas:
+        engine = session.get_bind(VersaoTabela)
+        if engine.dialect.name == 'postgresql':
+            session.info[CHAVE_ENGINE] = engine
+        else:
+            session.execute(_incrementar(tabelas))
+
+@event.listens_for(Session, 'after_commit')
+def _apos_commit(session):
+    tabelas = session.info.pop(CHAVE_ALTERADAS, None)
+    engine = session.info.pop(CHAVE_ENGINE, None)
+    if tabelas and engine is not None:
+        # Depois dos dados visíveis: quem ler a versão nova já enxerga as alterações
+        try:
+            with engine.begin() as conexao:
+                conexao.execute(_incrementar(tabelas))
+        except Exception as e:
+            print(f"⚠️ Falha ao incrementar versões de {sorted(tabelas)}: {e}")
+    if tabelas:
+        snapshots.invalidar(*tabelas)
+        for ouvinte in OUVINTES_COMMIT:
+            ouvinte(session, tabelas)
+
+@event.listens_for(Session, 'after_rollback')
+def _apos_rollback(session):
+    session.info.pop(CHAVE_ALTERADAS, None)
+    session.info.pop(CHAVE_ENGINE, None)
+
+
+def versoes_atuais(tabelas):
+    return dict(
+        db.session.query(VersaoTabela.tabela, VersaoTabela.versao)
+        .filter(VersaoTabela.tabela.in_(tabelas))
+        .all()
+    )
+
+def versoes_lidas(tabelas):
+    """Versões das tabelas como tupla ordenada, para compor chaves de cache.
+
+    Numa rota com ``com_etag`` reaproveita as versões que geraram o ETag: o
+    corpo servido corresponde exatamente ao ETag enviado.
+    """
+    lidas = g.get('versoes_etag', {}) if has_request_context() else {}
+    faltantes = [tabela for tabela in tabelas if tabela not in lidas]
+    if faltantes:
+        lidas = {**lidas, **{tabela: 0 for tabela in faltantes}, **versoes_atuais(faltantes)}
+    return tuple((tabela, lidas[tabela]) for tabela in sorted(tabelas))
+
+def com_etag(*tabelas):
+    """GET condicional: ETag derivado das versões das tabelas de que a rota depende.
+
+    Um ``If-None-Match`` igual ao ETag atual responde 304 sem executar a rota.
+    """
+    def decorador(view):
+        @wraps(view)
+        def envolvida(*args, **kwargs):
+            try:
+                versoes = versoes_atuais(tabelas)
+            except Exception:
+                db.session.rollback()
+                return view(*args, **kwargs)
+            g.versoes_etag = {tabela: versoes.get(tabela, 0) for tabela in tabelas}
+
+            # A data entra no ETag porque alertas e projeções dependem do dia
+            partes = [request.full_path, date.today().isoformat()]
+            partes += [f'{tabela}:{versoes.get(tabela, 0)}' for tabela in tabelas]
+            etag = hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
+            if etag in request.if_none_match:
+                resposta = make_response('', 304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            resposta.set_etag(etag)
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta
+        return envolvida
+    return decorador
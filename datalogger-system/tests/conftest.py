@@ -0,0 +1,78 @@
+import os
+from datetime import date, timedelta
+
+import pytest
+
+os.environ.setdefault('AGENDADOR_ATIVO', 'false')
+
+from src.main import create_app
+from src.models.user import db
+from src.services.cache import snapshots
+from src.services.migracoes import preparar_banco
+
+HOJE = date.today()
+
+
+def dia(deslocamento):
+    """Data ISO relativa a hoje, no formato aceito pela API."""
+    return (HOJE + timedelta(days=deslocamento)).isoformat()
+
+
+def criar_app(pasta, **config):
+    """App sobre um SQLite novo em ``pasta``, já migrado e sem réplicas (salvo se informadas)."""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{pasta}/principal.db',
+        'DATABASE_REPLICA_URLS': [],
+        **config
+    })
+    preparar_banco(app)
+    # O cache de snapshots é do processo: não pode atravessar bancos de testes diferentes
+    snapshots.invalidar()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = criar_app(tmp_path)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+class Api:
+    """Atalhos para montar cenários pela própria API, falhando no primeiro erro."""
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    def criar(self, rota, **dados):
+        resposta = self.cliente.post(rota, json=dados)
+        assert resposta.status_code == 201, resposta.get_json()
+        return resposta.get_json()
+
+    def novo_cliente(self, nome='Cliente'):
+        return self.criar('/api/clientes', nome=nome)
+
+    def nova_demanda(self, cliente_id, descricao='Demanda'):
+        return self.criar('/api/demandas', cliente_id=cliente_id, descricao=descricao,
+                          data_inicio=dia(-200), data_fim_prevista=dia(200))
+
+    def novo_datalogger(self, numero_serie, modelo='A', **campos):
+        return self.criar('/api/dataloggers', numero_serie=numero_serie, modelo=modelo, **campos)
+
+    def nova_alocacao(self, datalogger_id, demanda_id, saida=-10, retorno_previsto=10):
+        return self.criar('/api/alocacoes', datalogger_id=datalogger_id, demanda_id=demanda_id,
+                          data_saida=dia(saida), data_retorno_prevista=dia(retorno_previsto))
+
+
+@pytest.fixture
+def api(cliente):
+    return Api(cliente)
@@ -0,0 +1,208 @@
+import importlib
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import src.routes.dashboard as dashboard
+from src.models.user import db
+from src.services.alertas import DIAS_AVISO_CALIBRACAO, sincronizar_alertas
+from src.services.auditoria_sql import orcamento_consultas
+from tests.conftest import HOJE, dia
+
+
+def esperados(cliente):
+    """Alertas que deveriam existir, calculados a partir dos dados expostos pela API."""
+    alertas = set()
+    for datalogger in cliente.get('/api/dataloggers').get_json():
+        vencimento = datalogger['proxima_calibracao']
+        if vencimento and vencimento <= HOJE.isoformat():
+            alertas.add(('calibracao_vencida', datalogger['id'], None))
+        elif vencimento and vencimento <= (HOJE + timedelta(days=DIAS_AVISO_CALIBRACAO)).isoformat():
+            alertas.add(('calibracao_proxima', datalogger['id'], None))
+    for alocacao in cliente.get('/api/alocacoes?status=Em campo').get_json():
+        if alocacao['data_retorno_prevista'] < HOJE.isoformat():
+            alertas.add(('retorno_atrasado', alocacao['datalogger_id'], alocacao['id']))
+    return alertas
+
+
+def atuais(cliente, consulta='estado=todos'):
+    return cliente.get(f'/api/dashboard/alertas?{consulta}').get_json()
+
+
+def conferir(cliente):
+    assert {(a['tipo'], a['datalogger_id'], a.get('alocacao_id')) for a in atuais(cliente)} == esperados(cliente)
+
+
+@pytest.fixture
+def frota(api):
+    demanda = api.nova_demanda(api.novo_cliente()['id'])
+    dataloggers = [
+        api.novo_datalogger(f'S{i}', proxima_calibracao=dia(vencimento))
+        for i, vencimento in enumerate([-5, 0, 3, 20, 45, 90, -40, 15])
+    ]
+    alocacoes = [
+        api.nova_alocacao(datalogger['id'], demanda['id'], saida=-30, retorno_previsto=previsto)
+        for datalogger, previsto in zip(dataloggers, [-10, -1, 5, -3])
+    ]
+    return demanda, dataloggers, alocacoes
+
+
+def test_alertas_acompanham_as_escritas(cliente, frota):
+    demanda, dataloggers, alocacoes = frota
+    conferir(cliente)
+
+    cliente.post(f"/api/alocacoes/{alocacoes[0]['id']}/retorno", json={})
+    conferir(cliente)
+    cliente.put(f"/api/alocacoes/{alocacoes[1]['id']}", json={'data_retorno_prevista': dia(5)})
+    conferir(cliente)
+    cliente.put(f"/api/dataloggers/{dataloggers[5]['id']}", json={'proxima_calibracao': dia(-1)})
+    conferir(cliente)
+    cliente.post('/api/alocacoes/retorno-lote', json={'alocacoes': [{'id': alocacoes[3]['id']}]})
+    conferir(cliente)
+    cliente.delete(f"/api/dataloggers/{dataloggers[6]['id']}")
+    conferir(cliente)
+    cliente.post(f"/api/demandas/{demanda['id']}/finalizar", json={})
+    conferir(cliente)
+
+
+def test_numero_de_serie_alterado_chega_a_mensagem(cliente, frota):
+    _, dataloggers, _ = frota
+    cliente.put(f"/api/dataloggers/{dataloggers[0]['id']}", json={'numero_serie': 'NOVO-123'})
+
+    mensagens = [a['mensagem'] for a in atuais(cliente) if a['datalogger_id'] == dataloggers[0]['id']]
+
+    assert mensagens and all('NOVO-123' in mensagem for mensagem in mensagens)
+
+
+def test_alerta_mantem_identidade_e_estado_quando_a_data_muda(cliente, api):
+    datalogger = api.novo_datalogger('S1', proxima_calibracao=dia(20))
+    [alerta] = atuais(cliente)
+    assert alerta['tipo'] == 'calibracao_proxima'
+    cliente.post(f"/api/dashboard/alertas/{alerta['id']}/reconhecer")
+
+    # Vencimento antecipado: o aviso passa a "vencida" no mesmo registro
+    cliente.put(f"/api/dataloggers/{datalogger['id']}", json={'proxima_calibracao': dia(-1)})
+
+    [atualizado] = atuais(cliente)
+    assert atualizado['id'] == alerta['id']
+    assert atualizado['tipo'] == 'calibracao_vencida'
+    assert atualizado['data_vencimento'] == dia(-1)
+    assert atuais(cliente, 'estado=reconhecido') == [atualizado]
+
+
+def test_adiamento_sobrevive_a_nova_data_de_retorno(cliente, api):
+    demanda = api.nova_demanda(api.novo_cliente()['id'])
+    alocacao = api.nova_alocacao(api.novo_datalogger('S1')['id'], demanda['id'], retorno_previsto=-2)
+    [alerta] = atuais(cliente)
+    cliente.post(f"/api/dashboard/alertas/{alerta['id']}/adiar", json={'dias': 3})
+
+    cliente.put(f"/api/alocacoes/{alocacao['id']}", json={'data_retorno_prevista': dia(-1)})
+
+    [adiado] = atuais(cliente, 'estado=adiado')
+    assert adiado['id'] == alerta['id']
+    assert adiado['dias_atraso'] == 1
+    assert atuais(cliente, 'estado=aberto') == []
+
+
+@pytest.fixture
+def daqui_a(monkeypatch):
+    """Adianta a data vista pelas rotas do dashboard, sem sincronizar nada."""
+    def adiantar(dias):
+        class Data(date):
+            @classmethod
+            def today(cls):
+                return HOJE + timedelta(days=dias)
+        monkeypatch.setattr(dashboard, 'date', Data)
+    return adiantar
+
+
+def test_passagem_dos_dias_dispensa_a_virada(cliente, frota, daqui_a):
+    _, dataloggers, alocacoes = frota
+    origem = lambda alerta: (alerta['datalogger_id'], alerta.get('alocacao_id'))
+    antes = {origem(a): a['id'] for a in atuais(cliente)}
+
+    # Sem agendador (AGENDADOR_ATIVO=false nos testes) e sem nenhuma escrita
+    daqui_a(25)
+    depois = {origem(a): a for a in atuais(cliente)}
+
+    # Vencimento em 20 dias: 25 dias à frente, já venceu
+    vencido = depois[(dataloggers[3]['id'], None)]
+    assert (vencido['tipo'], vencido['prioridade']) == ('calibracao_vencida', 'alta')
+    assert vencido['mensagem'] == 'Datalogger S3 com calibração vencida há 5 dias'
+    # Vencimento em 45 dias: entra no aviso de 30 dias
+    assert depois[(dataloggers[4]['id'], None)]['tipo'] == 'calibracao_proxima'
+    # Retorno previsto em 5 dias: passa a atrasado
+    assert depois[(dataloggers[2]['id'], alocacoes[2]['id'])]['dias_atraso'] == 20
+    # Mesma origem, mesmo alerta, ainda que o tipo tenha mudado
+    assert {chave: depois[chave]['id'] for chave in antes} == antes
+
+
+def test_proxima_calibracao_conta_os_dias_que_faltam(cliente, api):
+    api.novo_datalogger('S1', proxima_calibracao=dia(3))
+
+    [alerta] = atuais(cliente)
+
+    assert alerta['mensagem'] == 'Datalogger S1 precisa de calibração em 3 dias'
+
+
+def test_prioridade_segue_a_data_e_ordena_os_vencidos_primeiro(cliente, frota, daqui_a):
+    daqui_a(25)
+
+    alertas = atuais(cliente)
+    altas = atuais(cliente, 'estado=todos&prioridade=alta')
+
+    assert [a['prioridade'] for a in alertas] == sorted((a['prioridade'] for a in alertas), key=['alta', 'media'].index)
+    assert altas == [a for a in alertas if a['prioridade'] == 'alta']
+    assert atuais(cliente, 'estado=todos&tipo=calibracao_vencida') == [a for a in alertas if a['tipo'] == 'calibracao_vencida']
+
+
+def test_virada_completa_so_repara_divergencias(app, cliente, frota):
+    antes = atuais(cliente)
+
+    with app.app_context():
+        # A virada é uma sincronização completa: o orçamento não cresce com a frota
+        with orcamento_consultas(10):
+            sincronizar_alertas(completo=True, hoje=HOJE + timedelta(days=25))
+        db.session.commit()
+
+    assert atuais(cliente) == antes
+
+
+@pytest.mark.parametrize('corpo', [{'dias': 'x'}, {'dias': 0}, {'dias': 1.5}, {'ate': '2020-99-01'}, {'ate': 5}])
+def test_adiar_rejeita_entrada_invalida(cliente, api, corpo):
+    api.novo_datalogger('S1', proxima_calibracao=dia(3))
+    [alerta] = atuais(cliente)
+
+    resposta = cliente.post(f"/api/dashboard/alertas/{alerta['id']}/adiar", json=corpo)
+
+    assert resposta.status_code == 400
+    assert atuais(cliente) == [alerta]
+
+
+@pytest.mark.parametrize('acao', ['reconhecer', 'adiar', 'reabrir'])
+def test_alerta_inexistente_responde_404(cliente, acao):
+    resposta = cliente.post(f'/api/dashboard/alertas/999/{acao}', json={})
+
+    assert resposta.status_code == 404
+    assert resposta.get_json()['error'] == 'Alerta não encontrado'
+
+
+def test_migracao_cria_os_alertas_que_ainda_nao_valem(app, cliente, frota, daqui_a):
+    with app.app_context():
+        # Instalação anterior: só os alertas que já valiam estavam na tabela
+        db.session.execute(text(
+            "DELETE FROM alertas WHERE data_referencia > :limite OR (tipo = 'retorno_atrasado' AND data_referencia >= :hoje)"
+        ), {'limite': HOJE + timedelta(days=DIAS_AVISO_CALIBRACAO), 'hoje': HOJE})
+        db.session.commit()
+        migracao = importlib.import_module('src.migrations.0010_alertas_futuros')
+        with db.engine.begin() as conexao:
+            migracao.upgrade(conexao)
+
+    daqui_a(25)
+    migrados = {(a['tipo'], a['datalogger_id'], a.get('alocacao_id')) for a in atuais(cliente)}
+    with app.app_context():
+        sincronizar_alertas(completo=True)
+        db.session.commit()
+
+    assert {(a['tipo'], a['datalogger_id'], a.get('alocacao_id')) for a in atuais(cliente)} == migrados
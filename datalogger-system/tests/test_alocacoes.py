@@ -0,0 +1,183 @@
+import pytest
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError
+
+from benchmarks.orcamentos import ORCAMENTOS
+from src.models.datalogger import Datalogger
+from src.models.user import db
+from src.routes.alocacao import INDICE_EM_CAMPO, _em_campo_duplicada
+from src.services.auditoria_sql import orcamento_consultas
+from tests.conftest import dia
+
+
+@pytest.fixture
+def demanda(api):
+    return api.nova_demanda(api.novo_cliente()['id'])
+
+
+def pedido(datalogger_id, demanda_id):
+    return {'datalogger_id': datalogger_id, 'demanda_id': demanda_id,
+            'data_saida': dia(-5), 'data_retorno_prevista': dia(5)}
+
+
+def em_campo(cliente, datalogger_id):
+    return cliente.get(f'/api/alocacoes?status=Em campo&datalogger_id={datalogger_id}').get_json()
+
+
+def liberar_sem_retorno(app, datalogger_id):
+    """Simula a corrida perdida na reserva: o datalogger volta a 'Estoque' com a alocação ainda em campo."""
+    with app.app_context():
+        db.session.execute(update(Datalogger).where(Datalogger.id == datalogger_id).values(status='Estoque'))
+        db.session.commit()
+
+
+def test_reserva_condicional_aloca_uma_vez(cliente, api, demanda):
+    datalogger = api.novo_datalogger('S1')
+
+    with orcamento_consultas(ORCAMENTOS['POST /api/alocacoes']):
+        primeira = cliente.post('/api/alocacoes', json=pedido(datalogger['id'], demanda['id']))
+    segunda = cliente.post('/api/alocacoes', json=pedido(datalogger['id'], demanda['id']))
+
+    assert primeira.status_code == 201
+    assert segunda.status_code == 400
+    assert segunda.get_json()['error'] == 'Datalogger não está disponível para alocação'
+    assert len(em_campo(cliente, datalogger['id'])) == 1
+
+
+def test_datalogger_inexistente_responde_404(cliente, demanda):
+    resposta = cliente.post('/api/alocacoes', json=pedido(999, demanda['id']))
+
+    assert resposta.status_code == 404
+
+
+@pytest.mark.parametrize('rota', ['/api/alocacoes', '/api/alocacoes/lote'])
+def test_indice_unico_em_campo_responde_409(app, cliente, api, demanda, rota):
+    datalogger = api.novo_datalogger('S1')
+    api.nova_alocacao(datalogger['id'], demanda['id'])
+    liberar_sem_retorno(app, datalogger['id'])
+
+    resposta = cliente.post(rota, json={**pedido(datalogger['id'], demanda['id']), 'datalogger_ids': [datalogger['id']]})
+
+    assert resposta.status_code == 409
+    assert resposta.get_json()['error'] == 'Datalogger já possui alocação em campo'
+    assert len(em_campo(cliente, datalogger['id'])) == 1
+
+
+def _violacao(app, comando, parametros):
+    with app.app_context():
+        try:
+            db.session.execute(text(comando), parametros)
+        except IntegrityError as e:
+            return e
+        finally:
+            db.session.rollback()
+    raise AssertionError('o comando deveria violar uma restrição')
+
+
+def test_so_o_indice_em_campo_e_conflito(app, api, demanda):
+    datalogger = api.novo_datalogger('S1')
+    api.nova_alocacao(datalogger['id'], demanda['id'])
+    inserir = ('INSERT INTO alocacoes (datalogger_id, demanda_id, data_saida, data_retorno_prevista, status) '
+               'VALUES (:datalogger_id, :demanda_id, :data_saida, :prevista, :status)')
+    valores = {'datalogger_id': datalogger['id'], 'demanda_id': demanda['id'],
+               'data_saida': dia(0), 'prevista': dia(1), 'status': 'Em campo'}
+
+    assert _em_campo_duplicada(_violacao(app, inserir, valores))
+    assert not _em_campo_duplicada(_violacao(app, inserir, {**valores, 'data_saida': None, 'status': 'Retornado'}))
+
+
+class _Diagnostico:
+    def __init__(self, constraint_name):
+        self.constraint_name = constraint_name
+
+
+class _ErroPostgres(Exception):
+    def __init__(self, constraint_name):
+        super().__init__(f'violates constraint "{constraint_name}"')
+        self.diag = _Diagnostico(constraint_name)
+
+
+@pytest.mark.parametrize('constraint, conflito', [
+    (INDICE_EM_CAMPO, True),
+    ('alocacoes_demanda_id_fkey', False),
+    ('alocacoes_datalogger_id_fkey', False),
+])
+def test_postgres_e_decidido_pelo_nome_da_constraint(constraint, conflito):
+    erro = IntegrityError('INSERT INTO alocacoes ...', {}, _ErroPostgres(constraint))
+
+    assert _em_campo_duplicada(erro) is conflito
+
+
+def test_lote_reporta_indisponiveis_e_aloca_o_resto(cliente, api, demanda):
+    livres = [api.novo_datalogger(f'S{i}')['id'] for i in range(3)]
+    ocupado = api.novo_datalogger('OCUPADO')['id']
+    api.nova_alocacao(ocupado, demanda['id'])
+
+    resposta = cliente.post('/api/alocacoes/lote', json={**pedido(None, demanda['id']), 'datalogger_ids': livres + [ocupado, 999]})
+
+    assert resposta.status_code == 201
+    resultados = {r['datalogger_id']: r for r in resposta.get_json()['resultados']}
+    assert all(resultados[i]['sucesso'] for i in livres)
+    assert resultados[ocupado]['erro'] == 'Datalogger não está disponível para alocação'
+    assert resultados[999]['erro'] == 'Datalogger não encontrado'
+
+
+def test_retorno_encerra_uma_vez(cliente, api, demanda):
+    datalogger = api.novo_datalogger('S1')
+    alocacao = api.nova_alocacao(datalogger['id'], demanda['id'])
+
+    primeiro = cliente.post(f"/api/alocacoes/{alocacao['id']}/retorno", json={'data_retorno_real': dia(0)})
+    segundo = cliente.post(f"/api/alocacoes/{alocacao['id']}/retorno", json={'data_retorno_real': dia(1)})
+
+    assert primeiro.status_code == 200
+    assert segundo.status_code == 400
+    assert segundo.get_json()['error'] == 'Alocação já foi finalizada'
+    assert cliente.get(f"/api/alocacoes/{alocacao['id']}").get_json()['data_retorno_real'] == dia(0)
+    assert cliente.get(f"/api/dataloggers/{datalogger['id']}").get_json()['status'] == 'Estoque'
+
+
+def test_retorno_em_lote_reporta_cada_item(cliente, api, demanda):
+    alocacoes = [api.nova_alocacao(api.novo_datalogger(f'S{i}')['id'], demanda['id'])['id'] for i in range(3)]
+    cliente.post(f'/api/alocacoes/{alocacoes[0]}/retorno', json={})
+
+    resposta = cliente.post('/api/alocacoes/retorno-lote', json={'alocacoes': [{'id': i} for i in alocacoes + [999]]})
+
+    assert resposta.status_code == 200
+    dados = resposta.get_json()
+    assert dados['retornadas'] == 2
+    erros = {r['id']: r.get('erro') for r in dados['resultados']}
+    assert erros == {alocacoes[0]: 'Alocação já foi finalizada', alocacoes[1]: None, alocacoes[2]: None,
+                     999: 'Alocação não encontrada'}
+
+
+@pytest.mark.parametrize('corpo', [
+    {'alocacoes': [{'id': 'abc'}]},
+    {'alocacoes': [{'id': 1, 'data_retorno_real': '31/12/2026'}]},
+    {'alocacoes': ['1']},
+    {'alocacoes': []},
+])
+def test_retorno_em_lote_rejeita_entrada_invalida_sem_escrever(cliente, api, demanda, corpo):
+    alocacao = api.nova_alocacao(api.novo_datalogger('S1')['id'], demanda['id'])
+
+    resposta = cliente.post('/api/alocacoes/retorno-lote', json=corpo)
+
+    assert resposta.status_code == 400
+    assert cliente.get(f"/api/alocacoes/{alocacao['id']}").get_json()['status'] == 'Em campo'
+
+
+@pytest.mark.parametrize('campos', [
+    {'quantidade': -1},
+    {'quantidade': 0},
+    {'quantidade': 'muitos'},
+    {'quantidade': 1.5},
+    {'datalogger_ids': [1, 'x']},
+    {'datalogger_ids': '1,2'},
+])
+def test_lote_rejeita_quantidade_e_ids_invalidos(cliente, api, demanda, campos):
+    for i in range(3):
+        api.novo_datalogger(f'S{i}')
+
+    resposta = cliente.post('/api/alocacoes/lote', json={**pedido(None, demanda['id']), **campos})
+
+    assert resposta.status_code == 400
+    assert cliente.get('/api/alocacoes').get_json() == []
@@ -0,0 +1,153 @@
+import shutil
+import sqlite3
+from collections import Counter
+
+import pytest
+from sqlalchemy import event, select, update
+
+from src.models.cliente import Cliente
+from src.models.user import db
+from src.services.banco import BIND_LEITURA, COOKIE_PRINCIPAL, somente_leitura
+from tests.conftest import criar_app
+
+
+@pytest.fixture
+def engines(app):
+    with app.app_context():
+        return {'principal': db.engines[None], 'leitura': db.engines[BIND_LEITURA]}
+
+
+@pytest.fixture
+def execucoes(engines):
+    """Conta os comandos executados em cada engine durante o teste."""
+    contagem = Counter()
+    ouvintes = []
+    for nome, engine in engines.items():
+        ouvinte = lambda *args, nome=nome, **kwargs: contagem.update([nome])
+        event.listen(engine, 'before_cursor_execute', ouvinte)
+        ouvintes.append((engine, ouvinte))
+    yield contagem
+    for engine, ouvinte in ouvintes:
+        event.remove(engine, 'before_cursor_execute', ouvinte)
+
+
+def test_get_le_no_pool_de_leitura(app, engines):
+    with app.test_request_context('/api/clientes', method='GET'):
+        assert db.session.get_bind(clause=select(Cliente)) is engines['leitura']
+        # Escrita vai ao principal, mesmo dentro de um GET
+        assert db.session.get_bind(clause=update(Cliente).values(nome='x')) is engines['principal']
+
+
+@pytest.mark.parametrize('metodo', ['POST', 'PUT', 'DELETE'])
+def test_escritas_leem_no_principal(app, engines, metodo):
+    with app.test_request_context('/api/clientes', method=metodo):
+        assert db.session.get_bind(clause=select(Cliente)) is engines['principal']
+
+
+def test_depois_de_escrever_a_transacao_fica_no_principal(app, engines):
+    with app.test_request_context('/api/clientes', method='GET'):
+        db.session.execute(update(Cliente).values(nome='x'))
+        assert db.session.get_bind(clause=select(Cliente)) is engines['principal']
+        db.session.rollback()
+        assert db.session.get_bind(clause=select(Cliente)) is engines['leitura']
+
+
+def test_rotas_get_nao_tocam_o_principal(cliente, api, execucoes):
+    api.novo_cliente()
+    execucoes.clear()
+
+    assert cliente.get('/api/clientes').status_code == 200
+    assert cliente.get('/api/dashboard/resumo').status_code == 200
+
+    assert execucoes['leitura'] > 0
+    assert execucoes['principal'] == 0
+
+
+def test_tarefa_em_segundo_plano_le_no_principal_salvo_somente_leitura(app, execucoes):
+    with app.app_context():
+        db.session.execute(select(Cliente)).all()
+        db.session.rollback()
+        assert execucoes == {'principal': 1}
+
+        execucoes.clear()
+        with somente_leitura(db.session):
+            db.session.execute(select(Cliente)).all()
+            db.session.rollback()
+        assert execucoes == {'leitura': 1}
+
+
+def _tentar_lock_de_escrita(caminho):
+    conexao = sqlite3.connect(caminho, timeout=0, isolation_level=None)
+    try:
+        conexao.execute('BEGIN IMMEDIATE')
+        conexao.execute('ROLLBACK')
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conexao.close()
+
+
+def test_transacao_de_tarefa_reserva_o_lock_de_escrita(app, tmp_path):
+    caminho = str(tmp_path / 'principal.db')
+    with app.app_context():
+        # Quem lê para depois escrever já começa com BEGIN IMMEDIATE
+        db.session.execute(select(Cliente)).all()
+        assert not _tentar_lock_de_escrita(caminho)
+        db.session.rollback()
+
+        # Só leitura: BEGIN comum, outras conexões continuam escrevendo
+        with somente_leitura(db.session):
+            db.session.execute(select(Cliente)).all()
+            assert _tentar_lock_de_escrita(caminho)
+            db.session.rollback()
+
+
+@pytest.fixture
+def app_com_replicas(tmp_path):
+    base = criar_app(tmp_path)
+    with base.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    replicas = []
+    for i in range(2):
+        caminho = tmp_path / f'replica_{i}.db'
+        shutil.copy(tmp_path / 'principal.db', caminho)
+        # Um cliente que só existe na réplica mostra de onde veio a leitura
+        conexao = sqlite3.connect(caminho)
+        conexao.execute('INSERT INTO clientes (nome) VALUES (?)', (f'replica-{i}',))
+        conexao.commit()
+        conexao.close()
+        replicas.append(f'sqlite:///{caminho}')
+
+    app = criar_app(tmp_path, DATABASE_REPLICA_URLS=replicas)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def nomes(cliente):
+    return {c['nome'] for c in cliente.get('/api/clientes').get_json()}
+
+
+def test_leituras_fazem_rodizio_entre_as_replicas(app_com_replicas):
+    cliente = app_com_replicas.test_client()
+
+    vistos = [nomes(cliente) for _ in range(4)]
+
+    assert {'replica-0'} in vistos and {'replica-1'} in vistos
+
+
+def test_cliente_que_escreveu_le_do_principal(app_com_replicas):
+    escritor = app_com_replicas.test_client()
+    outro = app_com_replicas.test_client()
+
+    resposta = escritor.post('/api/clientes', json={'nome': 'novo'})
+    assert resposta.status_code == 201
+    assert escritor.get_cookie(COOKIE_PRINCIPAL) is not None
+
+    # Read-your-writes: quem escreveu enxerga a escrita; a escrita nunca foi às réplicas
+    assert nomes(escritor) == {'novo'}
+    assert 'novo' not in nomes(outro)
@@ -0,0 +1,53 @@
+import importlib
+import sqlite3
+
+import pytest
+
+from src.models.user import db
+from tests.conftest import dia
+
+
+@pytest.fixture
+def cliente_id(api):
+    return api.novo_cliente()['id']
+
+
+def nova(cliente, cliente_id, **campos):
+    return cliente.post('/api/demandas', json={
+        'cliente_id': cliente_id, 'descricao': 'D', 'data_inicio': dia(0), 'data_fim_prevista': dia(30), **campos
+    })
+
+
+@pytest.mark.parametrize('valor', ['abc', -1, 2.5, True, [3]])
+def test_quantidade_prevista_invalida_responde_400(cliente, cliente_id, valor):
+    assert nova(cliente, cliente_id, quantidade_prevista=valor).status_code == 400
+
+    demanda = nova(cliente, cliente_id, quantidade_prevista=3).get_json()
+    resposta = cliente.put(f"/api/demandas/{demanda['id']}", json={'quantidade_prevista': valor})
+
+    assert resposta.status_code == 400
+    assert cliente.get(f"/api/demandas/{demanda['id']}").get_json()['quantidade_prevista'] == 3
+    assert cliente.get('/api/dashboard/disponibilidade').status_code == 200
+
+
+@pytest.mark.parametrize('valor, esperado', [('4', 4), (0, 0), (None, None), ('', None)])
+def test_quantidade_prevista_valida(cliente, cliente_id, valor, esperado):
+    resposta = nova(cliente, cliente_id, quantidade_prevista=valor)
+
+    assert resposta.status_code == 201
+    assert resposta.get_json()['quantidade_prevista'] == esperado
+
+
+def test_migracao_limpa_valores_gravados_sem_validacao(app, cliente, cliente_id, tmp_path):
+    demanda = nova(cliente, cliente_id, quantidade_prevista=2).get_json()
+    conexao = sqlite3.connect(tmp_path / 'principal.db')
+    conexao.execute("UPDATE demandas SET quantidade_prevista = 'abc' WHERE id = ?", (demanda['id'],))
+    conexao.commit()
+    conexao.close()
+
+    migracao = importlib.import_module('src.migrations.0009_quantidade_prevista_invalida')
+    with app.app_context(), db.engine.begin() as conexao:
+        migracao.upgrade(conexao)
+
+    assert cliente.get(f"/api/demandas/{demanda['id']}").get_json()['quantidade_prevista'] is None
+    assert cliente.get('/api/dashboard/disponibilidade').status_code == 200
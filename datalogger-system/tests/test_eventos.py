@@ -0,0 +1,52 @@
+import pytest
+
+import src.services.eventos as eventos
+from src.routes.eventos import stream_eventos
+from src.services.eventos import central_eventos
+
+
+@pytest.fixture
+def assinantes(app):
+    with app.app_context():
+        central = central_eventos()
+    return lambda: len(central._filas)
+
+
+def test_assina_so_quando_o_stream_comeca_e_cancela_ao_fechar(cliente, assinantes):
+    resposta = cliente.get('/api/eventos', buffered=False)
+    assert resposta.status_code == 200
+
+    partes = iter(resposta.response)
+    assert next(partes) == b'retry: 3000\n\n'
+    assert assinantes() == 1
+
+    resposta.close()
+    assert assinantes() == 0
+
+
+def test_stream_nunca_lido_nao_prende_assinatura(app, assinantes):
+    with app.test_request_context('/api/eventos'):
+        for _ in range(3):
+            # Resposta descartada antes de o servidor ler o corpo (cliente que desistiu)
+            stream_eventos().close()
+
+    assert assinantes() == 0
+
+
+def test_lotado_responde_200_e_pede_nova_tentativa(cliente, assinantes, monkeypatch):
+    monkeypatch.setattr(eventos, 'MAXIMO_CONEXOES', 0)
+
+    resposta = cliente.get('/api/eventos')
+
+    assert resposta.status_code == 200
+    assert resposta.data.startswith(b'retry: ') and b'event:' not in resposta.data
+    assert assinantes() == 0
+
+
+def test_redireciona_para_o_processo_de_eventos(app, cliente):
+    app.config['EVENTOS_URL'] = 'https://eventos.exemplo/api/eventos'
+
+    resposta = cliente.get('/api/eventos')
+
+    assert resposta.status_code == 307
+    assert resposta.headers['Location'] == 'https://eventos.exemplo/api/eventos'
@@ -0,0 +1,36 @@
+import ast
+import os
+
+from sqlalchemy import create_engine, inspect
+
+from src.models.alocacao import Alocacao
+from src.models.cliente import Cliente
+from src.models.datalogger import Datalogger
+from src.models.demanda import Demanda
+from src.models.user import db
+from src.services.migracoes import PASTA_MIGRACOES, aplicar_migracoes, listar_migracoes
+
+
+def test_migracoes_nao_importam_codigo_da_aplicacao():
+    # Uma migração aplicada não pode mudar de comportamento quando os serviços ou modelos mudam
+    for versao, nome, _ in listar_migracoes():
+        with open(os.path.join(PASTA_MIGRACOES, f'{versao}_{nome}.py'), encoding='utf-8') as arquivo:
+            arvore = ast.parse(arquivo.read())
+        modulos = [no.module for no in ast.walk(arvore) if isinstance(no, ast.ImportFrom)]
+        modulos += [alias.name for no in ast.walk(arvore) if isinstance(no, ast.Import) for alias in no.names]
+        assert not [m for m in modulos if m and m.split('.')[0] == 'src'], f'{versao}_{nome}'
+
+
+def test_tabelas_das_migracoes_batem_com_os_modelos(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/migrado.db')
+    # Só as tabelas de antes das migrações; as demais saem delas, sem create_all
+    for modelo in (Cliente, Datalogger, Demanda, Alocacao):
+        modelo.__table__.create(engine)
+
+    aplicar_migracoes(engine)
+
+    inspetor = inspect(engine)
+    for tabela in ('versoes_tabelas', 'ocupacao_diaria', 'alertas', 'tarefas_agendadas'):
+        colunas = {coluna['name'] for coluna in inspetor.get_columns(tabela)}
+        assert colunas == set(db.metadata.tables[tabela].c.keys()), tabela
+    engine.dispose()
@@ -0,0 +1,117 @@
+import importlib
+import random
+from datetime import timedelta
+
+import pytest
+
+from src.models.ocupacao_diaria import OcupacaoDiaria
+from src.models.user import db
+from src.services.ocupacao import reconstruir
+from tests.conftest import HOJE, dia
+
+
+def linhas_ocupacao():
+    return sorted(
+        (o.data, o.cliente_id, o.modelo, o.alocados)
+        for o in OcupacaoDiaria.query.filter(OcupacaoDiaria.alocados != 0)
+    )
+
+
+def alocados_por_dia(cliente, inicio, fim):
+    """Contagem esperada calculada direto das alocações (retorno real conta como dia alocado)."""
+    alocacoes = cliente.get('/api/alocacoes').get_json()
+    contagem = []
+    dia_atual = inicio
+    while dia_atual <= fim:
+        contagem.append(sum(
+            1 for a in alocacoes
+            if a['data_saida'] <= dia_atual.isoformat()
+            and (a['data_retorno_real'] is None or a['data_retorno_real'] >= dia_atual.isoformat())
+        ))
+        dia_atual += timedelta(days=1)
+    return contagem
+
+
+def operar(cliente, rng, clientes, demandas, dataloggers):
+    """Uma alteração aleatória por uma das rotas que mantêm a ocupação incrementalmente."""
+    alocacoes = cliente.get('/api/alocacoes').get_json()
+    em_campo = [a for a in alocacoes if a['status'] == 'Em campo']
+    operacao = rng.choice(['nova', 'nova', 'lote', 'retorno', 'retorno_lote', 'editar', 'excluir', 'finalizar', 'modelo', 'cliente'])
+    k = rng.randint(-100, 0)
+    resposta = None
+
+    if operacao == 'nova':
+        estoque = [d['id'] for d in cliente.get('/api/dataloggers?status=Estoque').get_json()]
+        if estoque:
+            resposta = cliente.post('/api/alocacoes', json={
+                'datalogger_id': rng.choice(estoque), 'demanda_id': rng.choice(demandas)['id'],
+                'data_saida': dia(k), 'data_retorno_prevista': dia(k + 10)
+            })
+    elif operacao == 'lote':
+        resposta = cliente.post('/api/alocacoes/lote', json={
+            'demanda_id': rng.choice(demandas)['id'], 'quantidade': 2,
+            'data_saida': dia(k), 'data_retorno_prevista': dia(k + 5)
+        })
+    elif operacao == 'retorno' and em_campo:
+        alocacao = rng.choice(em_campo)
+        resposta = cliente.post(f"/api/alocacoes/{alocacao['id']}/retorno", json={'data_retorno_real': dia(k + 20)})
+    elif operacao == 'retorno_lote' and em_campo:
+        itens = [{'id': a['id'], 'data_retorno_real': dia(k + 20)} for a in rng.sample(em_campo, min(3, len(em_campo)))]
+        resposta = cliente.post('/api/alocacoes/retorno-lote', json={'alocacoes': itens})
+    elif operacao == 'editar' and alocacoes:
+        alocacao = rng.choice(alocacoes)
+        dados = rng.choice([{'data_saida': dia(k)}, {'data_retorno_real': dia(k + 30)}, {'observacoes': 'x'}])
+        resposta = cliente.put(f"/api/alocacoes/{alocacao['id']}", json=dados)
+    elif operacao == 'excluir' and alocacoes:
+        resposta = cliente.delete(f"/api/alocacoes/{rng.choice(alocacoes)['id']}")
+    elif operacao == 'finalizar' and rng.random() < 0.3:
+        demanda = rng.choice(demandas)
+        resposta = cliente.post(f"/api/demandas/{demanda['id']}/finalizar", json={'data_fim_real': dia(k + 40)})
+        cliente.put(f"/api/demandas/{demanda['id']}", json={'status': 'Ativa'})
+    elif operacao == 'modelo':
+        resposta = cliente.put(f"/api/dataloggers/{rng.choice(dataloggers)['id']}", json={'modelo': rng.choice('AB')})
+    elif operacao == 'cliente':
+        resposta = cliente.put(f"/api/demandas/{rng.choice(demandas)['id']}", json={'cliente_id': rng.choice(clientes)['id']})
+
+    # Recusas (sem estoque, alocação já finalizada) fazem parte do sorteio; erros internos não
+    assert resposta is None or resposta.status_code < 500, resposta.get_json()
+
+
+@pytest.mark.parametrize('semente', [1, 2, 3])
+def test_registrar_variacao_equivale_a_reconstruir(app, cliente, api, semente):
+    rng = random.Random(semente)
+    clientes = [api.novo_cliente(f'C{i}') for i in range(3)]
+    demandas = [api.nova_demanda(clientes[i % 3]['id'], f'D{i}') for i in range(4)]
+    dataloggers = [api.novo_datalogger(f'S{i}', modelo='AB'[i % 2]) for i in range(20)]
+
+    for _ in range(60):
+        operar(cliente, rng, clientes, demandas, dataloggers)
+
+    with app.app_context():
+        incremental = linhas_ocupacao()
+        assert incremental
+        reconstruir(db.session)
+        db.session.commit()
+        assert linhas_ocupacao() == incremental
+
+        # A carga da migração 0005 (cópia congelada da reconstrução) chega ao mesmo resultado
+        db.session.rollback()
+        with db.engine.begin() as conexao:
+            importlib.import_module('src.migrations.0005_ocupacao_diaria').upgrade(conexao)
+        assert linhas_ocupacao() == incremental
+
+
+def test_historico_le_a_tabela_agregada(cliente, api):
+    demanda = api.nova_demanda(api.novo_cliente()['id'])
+    dataloggers = [api.novo_datalogger(f'S{i}') for i in range(4)]
+    for i, datalogger in enumerate(dataloggers):
+        alocacao = api.nova_alocacao(datalogger['id'], demanda['id'], saida=-20 + i * 3, retorno_previsto=5)
+        if i % 2:
+            resposta = cliente.post(f"/api/alocacoes/{alocacao['id']}/retorno", json={'data_retorno_real': dia(-8 + i)})
+            assert resposta.status_code == 200, resposta.get_json()
+
+    inicio, fim = HOJE - timedelta(days=25), HOJE
+    resposta = cliente.get(f'/api/dashboard/historico-ocupacao?data_inicio={inicio}&data_fim={fim}')
+
+    assert resposta.status_code == 200
+    assert [linha['alocados'] for linha in resposta.get_json()] == alocados_por_dia(cliente, inicio, fim)
@@ -0,0 +1,48 @@
+import random
+from contextlib import nullcontext
+
+import pytest
+
+from benchmarks.cenarios import CENARIOS, Contexto
+from benchmarks.frota import ESCALAS, popular
+from benchmarks.orcamentos import ORCAMENTOS
+from src.models.user import db
+from src.services.auditoria_sql import orcamento_consultas
+from tests.conftest import HOJE, criar_app
+
+
+@pytest.fixture(scope='module')
+def frota(tmp_path_factory):
+    app = criar_app(tmp_path_factory.mktemp('frota'))
+    with app.app_context():
+        totais = popular(db, HOJE, **ESCALAS['minima'])
+        db.session.remove()
+    yield app, totais
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.mark.parametrize('nome', sorted(CENARIOS))
+def test_cenario_dentro_do_orcamento(frota, nome):
+    app, totais = frota
+    cliente = app.test_client()
+    medir = False
+    sem_orcamento = set()
+
+    def req(metodo, rota, caminho=None, json=None):
+        chave = f'{metodo} {rota}'
+        if chave not in ORCAMENTOS:
+            sem_orcamento.add(chave)
+        # Falha com OrcamentoExcedido (total ou N+1) na rodada medida
+        orcamento = orcamento_consultas(ORCAMENTOS.get(chave), descricao=f'{chave} ({caminho or rota})')
+        with orcamento if medir else nullcontext():
+            resposta = cliente.open(caminho or rota, method=metodo, json=json)
+        assert resposta.status_code < 500, (chave, resposta.get_json(silent=True))
+        return resposta.status_code, resposta.get_json(silent=True)
+
+    # A primeira rodada só aquece caches; a segunda é medida
+    for medir in (False, True):
+        CENARIOS[nome].funcao(req, Contexto(random.Random(42), totais, HOJE))
+
+    assert not sem_orcamento
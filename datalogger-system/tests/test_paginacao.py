@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from src.services.auditoria_sql import orcamento_consultas
+from tests.conftest import dia
+
+ORDENACOES = ('id', '-id', 'proxima_calibracao', '-proxima_calibracao', 'modelo', '-numero_serie', 'created_at')
+
+
+@pytest.fixture
+def frota(api):
+    rng = random.Random(1)
+    for i in range(57):
+        campos = {}
+        vencimento = rng.choice([None, -30, 10, 90])
+        if vencimento is not None:
+            # Muitos empates na chave de ordenação: o id desempata
+            campos['proxima_calibracao'] = dia(vencimento)
+        api.novo_datalogger(f'S{i:03d}', modelo=rng.choice('ABC'), status=rng.choice(['Estoque', 'Manutenção']), **campos)
+
+
+def percorrer(cliente, consulta, limite):
+    ids = []
+    cursor = None
+    paginas = 0
+    while True:
+        caminho = f'/api/dataloggers?{consulta}&limit={limite}' + (f'&cursor={cursor}' if cursor else '')
+        # O custo de cada página não depende da profundidade (dados + versões do ETag)
+        with orcamento_consultas(2):
+            resposta = cliente.get(caminho)
+        assert resposta.status_code == 200, resposta.get_json()
+        dados = resposta.get_json()
+        assert len(dados['items']) <= limite
+        ids += [item['id'] for item in dados['items']]
+        paginas += 1
+        cursor = dados['next_cursor']
+        if not cursor:
+            return ids, paginas
+
+
+@pytest.mark.parametrize('sort', ORDENACOES)
+def test_cursor_percorre_a_lista_completa_sem_repetir(cliente, frota, sort):
+    completa = [item['id'] for item in cliente.get(f'/api/dataloggers?sort={sort}').get_json()]
+    assert len(completa) == 57
+
+    ids, paginas = percorrer(cliente, f'sort={sort}', limite=7)
+
+    assert ids == completa
+    assert paginas == 9
+
+
+def test_filtros_continuam_valendo_com_cursor(cliente, frota):
+    lista = cliente.get('/api/dataloggers?status=Manutenção&sort=-proxima_calibracao').get_json()
+    assert {item['status'] for item in lista} == {'Manutenção'}
+
+    ids, _ = percorrer(cliente, 'status=Manutenção&sort=-proxima_calibracao', limite=4)
+
+    assert ids == [item['id'] for item in lista]
+
+
+def test_sem_limite_a_resposta_continua_sendo_a_lista(cliente, frota):
+    assert isinstance(cliente.get('/api/dataloggers').get_json(), list)
+
+
+@pytest.mark.parametrize('consulta', ['sort=inexistente', 'cursor=zz&limit=2', 'limit=abc'])
+def test_parametros_invalidos_respondem_400(cliente, frota, consulta):
+    resposta = cliente.get(f'/api/dataloggers?{consulta}')
+
+    assert resposta.status_code == 400
+    assert 'error' in resposta.get_json()
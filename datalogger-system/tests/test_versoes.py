@@ -0,0 +1,49 @@
+import sqlite3
+
+from flask import g
+
+from src.services.auditoria_sql import orcamento_consultas
+from src.services.versoes import versoes_lidas
+
+
+def escrever_por_fora(caminho, tabela, comando):
+    """Escrita de outro worker: não passa pela sessão (nem invalida o cache) deste processo."""
+    conexao = sqlite3.connect(caminho)
+    conexao.execute(comando)
+    conexao.execute('UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = ?', (tabela,))
+    conexao.commit()
+    conexao.close()
+
+
+def test_etag_muda_quando_a_tabela_muda(cliente, api):
+    etag = cliente.get('/api/clientes').headers['ETag']
+    assert cliente.get('/api/clientes', headers={'If-None-Match': etag}).status_code == 304
+
+    api.novo_cliente()
+
+    assert cliente.get('/api/clientes', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_resumo_acompanha_o_etag_com_escrita_de_outro_worker(cliente, api, tmp_path):
+    api.novo_datalogger('S1')
+    primeira = cliente.get('/api/dashboard/resumo')
+    assert primeira.get_json()['total_dataloggers'] == 1
+
+    escrever_por_fora(tmp_path / 'principal.db', 'dataloggers',
+                      "INSERT INTO dataloggers (numero_serie, modelo, status) VALUES ('S2', 'A', 'Estoque')")
+
+    segunda = cliente.get('/api/dashboard/resumo')
+    assert segunda.headers['ETag'] != primeira.headers['ETag']
+    # O corpo corresponde ao ETag novo, não ao snapshot em cache da versão anterior
+    assert segunda.get_json()['total_dataloggers'] == 2
+    assert cliente.get('/api/dashboard/resumo', headers={'If-None-Match': segunda.headers['ETag']}).status_code == 304
+
+
+def test_versoes_lidas_reaproveita_as_do_etag(app):
+    with app.test_request_context('/api/dashboard/resumo'):
+        g.versoes_etag = {'dataloggers': 7, 'demandas': 3, 'alocacoes': 5}
+        with orcamento_consultas(0):
+            assert versoes_lidas(('demandas', 'dataloggers')) == (('dataloggers', 7), ('demandas', 3))
+        # Tabela fora do ETag: consulta só a que falta
+        with orcamento_consultas(1):
+            assert versoes_lidas(('clientes', 'demandas')) == (('clientes', 0), ('demandas', 3))